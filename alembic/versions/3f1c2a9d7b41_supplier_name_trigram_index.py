@@ -0,0 +1,85 @@
+"""supplier_name_trigram_index
+
+Revision ID: 3f1c2a9d7b41
+Revises: 806bb6a6540c
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c2a9d7b41"
+down_revision: Union[str, None] = "806bb6a6540c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# DDL congelado nesta revisão (não importar de app.db.search, que pode mudar)
+UPGRADE = {
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS dim_supplier_name_fts USING fts5(
+            supplier_name,
+            content='dim_supplier',
+            content_rowid='supplier_id',
+            tokenize='trigram'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS dim_supplier_name_fts_ai
+        AFTER INSERT ON dim_supplier BEGIN
+            INSERT INTO dim_supplier_name_fts(rowid, supplier_name)
+            VALUES (new.supplier_id, new.supplier_name);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS dim_supplier_name_fts_ad
+        AFTER DELETE ON dim_supplier BEGIN
+            INSERT INTO dim_supplier_name_fts(dim_supplier_name_fts, rowid, supplier_name)
+            VALUES ('delete', old.supplier_id, old.supplier_name);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS dim_supplier_name_fts_au
+        AFTER UPDATE OF supplier_name ON dim_supplier BEGIN
+            INSERT INTO dim_supplier_name_fts(dim_supplier_name_fts, rowid, supplier_name)
+            VALUES ('delete', old.supplier_id, old.supplier_name);
+            INSERT INTO dim_supplier_name_fts(rowid, supplier_name)
+            VALUES (new.supplier_id, new.supplier_name);
+        END
+        """,
+        # Indexa os fornecedores já cadastrados
+        "INSERT INTO dim_supplier_name_fts(dim_supplier_name_fts) VALUES ('rebuild')",
+    ],
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        """
+        CREATE INDEX IF NOT EXISTS ix_dim_supplier_name_trgm
+        ON dim_supplier USING gin (supplier_name gin_trgm_ops)
+        """,
+    ],
+}
+
+DOWNGRADE = {
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS dim_supplier_name_fts_ai",
+        "DROP TRIGGER IF EXISTS dim_supplier_name_fts_ad",
+        "DROP TRIGGER IF EXISTS dim_supplier_name_fts_au",
+        "DROP TABLE IF EXISTS dim_supplier_name_fts",
+    ],
+    "postgresql": ["DROP INDEX IF EXISTS ix_dim_supplier_name_trgm"],
+}
+
+
+def upgrade() -> None:
+    for statement in UPGRADE.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in DOWNGRADE.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
@@ -0,0 +1,94 @@
+"""warranty_comments_fulltext_index
+
+Revision ID: 8a4e6b2c1d97
+Revises: 3f1c2a9d7b41
+Create Date: 2026-10-19 10:04:17.552931
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8a4e6b2c1d97"
+down_revision: Union[str, None] = "3f1c2a9d7b41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# DDL congelado nesta revisão (não importar de app.db.search, que pode mudar)
+UPGRADE = {
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS fact_warranties_fts USING fts5(
+            client_comment,
+            tech_comment,
+            content='fact_warranties',
+            content_rowid='claim_key',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS fact_warranties_fts_ai
+        AFTER INSERT ON fact_warranties BEGIN
+            INSERT INTO fact_warranties_fts(rowid, client_comment, tech_comment)
+            VALUES (new.claim_key, new.client_comment, new.tech_comment);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS fact_warranties_fts_ad
+        AFTER DELETE ON fact_warranties BEGIN
+            INSERT INTO fact_warranties_fts(
+                fact_warranties_fts, rowid, client_comment, tech_comment
+            )
+            VALUES ('delete', old.claim_key, old.client_comment, old.tech_comment);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS fact_warranties_fts_au
+        AFTER UPDATE OF client_comment, tech_comment ON fact_warranties BEGIN
+            INSERT INTO fact_warranties_fts(
+                fact_warranties_fts, rowid, client_comment, tech_comment
+            )
+            VALUES ('delete', old.claim_key, old.client_comment, old.tech_comment);
+            INSERT INTO fact_warranties_fts(rowid, client_comment, tech_comment)
+            VALUES (new.claim_key, new.client_comment, new.tech_comment);
+        END
+        """,
+        # Indexa as garantias já cadastradas
+        "INSERT INTO fact_warranties_fts(fact_warranties_fts) VALUES ('rebuild')",
+    ],
+    "postgresql": [
+        """
+        CREATE INDEX IF NOT EXISTS ix_fact_warranties_comments_fts
+        ON fact_warranties USING gin (
+            to_tsvector(
+                'portuguese',
+                coalesce(client_comment, '') || ' ' || coalesce(tech_comment, '')
+            )
+        )
+        """,
+    ],
+}
+
+DOWNGRADE = {
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS fact_warranties_fts_ai",
+        "DROP TRIGGER IF EXISTS fact_warranties_fts_ad",
+        "DROP TRIGGER IF EXISTS fact_warranties_fts_au",
+        "DROP TABLE IF EXISTS fact_warranties_fts",
+    ],
+    "postgresql": ["DROP INDEX IF EXISTS ix_fact_warranties_comments_fts"],
+}
+
+
+def upgrade() -> None:
+    for statement in UPGRADE.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in DOWNGRADE.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
@@ -1,19 +1,24 @@
 from datetime import timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
+from ..core.cache import call_store
 from ..core.security import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     create_access_token,
+    decode_access_token,
     get_current_active_user,
-    get_password_hash,
-    verify_password,
+    oauth2_scheme,
+    password_hasher,
+    revoke_token,
 )
+from ..core.sessions import sessions
 from ..db.database import get_db
+from ..db.statements import USER_BY_EMAIL, USER_BY_USERNAME
 from ..models.auth import User
-from ..schemas.auth import Token
+from ..schemas.auth import RefreshRequest, Token
 from ..schemas.auth import User as UserSchema
 from ..schemas.auth import UserCreate
 
@@ -21,9 +26,9 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserSchema)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     # Verifica se o usuário já existe
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = db.scalars(USER_BY_EMAIL, {"email": user.email}).first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -31,7 +36,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Cria o novo usuário
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = User(
         email=user.email,
         username=user.username,
@@ -45,36 +50,84 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     return db_user
 
 
+def _issue_tokens(username: str, session_id: str, refresh_token: str) -> dict:
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": username, "sid": session_id},
+        expires_delta=access_token_expires,
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": int(access_token_expires.total_seconds()),
+        "refresh_token": refresh_token,
+    }
+
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
     # Autentica o usuário
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = db.scalars(USER_BY_USERNAME, {"username": form_data.username}).first()
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(
+            form_data.password, user.hashed_password
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Cria o token de acesso
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+    # Atualiza o hash gerado com algoritmo ou custo antigos
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+
+    # Abre a sessão e cria os tokens de acesso e de renovação
+    session_id, refresh_token = await call_store(
+        sessions, sessions.create, user.username
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return _issue_tokens(user.username, session_id, refresh_token)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(body: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Emite um novo token de acesso a partir do refresh token, sem repetir a
+    verificação de senha. O refresh token é rotacionado a cada uso.
+    """
+    username, session_id, refresh_token = await call_store(
+        sessions, sessions.rotate, body.refresh_token
+    )
+    user = db.scalars(USER_BY_USERNAME, {"username": username}).first()
+    if user is None or not user.is_active:
+        await call_store(sessions, sessions.revoke, session_id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token inválido ou expirado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return _issue_tokens(username, session_id, refresh_token)
 
 
 @router.post("/logout")
 async def logout(
-    response: Response, _current_user: dict = Depends(get_current_active_user)
+    token: str = Depends(oauth2_scheme),
+    _current_user: dict = Depends(get_current_active_user),
 ):
     """
     Realiza o logout do usuário atual.
-    Invalida o token atual removendo o cookie de autenticação.
+    Revoga o token, que deixa de ser aceito imediatamente, e encerra a
+    sessão, invalidando o refresh token.
     """
-    response.delete_cookie(key="access_token")
+    payload = await decode_access_token(token)
+    await revoke_token(payload)
+    if "sid" in payload:
+        await call_store(sessions, sessions.revoke, payload["sid"])
     return {"message": "Logout realizado com sucesso"}
 
 
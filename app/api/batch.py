@@ -0,0 +1,126 @@
+import json
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
+
+from ..core.responses import FastJSONResponse
+from ..core.security import (
+    USER_CACHE_FIELDS,
+    authenticated_user,
+    get_current_active_user,
+)
+from ..db.database import get_db, shared_session
+from ..models.auth import User
+from ..schemas.batch import BatchRequest, BatchResponse, BatchSubRequest
+
+router = APIRouter(prefix="/api/v1", tags=["batch"])
+
+# Headers da requisição de batch repassados a todas as sub-requisições
+FORWARDED_HEADERS = {b"authorization", b"accept", b"user-agent", b"x-forwarded-for"}
+
+# Chaves do scope da requisição de batch herdadas pelas sub-requisições; as demais
+# (route, path_params, as preenchidas por middlewares...) são da rota /batch
+INHERITED_SCOPE = (
+    "type",
+    "http_version",
+    "scheme",
+    "server",
+    "client",
+    "root_path",
+    "app",
+    "state",
+)
+
+
+async def _dispatch(request: Request, sub: BatchSubRequest, db: Session) -> Dict:
+    """
+    Executa a sub-requisição na própria aplicação, sem passar pela rede. Se ela
+    falhar, a sessão compartilhada é revertida para não contaminar as seguintes.
+    """
+    url = urlsplit(sub.path)
+    headers: List[Tuple[bytes, bytes]] = [
+        (name, value)
+        for name, value in request.scope["headers"]
+        if name in FORWARDED_HEADERS
+    ]
+    headers += [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in sub.headers.items()
+        if name.lower() not in ("authorization", "accept-encoding", "content-length")
+    ]
+    scope = {
+        **{k: request.scope[k] for k in INHERITED_SCOPE if k in request.scope},
+        "method": sub.method,
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": headers,
+        "state": dict(request.scope.get("state", {})),
+    }
+    status_code, response_headers, chunks = 500, {}, []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code, response_headers
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            response_headers = {
+                k.decode("latin-1"): v.decode("latin-1")
+                for k, v in message.get("headers", [])
+            }
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        db.rollback()
+        status_code = 500
+        chunks = [b'{"detail":"Internal Server Error"}']
+        response_headers = {"content-type": "application/json"}
+
+    raw = b"".join(chunks)
+    body = raw.decode("utf-8", errors="replace") if raw else None
+    if raw and response_headers.get("content-type", "").startswith("application/json"):
+        body = json.loads(raw)
+    response_headers.pop("content-length", None)
+    return {
+        "id": sub.id,
+        "status": status_code,
+        "headers": response_headers,
+        "body": body,
+    }
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def batch(
+    batch_request: BatchRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Executa várias consultas (GET) da API numa única requisição.
+    A autenticação é feita uma vez e todas as sub-requisições usam a mesma
+    sessão de banco, uma após a outra (os endpoints acessam o banco de forma
+    síncrona, na mesma conexão); as respostas vêm na ordem dos pedidos, com
+    status, headers e corpo de cada uma.
+    Requer autenticação.
+    """
+    # Cópia desligada da sessão, como a do cache de usuários: o rollback após uma
+    # sub-requisição com falha expira as instâncias carregadas na sessão
+    user = User(**{field: getattr(current_user, field) for field in USER_CACHE_FIELDS})
+    user_token = authenticated_user.set(user)
+    session_token = shared_session.set(db)
+    try:
+        responses = [
+            await _dispatch(request, sub, db) for sub in batch_request.requests
+        ]
+    finally:
+        shared_session.reset(session_token)
+        authenticated_user.reset(user_token)
+    return FastJSONResponse({"responses": responses})
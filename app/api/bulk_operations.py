@@ -3,8 +3,18 @@ from typing import Any, Dict, List
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
+from ..core.columnar import ColumnarRows, bulk_body, bulk_openapi
+from ..core.conditional import ResourceVersion, conditional_get
+from ..core.responses import FastJSONResponse
 from ..core.security import get_current_active_user
 from ..db.database import get_db
+from ..models.models import (
+    DimParts,
+    DimPurchances,
+    DimSupplier,
+    DimVehicle,
+    FactWarranties,
+)
 from ..schemas.bulk_operations import (
     BulkCreatePart,
     BulkCreatePurchance,
@@ -19,75 +29,137 @@ from ..services.bulk_operations import BulkOperationsService
 
 router = APIRouter(prefix="/api/v1", tags=["bulk_operations"])
 
+# Tabelas lidas pelas rotas de analytics, para o ETag
+READ_TABLES = (
+    "dim_supplier",
+    "dim_parts",
+    "dim_purchances",
+    "fact_warranties",
+    "dim_vehicle",
+    "dim_locations",
+)
+read_version = conditional_get(*READ_TABLES)
+
 
-@router.post("/vehicles/bulk", response_model=List[Dict[str, Any]])
+@router.post(
+    "/vehicles/bulk",
+    response_model=List[Dict[str, Any]],
+    openapi_extra=bulk_openapi(BulkCreateVehicle),
+)
 async def bulk_create_vehicles(
-    vehicles: BulkCreateVehicle,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    vehicles: BulkCreateVehicle | ColumnarRows = Depends(bulk_body(BulkCreateVehicle)),
 ):
     """
     Cria múltiplos veículos em uma única operação.
+    Aceita JSON, Arrow IPC, Parquet ou MessagePack (pelo Content-Type).
     Requer autenticação.
     """
     service = BulkOperationsService(db)
-    return await service.bulk_create_vehicles(vehicles)
+    if isinstance(vehicles, ColumnarRows):
+        return FastJSONResponse(
+            await service.bulk_insert_rows(DimVehicle, vehicles.to_rows())
+        )
+    return FastJSONResponse(await service.bulk_create_vehicles(vehicles))
 
 
-@router.post("/parts/bulk", response_model=List[Dict[str, Any]])
+@router.post(
+    "/parts/bulk",
+    response_model=List[Dict[str, Any]],
+    openapi_extra=bulk_openapi(BulkCreatePart),
+)
 async def bulk_create_parts(
-    parts: BulkCreatePart,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    parts: BulkCreatePart | ColumnarRows = Depends(bulk_body(BulkCreatePart)),
 ):
     """
     Cria múltiplas peças em uma única operação.
+    Aceita JSON, Arrow IPC, Parquet ou MessagePack (pelo Content-Type).
     Requer autenticação.
     """
     service = BulkOperationsService(db)
-    return await service.bulk_create_parts(parts)
+    if isinstance(parts, ColumnarRows):
+        return FastJSONResponse(
+            await service.bulk_insert_rows(DimParts, parts.to_rows())
+        )
+    return FastJSONResponse(await service.bulk_create_parts(parts))
 
 
-@router.post("/suppliers/bulk", response_model=List[Dict[str, Any]])
+@router.post(
+    "/suppliers/bulk",
+    response_model=List[Dict[str, Any]],
+    openapi_extra=bulk_openapi(BulkCreateSupplier),
+)
 async def bulk_create_suppliers(
-    suppliers: BulkCreateSupplier,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    suppliers: BulkCreateSupplier | ColumnarRows = Depends(
+        bulk_body(BulkCreateSupplier)
+    ),
 ):
     """
     Cria múltiplos fornecedores em uma única operação.
+    Aceita JSON, Arrow IPC, Parquet ou MessagePack (pelo Content-Type).
     Requer autenticação.
     """
     service = BulkOperationsService(db)
-    return await service.bulk_create_suppliers(suppliers)
+    if isinstance(suppliers, ColumnarRows):
+        return FastJSONResponse(
+            await service.bulk_insert_rows(DimSupplier, suppliers.to_rows())
+        )
+    return FastJSONResponse(await service.bulk_create_suppliers(suppliers))
 
 
-@router.post("/purchances/bulk", response_model=List[Dict[str, Any]])
+@router.post(
+    "/purchances/bulk",
+    response_model=List[Dict[str, Any]],
+    openapi_extra=bulk_openapi(BulkCreatePurchance),
+)
 async def bulk_create_purchances(
-    purchances: BulkCreatePurchance,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    purchances: BulkCreatePurchance | ColumnarRows = Depends(
+        bulk_body(BulkCreatePurchance)
+    ),
 ):
     """
     Cria múltiplas transações em uma única operação.
+    Aceita JSON, Arrow IPC, Parquet ou MessagePack (pelo Content-Type).
     Requer autenticação.
     """
     service = BulkOperationsService(db)
-    return await service.bulk_create_purchances(purchances)
+    if isinstance(purchances, ColumnarRows):
+        return FastJSONResponse(
+            await service.bulk_insert_rows(DimPurchances, purchances.to_rows())
+        )
+    return FastJSONResponse(await service.bulk_create_purchances(purchances))
 
 
-@router.post("/warranties/bulk", response_model=List[Dict[str, Any]])
+@router.post(
+    "/warranties/bulk",
+    response_model=List[Dict[str, Any]],
+    openapi_extra=bulk_openapi(BulkCreateWarranty),
+)
 async def bulk_create_warranties(
-    warranties: BulkCreateWarranty,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    warranties: BulkCreateWarranty | ColumnarRows = Depends(
+        bulk_body(BulkCreateWarranty)
+    ),
 ):
     """
     Cria múltiplas garantias em uma única operação.
+    Aceita JSON, Arrow IPC, Parquet ou MessagePack (pelo Content-Type).
     Requer autenticação.
     """
     service = BulkOperationsService(db)
-    return await service.bulk_create_warranties(warranties)
+    if isinstance(warranties, ColumnarRows):
+        return FastJSONResponse(
+            await service.bulk_insert_rows(FactWarranties, warranties.to_rows())
+        )
+    return FastJSONResponse(await service.bulk_create_warranties(warranties))
 
 
 @router.get("/analytics/supplier-sales")
@@ -98,6 +170,7 @@ async def get_supplier_sales_analytics(
     end_date: str | None = None,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
 ):
     """
     Retorna análise de vendas por fornecedor.
@@ -111,7 +184,10 @@ async def get_supplier_sales_analytics(
         if start_date and end_date
         else None
     )
-    return await service.get_supplier_sales_analytics(supplier_filter, date_range)
+    return FastJSONResponse(
+        await service.get_supplier_sales_analytics(supplier_filter, date_range),
+        headers=version.headers,
+    )
 
 
 @router.get("/analytics/warranty-by-model")
@@ -120,6 +196,7 @@ async def get_warranty_analytics_by_model(
     end_date: str | None = None,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
 ):
     """
     Retorna análise de garantias por modelo de veículo.
@@ -132,7 +209,10 @@ async def get_warranty_analytics_by_model(
         if start_date and end_date
         else None
     )
-    return await service.get_warranty_analytics_by_model(date_range)
+    return FastJSONResponse(
+        await service.get_warranty_analytics_by_model(date_range),
+        headers=version.headers,
+    )
 
 
 @router.get("/analytics/transactions")
@@ -143,6 +223,7 @@ async def get_transaction_analytics(
     part_id: int | None = None,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
 ):
     """
     Retorna análise de transações com opções de filtro por data, tipo e peça.
@@ -159,7 +240,9 @@ async def get_transaction_analytics(
         if start_date and end_date
         else None
     )
-    return await service.get_transaction_analytics(filter)
+    return FastJSONResponse(
+        await service.get_transaction_analytics(filter), headers=version.headers
+    )
 
 
 @router.get("/analytics/supplier-transactions")
@@ -168,6 +251,7 @@ async def get_average_transactions_by_supplier(
     end_date: str | None = None,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
 ):
     """
     Retorna análise de transações por fornecedor, incluindo:
@@ -182,7 +266,10 @@ async def get_average_transactions_by_supplier(
         if start_date and end_date
         else None
     )
-    return await service.get_average_transactions_by_supplier(date_range)
+    return FastJSONResponse(
+        await service.get_average_transactions_by_supplier(date_range),
+        headers=version.headers,
+    )
 
 
 @router.get("/analytics/model-transactions")
@@ -191,6 +278,7 @@ async def get_transactions_by_model(
     end_date: str | None = None,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
 ):
     """
     Retorna análise de transações por modelo de veículo, incluindo:
@@ -205,7 +293,9 @@ async def get_transactions_by_model(
         if start_date and end_date
         else None
     )
-    return await service.get_transactions_by_model(date_range)
+    return FastJSONResponse(
+        await service.get_transactions_by_model(date_range), headers=version.headers
+    )
 
 
 @router.get("/analytics/part-performance")
@@ -214,6 +304,7 @@ async def get_part_performance_analytics(
     end_date: str | None = None,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
 ):
     """
     Retorna análise de desempenho das peças, incluindo:
@@ -228,4 +319,7 @@ async def get_part_performance_analytics(
         if start_date and end_date
         else None
     )
-    return await service.get_part_performance_analytics(date_range)
+    return FastJSONResponse(
+        await service.get_part_performance_analytics(date_range),
+        headers=version.headers,
+    )
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends
+
+from ..core.compression import compression_stats
+from ..core.security import get_current_active_user, password_hasher
+from ..db.statements import statement_cache_stats
+
+router = APIRouter(prefix="/api/v1/diagnostics", tags=["diagnostics"])
+
+
+@router.get("/statement-cache")
+async def get_statement_cache_stats(
+    _current_user: dict = Depends(get_current_active_user),
+):
+    """
+    Retorna os contadores do cache de compilação de SQL do processo.
+    Requer autenticação.
+    """
+    return statement_cache_stats()
+
+
+@router.get("/password-hashing")
+async def get_password_hashing_stats(
+    _current_user: dict = Depends(get_current_active_user),
+):
+    """
+    Retorna a ocupação do pool de hash de senhas e os tempos de fila.
+    Requer autenticação.
+    """
+    return password_hasher.stats()
+
+
+@router.get("/compression")
+async def get_compression_stats(
+    _current_user: dict = Depends(get_current_active_user),
+):
+    """
+    Retorna bytes economizados e CPU gasta na compressão, por algoritmo.
+    Requer autenticação.
+    """
+    return compression_stats()
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from ..core.metrics import CONTENT_TYPE, render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Métricas do processo no formato do Prometheus.
+    Só é incluída com METRICS_ENABLED (ver create_app) e não requer
+    autenticação: restrinja o acesso na rede ou no proxy.
+    """
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
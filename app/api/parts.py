@@ -0,0 +1,90 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from ..core.conditional import ResourceVersion, conditional_get
+from ..core.expansion import parse_expand, serialize, with_expansions
+from ..core.fieldsets import parse_fields, projected_page
+from ..core.pagination import keyset_paginate, page_size
+from ..core.security import get_current_active_user
+from ..db.database import get_db
+from ..db.statements import PART_BY_ID
+from ..models.models import DimParts
+from ..schemas.base import Part, PartRead
+from ..schemas.pagination import Page
+
+router = APIRouter(prefix="/api/v1/parts", tags=["parts"])
+
+# Tabelas lidas pelas rotas de consulta (inclusive via expand), para o ETag
+READ_TABLES = (
+    "dim_parts",
+    "dim_supplier",
+    "dim_locations",
+    "fact_warranties",
+    "dim_purchances",
+)
+read_version = conditional_get(*READ_TABLES)
+
+EXPANDABLE = {"supplier", "supplier.location", "warranties", "purchances"}
+
+
+@router.get("/", response_model=Page[PartRead], response_model_exclude_unset=True)
+async def list_parts(
+    supplier_id: Optional[int] = None,
+    expand: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_size),
+    db: Session = Depends(get_db),
+    _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
+):
+    """
+    Lista as peças, com filtro opcional por fornecedor.
+    Paginação por cursor (`next_cursor`).
+    `expand` aceita: supplier, supplier.location, warranties, purchances.
+    `fields` retorna apenas as colunas informadas (ex.: `fields=a,b`).
+    Requer autenticação.
+    """
+    tree = parse_expand(expand, EXPANDABLE)
+    columns = parse_fields(fields, Part, DimParts, tree)
+    query = (
+        db.query(*columns)
+        if columns
+        else with_expansions(db.query(DimParts), DimParts, tree)
+    )
+
+    if supplier_id:
+        query = query.filter(DimParts.supplier_id == supplier_id)
+
+    items, next_cursor = keyset_paginate(query, DimParts.part_id, cursor, limit)
+    if columns:
+        return projected_page(items, next_cursor, version.headers)
+    return {
+        "items": [serialize(item, tree) for item in items],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/{part_id}", response_model=PartRead, response_model_exclude_unset=True)
+async def get_part(
+    part_id: int,
+    expand: Optional[str] = None,
+    db: Session = Depends(get_db),
+    _current_user: dict = Depends(get_current_active_user),
+    _version: ResourceVersion = Depends(read_version),
+):
+    """
+    Retorna uma peça específica pelo ID.
+    `expand` aceita: supplier, supplier.location, warranties, purchances.
+    Requer autenticação.
+    """
+    tree = parse_expand(expand, EXPANDABLE)
+    statement = with_expansions(PART_BY_ID, DimParts, tree)
+    part = db.scalars(statement, {"part_id": part_id}).first()
+    if not part:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Peça não encontrada"
+        )
+    return serialize(part, tree)
@@ -1,37 +1,101 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
+from ..core.conditional import ResourceVersion, conditional_get
+from ..core.expansion import parse_expand, serialize, with_expansions
+from ..core.fieldsets import parse_fields, projected_page
+from ..core.pagination import keyset_paginate, page_size
 from ..core.security import get_current_active_user
 from ..db.database import get_db
+from ..db.statements import SUPPLIER_BY_ID
 from ..models.models import DimSupplier
-from ..schemas.base import Supplier, SupplierCreate
+from ..schemas.base import (
+    Supplier,
+    SupplierCreate,
+    SupplierRead,
+    SupplierSearchResult,
+)
+from ..schemas.pagination import Page
+from ..services.supplier_search import SearchMode, SupplierSearchService
 
 router = APIRouter(prefix="/api/v1/suppliers", tags=["suppliers"])
 
+# Tabelas lidas pelas rotas de consulta (inclusive via expand), para o ETag
+READ_TABLES = (
+    "dim_supplier",
+    "dim_locations",
+    "dim_parts",
+    "fact_warranties",
+)
+read_version = conditional_get(*READ_TABLES)
 
-@router.get("/", response_model=List[Supplier])
+EXPANDABLE = {"location", "parts", "parts.warranties"}
+
+
+@router.get("/", response_model=Page[SupplierRead], response_model_exclude_unset=True)
 async def list_suppliers(
     name: str | None = None,
     location_id: int | None = None,
-    skip: int = 0,
-    limit: int = 100,
+    expand: str | None = None,
+    fields: str | None = None,
+    cursor: str | None = None,
+    limit: int = Depends(page_size),
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
 ):
     """
     Lista todos os fornecedores com opção de filtro por nome e localização.
+    A paginação é feita por cursor: use o `next_cursor` da resposta para
+    obter a página seguinte.
+    `expand` aceita: location, parts, parts.warranties.
+    `fields` retorna apenas as colunas informadas (ex.: `fields=a,b`).
     Requer autenticação.
     """
-    query = db.query(DimSupplier)
+    tree = parse_expand(expand, EXPANDABLE)
+    columns = parse_fields(fields, Supplier, DimSupplier, tree)
+    query = (
+        db.query(*columns)
+        if columns
+        else with_expansions(db.query(DimSupplier), DimSupplier, tree)
+    )
 
     if name:
-        query = query.filter(DimSupplier.supplier_name.ilike(f"%{name}%"))
+        query = query.filter(SupplierSearchService(db).name_filter(name))
     if location_id:
         query = query.filter(DimSupplier.location_id == location_id)
 
-    return query.offset(skip).limit(limit).all()
+    items, next_cursor = keyset_paginate(query, DimSupplier.supplier_id, cursor, limit)
+    if columns:
+        return projected_page(items, next_cursor, version.headers)
+    return {
+        "items": [serialize(item, tree) for item in items],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/search", response_model=List[SupplierSearchResult])
+async def search_suppliers(
+    q: str = Query(..., min_length=1, max_length=50),
+    mode: SearchMode = SearchMode.substring,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    _current_user: dict = Depends(get_current_active_user),
+    _version: ResourceVersion = Depends(read_version),
+):
+    """
+    Busca fornecedores pelo nome usando o índice de trigramas.
+    Modos: `prefix` (começa com), `substring` (contém) e `fuzzy`
+    (aproximado, tolera erros de digitação). Resultados ordenados por relevância.
+    Requer autenticação.
+    """
+    results = SupplierSearchService(db).search(q, mode, limit)
+    return [
+        {**Supplier.model_validate(supplier).model_dump(), "score": score}
+        for supplier, score in results
+    ]
 
 
 @router.post("/", response_model=Supplier, status_code=status.HTTP_201_CREATED)
@@ -51,24 +115,29 @@ async def create_supplier(
     return db_supplier
 
 
-@router.get("/{supplier_id}", response_model=Supplier)
+@router.get(
+    "/{supplier_id}", response_model=SupplierRead, response_model_exclude_unset=True
+)
 async def get_supplier(
     supplier_id: int,
+    expand: str | None = None,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    _version: ResourceVersion = Depends(read_version),
 ):
     """
     Retorna um fornecedor específico por ID.
+    `expand` aceita: location, parts, parts.warranties.
     Requer autenticação.
     """
-    supplier = (
-        db.query(DimSupplier).filter(DimSupplier.supplier_id == supplier_id).first()
-    )
+    tree = parse_expand(expand, EXPANDABLE)
+    statement = with_expansions(SUPPLIER_BY_ID, DimSupplier, tree)
+    supplier = db.scalars(statement, {"supplier_id": supplier_id}).first()
     if not supplier:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Fornecedor não encontrado"
         )
-    return supplier
+    return serialize(supplier, tree)
 
 
 @router.put("/{supplier_id}", response_model=Supplier)
@@ -82,9 +151,7 @@ async def update_supplier(
     Atualiza um fornecedor existente.
     Requer autenticação.
     """
-    db_supplier = (
-        db.query(DimSupplier).filter(DimSupplier.supplier_id == supplier_id).first()
-    )
+    db_supplier = db.scalars(SUPPLIER_BY_ID, {"supplier_id": supplier_id}).first()
     if not db_supplier:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Fornecedor não encontrado"
@@ -108,9 +175,7 @@ async def delete_supplier(
     Remove um fornecedor.
     Requer autenticação.
     """
-    db_supplier = (
-        db.query(DimSupplier).filter(DimSupplier.supplier_id == supplier_id).first()
-    )
+    db_supplier = db.scalars(SUPPLIER_BY_ID, {"supplier_id": supplier_id}).first()
     if not db_supplier:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Fornecedor não encontrado"
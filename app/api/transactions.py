@@ -1,64 +1,140 @@
 from datetime import date
-from typing import List, Optional
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from ..core.conditional import ResourceVersion, conditional_get
+from ..core.expansion import parse_expand, serialize, with_expansions
+from ..core.fieldsets import parse_fields, projected_page
+from ..core.pagination import keyset_paginate, page_size
 from ..core.security import get_current_active_user
 from ..db.database import get_db
+from ..db.statements import TRANSACTION_BY_ID
 from ..models.models import DimPurchances
-from ..schemas.base import Purchance, PurchanceCreate
+from ..schemas.base import Purchance, PurchanceCreate, PurchanceRead
+from ..schemas.pagination import Page
+from ..services.export import ExportFormat, export_response
 
 router = APIRouter(prefix="/api/v1/transactions", tags=["transactions"])
 
+# Tabelas lidas pelas rotas de consulta (inclusive via expand), para o ETag
+READ_TABLES = (
+    "dim_purchances",
+    "dim_parts",
+    "dim_supplier",
+    "fact_warranties",
+)
+read_version = conditional_get(*READ_TABLES)
 
-@router.get("/", response_model=List[Purchance])
+EXPANDABLE = {"part", "part.supplier", "warranties"}
+
+
+def _apply_filters(query, purchance_type, start_date, end_date, part_id):
+    """Aplica os filtros comuns à listagem e à exportação"""
+    if purchance_type:
+        query = query.filter(DimPurchances.purchance_type == purchance_type)
+    if start_date and end_date:
+        query = query.filter(DimPurchances.purchance_date.between(start_date, end_date))
+    if part_id:
+        query = query.filter(DimPurchances.part_id == part_id)
+    return query
+
+
+@router.get("/", response_model=Page[PurchanceRead], response_model_exclude_unset=True)
 async def list_transactions(
     purchance_type: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     part_id: Optional[int] = None,
-    skip: int = 0,
-    limit: int = 100,
+    expand: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_size),
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
 ):
     """
     Lista todas as transações com opções de filtro.
+    A paginação é feita por cursor: use o `next_cursor` da resposta para
+    obter a página seguinte.
+    `expand` aceita: part, part.supplier, warranties.
+    `fields` retorna apenas as colunas informadas (ex.: `fields=a,b`).
     Requer autenticação.
     """
-    query = db.query(DimPurchances)
+    tree = parse_expand(expand, EXPANDABLE)
+    columns = parse_fields(fields, Purchance, DimPurchances, tree)
+    query = (
+        db.query(*columns)
+        if columns
+        else with_expansions(db.query(DimPurchances), DimPurchances, tree)
+    )
 
-    if purchance_type:
-        query = query.filter(DimPurchances.purchance_type == purchance_type)
-    if start_date and end_date:
-        query = query.filter(DimPurchances.purchance_date.between(start_date, end_date))
-    if part_id:
-        query = query.filter(DimPurchances.part_id == part_id)
+    query = _apply_filters(query, purchance_type, start_date, end_date, part_id)
 
-    return query.offset(skip).limit(limit).all()
+    items, next_cursor = keyset_paginate(
+        query, DimPurchances.purchance_id, cursor, limit
+    )
+    if columns:
+        return projected_page(items, next_cursor, version.headers)
+    return {
+        "items": [serialize(item, tree) for item in items],
+        "next_cursor": next_cursor,
+    }
 
 
-@router.get("/{purchance_id}", response_model=Purchance)
+@router.get("/export")
+async def export_transactions(
+    format: ExportFormat = ExportFormat.csv,
+    purchance_type: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    part_id: Optional[int] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+    _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
+):
+    """
+    Exporta as transações filtradas em streaming, sem paginação.
+    `format` aceita: csv, ndjson, parquet, arrow (Arrow IPC stream).
+    Os filtros e `fields` são os mesmos da listagem.
+    Requer autenticação.
+    """
+    columns = parse_fields(fields, Purchance, DimPurchances) or list(
+        DimPurchances.__table__.columns
+    )
+    statement = _apply_filters(
+        select(*columns), purchance_type, start_date, end_date, part_id
+    ).order_by(DimPurchances.purchance_id)
+    return export_response(db, statement, format, "transactions", version.headers)
+
+
+@router.get(
+    "/{purchance_id}", response_model=PurchanceRead, response_model_exclude_unset=True
+)
 async def get_transaction(
     purchance_id: int,
+    expand: Optional[str] = None,
     db: Session = Depends(get_db),
     _current_user: dict = Depends(get_current_active_user),
+    _version: ResourceVersion = Depends(read_version),
 ):
     """
     Retorna uma transação específica pelo ID.
+    `expand` aceita: part, part.supplier, warranties.
     Requer autenticação.
     """
-    transaction = (
-        db.query(DimPurchances)
-        .filter(DimPurchances.purchance_id == purchance_id)
-        .first()
-    )
+    tree = parse_expand(expand, EXPANDABLE)
+    statement = with_expansions(TRANSACTION_BY_ID, DimPurchances, tree)
+    transaction = db.scalars(statement, {"purchance_id": purchance_id}).first()
     if not transaction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Transação não encontrada"
         )
-    return transaction
+    return serialize(transaction, tree)
 
 
 @router.post("/", response_model=Purchance)
@@ -89,11 +165,9 @@ async def update_transaction(
     Atualiza uma transação existente.
     Requer autenticação.
     """
-    db_transaction = (
-        db.query(DimPurchances)
-        .filter(DimPurchances.purchance_id == purchance_id)
-        .first()
-    )
+    db_transaction = db.scalars(
+        TRANSACTION_BY_ID, {"purchance_id": purchance_id}
+    ).first()
     if not db_transaction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Transação não encontrada"
@@ -117,11 +191,9 @@ async def delete_transaction(
     Remove uma transação.
     Requer autenticação.
     """
-    db_transaction = (
-        db.query(DimPurchances)
-        .filter(DimPurchances.purchance_id == purchance_id)
-        .first()
-    )
+    db_transaction = db.scalars(
+        TRANSACTION_BY_ID, {"purchance_id": purchance_id}
+    ).first()
     if not db_transaction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Transação não encontrada"
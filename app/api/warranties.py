@@ -0,0 +1,172 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core.conditional import ResourceVersion, conditional_get
+from ..core.expansion import parse_expand, serialize, with_expansions
+from ..core.fieldsets import parse_fields, projected_page
+from ..core.pagination import keyset_paginate, page_size
+from ..core.security import get_current_active_user
+from ..db.database import get_db
+from ..db.statements import WARRANTY_BY_ID
+from ..models.models import FactWarranties
+from ..schemas.base import Warranty, WarrantyRead, WarrantySearchHit
+from ..schemas.pagination import Page
+from ..services.export import ExportFormat, export_response
+from ..services.warranty_search import WarrantySearchService
+
+router = APIRouter(prefix="/api/v1/warranties", tags=["warranties"])
+
+# Tabelas lidas pelas rotas de consulta (inclusive via expand), para o ETag
+READ_TABLES = (
+    "fact_warranties",
+    "dim_vehicle",
+    "dim_parts",
+    "dim_supplier",
+    "dim_locations",
+    "dim_purchances",
+)
+read_version = conditional_get(*READ_TABLES)
+
+EXPANDABLE = {"vehicle", "part", "part.supplier", "location", "purchance"}
+
+
+def _apply_filters(query, start_date, end_date, part_id, vehicle_id):
+    """Aplica os filtros comuns à listagem e à exportação"""
+    if start_date and end_date:
+        query = query.filter(FactWarranties.repair_date.between(start_date, end_date))
+    if part_id:
+        query = query.filter(FactWarranties.part_id == part_id)
+    if vehicle_id:
+        query = query.filter(FactWarranties.vehicle_id == vehicle_id)
+    return query
+
+
+@router.get("/", response_model=Page[WarrantyRead], response_model_exclude_unset=True)
+async def list_warranties(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    part_id: Optional[int] = None,
+    vehicle_id: Optional[int] = None,
+    expand: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_size),
+    db: Session = Depends(get_db),
+    _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
+):
+    """
+    Lista as garantias com filtros por período de reparo, peça e veículo.
+    Paginação por cursor (`next_cursor`).
+    `expand` aceita: vehicle, part, part.supplier, location, purchance.
+    `fields` retorna apenas as colunas informadas (ex.: `fields=a,b`).
+    Requer autenticação.
+    """
+    tree = parse_expand(expand, EXPANDABLE)
+    columns = parse_fields(fields, Warranty, FactWarranties, tree)
+    query = (
+        db.query(*columns)
+        if columns
+        else with_expansions(db.query(FactWarranties), FactWarranties, tree)
+    )
+
+    query = _apply_filters(query, start_date, end_date, part_id, vehicle_id)
+
+    items, next_cursor = keyset_paginate(query, FactWarranties.claim_key, cursor, limit)
+    if columns:
+        return projected_page(items, next_cursor, version.headers)
+    return {
+        "items": [serialize(item, tree) for item in items],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/export")
+async def export_warranties(
+    format: ExportFormat = ExportFormat.csv,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    part_id: Optional[int] = None,
+    vehicle_id: Optional[int] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+    _current_user: dict = Depends(get_current_active_user),
+    version: ResourceVersion = Depends(read_version),
+):
+    """
+    Exporta as garantias filtradas em streaming, sem paginação.
+    `format` aceita: csv, ndjson, parquet, arrow (Arrow IPC stream).
+    Os filtros e `fields` são os mesmos da listagem; garantias já movidas
+    para o arquivo frio não são incluídas.
+    Requer autenticação.
+    """
+    columns = parse_fields(fields, Warranty, FactWarranties) or list(
+        FactWarranties.__table__.columns
+    )
+    statement = _apply_filters(
+        select(*columns), start_date, end_date, part_id, vehicle_id
+    ).order_by(FactWarranties.claim_key)
+    return export_response(db, statement, format, "warranties", version.headers)
+
+
+@router.get("/search", response_model=Page[WarrantySearchHit])
+async def search_warranties(
+    q: str = Query(..., min_length=1, max_length=500),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    part_id: Optional[int] = None,
+    model: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_size),
+    db: Session = Depends(get_db),
+    _current_user: dict = Depends(get_current_active_user),
+    _version: ResourceVersion = Depends(read_version),
+):
+    """
+    Busca textual nos comentários do cliente e do técnico.
+    Sintaxe: termos separados por espaço devem aparecer todos,
+    `"frase exata"`, `OR` para alternativas e `-termo` para exclusão.
+    Pode ser combinada com filtros de período, peça e modelo.
+    Resultados ordenados por relevância e paginados por cursor.
+    Requer autenticação.
+    """
+    service = WarrantySearchService(db)
+    rows, next_cursor = service.search(
+        q, start_date, end_date, part_id, model, cursor, limit
+    )
+    return {
+        "items": [
+            {**Warranty.model_validate(warranty).model_dump(), "score": -rank}
+            for warranty, rank in rows
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get(
+    "/{claim_key}", response_model=WarrantyRead, response_model_exclude_unset=True
+)
+async def get_warranty(
+    claim_key: int,
+    expand: Optional[str] = None,
+    db: Session = Depends(get_db),
+    _current_user: dict = Depends(get_current_active_user),
+    _version: ResourceVersion = Depends(read_version),
+):
+    """
+    Retorna uma garantia específica pelo claim_key.
+    `expand` aceita: vehicle, part, part.supplier, location, purchance.
+    Requer autenticação.
+    """
+    tree = parse_expand(expand, EXPANDABLE)
+    statement = with_expansions(WARRANTY_BY_ID, FactWarranties, tree)
+    warranty = db.scalars(statement, {"claim_key": claim_key}).first()
+    if not warranty:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Garantia não encontrada"
+        )
+    return serialize(warranty, tree)
@@ -0,0 +1,223 @@
+"""
+Cache server-side com expiração (TTL).
+
+Por padrão os dados ficam na memória do processo; com `REDIS_URL` definido
+o cache passa a ser compartilhado entre os workers via Redis. Os valores
+devem ser serializáveis em JSON. Código assíncrono usa `aget`/`aset`/`aadd`/
+`adelete`, que no Redis rodam no threadpool em vez de bloquear o event loop.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from .metrics import CACHE_REQUESTS
+from .settings import settings
+
+
+async def call_store(store, func, *args, **kwargs):
+    """
+    Executa uma operação síncrona de um armazenamento a partir de código
+    assíncrono. Nos armazenamentos remotos (`remote = True`, como o Redis) cada
+    operação é uma ida e volta na rede e roda no threadpool, para não bloquear
+    o event loop; na memória não há espera e a chamada é feita diretamente.
+    """
+    if store.remote:
+        return await run_in_threadpool(func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+
+class AsyncCacheOperations:
+    """Versões assíncronas das operações do cache, para rotas e middlewares"""
+
+    remote = False
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await call_store(self, self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl: float):
+        await call_store(self, self.set, key, value, ttl)
+
+    async def aadd(self, key: str, value: Any, ttl: float) -> bool:
+        return await call_store(self, self.add, key, value, ttl)
+
+    async def areplace(self, key: str, value: Any, ttl: float) -> Optional[Any]:
+        return await call_store(self, self.replace, key, value, ttl)
+
+    async def adelete(self, key: str):
+        await call_store(self, self.delete, key)
+
+
+class MemoryCache(AsyncCacheOperations):
+    """Cache em memória do processo, seguro para uso entre threads"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._data: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            CACHE_REQUESTS.inc(self.namespace, "miss")
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            with self._lock:
+                self._data.pop(key, None)
+            CACHE_REQUESTS.inc(self.namespace, "miss")
+            return None
+        CACHE_REQUESTS.inc(self.namespace, "hit")
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        """Grava só se a chave não existir (ou tiver expirado); retorna se gravou"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] >= now:
+                return False
+            self._data[key] = (now + ttl, value)
+            return True
+
+    def replace(self, key: str, value: Any, ttl: float) -> Optional[Any]:
+        """
+        Substitui atomicamente o valor de uma chave existente e retorna o
+        anterior; se a chave não existir (ou tiver expirado), não grava nada.
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < now:
+                return None
+            self._data[key] = (now + ttl, value)
+            return item[1]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def purge_expired(self) -> int:
+        """Remove as entradas expiradas e retorna quantas foram removidas"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                k for k, (expires_at, _) in self._data.items() if expires_at < now
+            ]
+            for key in expired:
+                del self._data[key]
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_redis_clients: Dict[str, Any] = {}
+
+
+def get_redis(url: str):
+    """Cliente Redis compartilhado por URL (requer o pacote redis)"""
+    if url not in _redis_clients:
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "REDIS_URL definido, mas o pacote redis não está instalado"
+            ) from exc
+        _redis_clients[url] = redis.Redis.from_url(url)
+    return _redis_clients[url]
+
+
+class RedisCache(AsyncCacheOperations):
+    """Cache compartilhado entre processos; a expiração é feita pelo Redis"""
+
+    remote = True
+
+    def __init__(self, namespace: str, url: str):
+        self.namespace = namespace
+        self.client = get_redis(url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(self._key(key))
+        CACHE_REQUESTS.inc(self.namespace, "miss" if value is None else "hit")
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.client.set(
+            self._key(key), json.dumps(value, default=str), px=int(ttl * 1000)
+        )
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        return bool(
+            self.client.set(
+                self._key(key),
+                json.dumps(value, default=str),
+                px=int(ttl * 1000),
+                nx=True,
+            )
+        )
+
+    def replace(self, key: str, value: Any, ttl: float) -> Optional[Any]:
+        # SET ... XX GET: grava só se a chave existir e devolve o valor anterior
+        previous = self.client.set(
+            self._key(key),
+            json.dumps(value, default=str),
+            px=int(ttl * 1000),
+            xx=True,
+            get=True,
+        )
+        return None if previous is None else json.loads(previous)
+
+    def delete(self, key: str):
+        self.client.delete(self._key(key))
+
+    def purge_expired(self) -> int:
+        return 0
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.namespace}:*"):
+            self.client.delete(key)
+
+
+_memory_caches: List[Any] = []
+
+
+def get_cache(namespace: str):
+    """Backend de cache configurado para o namespace informado"""
+    if settings.REDIS_URL:
+        return RedisCache(namespace, settings.REDIS_URL)
+    return register_for_eviction(MemoryCache(namespace))
+
+
+def register_for_eviction(cache):
+    """Inclui um armazenamento em memória (com purge_expired) na limpeza periódica"""
+    _memory_caches.append(cache)
+    return cache
+
+
+def purge_expired_entries() -> int:
+    """Remove as entradas expiradas de todos os caches em memória"""
+    return sum(cache.purge_expired() for cache in _memory_caches)
+
+
+async def evict_expired_periodically(interval: float):
+    """
+    Tarefa de fundo que limpa periodicamente os caches em memória, onde as
+    entradas expiradas só seriam removidas ao serem lidas novamente.
+    No Redis a expiração já é feita pelo servidor.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        purge_expired_entries()
@@ -0,0 +1,244 @@
+"""
+Corpo das cargas em massa em JSON ou em formatos colunares.
+
+O formato é escolhido pelo `Content-Type`: JSON (padrão), Arrow IPC
+(`application/vnd.apache.arrow.stream` ou `.file`), Parquet
+(`application/vnd.apache.parquet`) ou MessagePack (`application/msgpack`).
+Os formatos colunares são lidos numa tabela Arrow e validados coluna a
+coluna contra o schema dos itens (presença, nulos e conversão de tipo),
+sem criar um objeto pydantic por linha. Requerem pyarrow (e msgpack para
+MessagePack).
+"""
+
+from datetime import date, datetime
+from typing import Any, Dict, List, Union, get_args, get_origin
+
+from fastapi import HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+PARQUET = "application/vnd.apache.parquet"
+MSGPACK = "application/msgpack"
+
+# Content-Types aceitos para cada formato colunar
+COLUMNAR_TYPES = {
+    ARROW_STREAM: ARROW_STREAM,
+    ARROW_FILE: ARROW_FILE,
+    PARQUET: PARQUET,
+    "application/x-parquet": PARQUET,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Cargas em formato colunar requerem o pacote pyarrow",
+        ) from exc
+    return pyarrow
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Cargas em MessagePack requerem o pacote msgpack",
+        ) from exc
+    return msgpack
+
+
+class ColumnarRows:
+    """Linhas de uma carga colunar já validadas contra o schema dos itens"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Linhas como dicionários, prontas para um INSERT em lote"""
+        return self.table.to_pylist()
+
+
+def _items_schema(schema: type[BaseModel]):
+    """(campo da lista, schema dos itens) de um schema como BulkCreateWarranty"""
+    (field,) = schema.model_fields
+    return field, get_args(schema.model_fields[field].annotation)[0]
+
+
+def _arrow_type(pa, annotation):
+    if get_origin(annotation) is Union:
+        annotation = next(a for a in get_args(annotation) if a is not type(None))
+    return {
+        bool: pa.bool_(),
+        int: pa.int64(),
+        float: pa.float64(),
+        str: pa.string(),
+        date: pa.date32(),
+        datetime: pa.timestamp("us"),
+    }[annotation]
+
+
+def _error(field: str, column: str, error_type: str, msg: str) -> Dict[str, Any]:
+    return {"type": error_type, "loc": ("body", field, column), "msg": msg}
+
+
+def read_table(body: bytes, content_type: str, field: str):
+    """Lê o corpo colunar numa tabela Arrow"""
+    pa = _pyarrow()
+    try:
+        if content_type == ARROW_STREAM:
+            return pa.ipc.open_stream(body).read_all()
+        if content_type == ARROW_FILE:
+            return pa.ipc.open_file(pa.BufferReader(body)).read_all()
+        if content_type == PARQUET:
+            return pa.parquet.read_table(pa.BufferReader(body))
+    except pa.ArrowException as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Corpo inválido para {content_type}: {exc}",
+        ) from exc
+
+    # MessagePack: mesmo documento do JSON, com a lista de itens
+    # ({"campo": [{...}, ...]}) ou com as colunas ({"campo": {"col": [...]}})
+    msgpack = _msgpack()
+    try:
+        data = msgpack.unpackb(body, timestamp=3)[field]
+        if isinstance(data, dict):
+            return pa.Table.from_pydict(data)
+        return pa.Table.from_pylist(data)
+    except (
+        msgpack.UnpackException,
+        ValueError,
+        TypeError,
+        KeyError,
+        pa.ArrowException,
+    ) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Corpo MessagePack inválido: esperado o campo '{field}' "
+            "com a lista de itens ou as colunas",
+        ) from exc
+
+
+def validate_table(table, schema: type[BaseModel], field: str):
+    """
+    Valida e converte as colunas para os tipos do schema dos itens.
+    Colunas extras são descartadas e opcionais ausentes viram nulos.
+    """
+    pa = _pyarrow()
+    errors, columns = [], {}
+    for name, info in schema.model_fields.items():
+        target = _arrow_type(pa, info.annotation)
+        if name not in table.column_names:
+            if info.is_required():
+                errors.append(_error(field, name, "missing", "Field required"))
+            else:
+                columns[name] = pa.nulls(table.num_rows, target)
+            continue
+
+        try:
+            column = pa.compute.cast(table.column(name), target, safe=True)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as exc:
+            errors.append(
+                _error(
+                    field,
+                    name,
+                    "type_error",
+                    f"Coluna de tipo {table.column(name).type} não pode ser "
+                    f"convertida para {target}: {exc}",
+                )
+            )
+            continue
+        if info.is_required() and column.null_count:
+            errors.append(
+                _error(
+                    field,
+                    name,
+                    "missing",
+                    f"{column.null_count} linha(s) sem valor em campo obrigatório",
+                )
+            )
+        columns[name] = column
+
+    if errors:
+        raise RequestValidationError(errors)
+    return pa.table(columns)
+
+
+def bulk_body(schema: type[BaseModel]):
+    """
+    Cria a dependência que lê o corpo de uma carga em massa: retorna o
+    `schema` validado (JSON) ou `ColumnarRows` (formatos colunares).
+    """
+    field, items_schema = _items_schema(schema)
+
+    async def dependency(request: Request) -> Union[BaseModel, ColumnarRows]:
+        content_type = request.headers.get("content-type", "application/json")
+        media_type = content_type.split(";")[0].strip().lower()
+        body = await request.body()
+
+        if media_type in COLUMNAR_TYPES:
+            table = read_table(body, COLUMNAR_TYPES[media_type], field)
+            return ColumnarRows(validate_table(table, items_schema, field))
+        if media_type != "application/json" and not media_type.endswith("+json"):
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=(
+                    f"Content-Type não suportado: {media_type}. Use application/json, "
+                    + ", ".join(sorted(COLUMNAR_TYPES))
+                ),
+            )
+        try:
+            return schema.model_validate_json(body)
+        except ValidationError as exc:
+            raise RequestValidationError(
+                [
+                    {**error, "loc": ("body", *error["loc"])}
+                    for error in exc.errors(include_url=False)
+                ]
+            ) from exc
+
+    return dependency
+
+
+def _inline_refs(node, definitions):
+    if isinstance(node, dict):
+        if "$ref" in node:
+            return _inline_refs(definitions[node["$ref"].split("/")[-1]], definitions)
+        return {k: _inline_refs(v, definitions) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_inline_refs(v, definitions) for v in node]
+    return node
+
+
+def bulk_openapi(schema: type[BaseModel]) -> Dict[str, Any]:
+    """Documentação do corpo das rotas que usam `bulk_body` (openapi_extra)"""
+    json_schema = schema.model_json_schema()
+    definitions = json_schema.pop("$defs", {})
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": _inline_refs(json_schema, definitions)},
+                ARROW_STREAM: binary,
+                ARROW_FILE: binary,
+                PARQUET: binary,
+                MSGPACK: binary,
+            },
+        }
+    }
@@ -0,0 +1,277 @@
+"""
+Compressão negociada das respostas (zstd, brotli ou gzip).
+
+O algoritmo é escolhido pelo `Accept-Encoding` do cliente entre os
+disponíveis no servidor (brotli e zstandard são opcionais). Respostas
+menores que `COMPRESSION_MIN_SIZE` ou de tipos já comprimidos passam
+intactas. O corpo é comprimido à medida que é enviado e o compressor é
+esvaziado a cada bloco, então respostas em streaming continuam em streaming:
+o cliente recebe cada bloco comprimido assim que a rota o produz. Os níveis podem ser ajustados por grupo
+de rotas em `COMPRESSION_GROUPS`.
+"""
+
+import re
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+
+from .settings import CompressionLevels, settings
+
+try:
+    import brotli
+except ImportError:  # sem o pacote, brotli não é oferecido
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # sem o pacote, zstd não é oferecido
+    zstandard = None
+
+# Tipos de conteúdo que valem a pena comprimir
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/vnd.apache.arrow",
+    "text/",
+)
+
+# Blocos maiores que isto são comprimidos numa thread, fora do event loop
+OFFLOAD_SIZE = 64 * 1024
+
+
+class _Gzip:
+    def __init__(self, levels: CompressionLevels):
+        self._compressor = zlib.compressobj(levels.gzip, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, levels: CompressionLevels):
+        self._compressor = brotli.Compressor(quality=levels.brotli)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self, levels: CompressionLevels):
+        self._compressor = zstandard.ZstdCompressor(level=levels.zstd).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encodings() -> Dict[str, type]:
+    """Algoritmos suportados, na ordem de preferência do servidor"""
+    encodings = {}
+    if zstandard is not None:
+        encodings["zstd"] = _Zstd
+    if brotli is not None:
+        encodings["br"] = _Brotli
+    encodings["gzip"] = _Gzip
+    return encodings
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """Escolhe o algoritmo de maior peso q aceito pelo cliente"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+_stats: Counter = Counter()
+
+
+def compression_stats() -> Dict[str, Dict[str, float]]:
+    """Bytes economizados e CPU gasta por algoritmo desde o início do processo"""
+    result = {}
+    for encoding in available_encodings():
+        responses = _stats[f"{encoding}.responses"]
+        bytes_in, bytes_out = (
+            _stats[f"{encoding}.bytes_in"],
+            _stats[f"{encoding}.bytes_out"],
+        )
+        result[encoding] = {
+            "responses": responses,
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "bytes_saved": bytes_in - bytes_out,
+            "ratio": bytes_out / bytes_in if bytes_in else 0.0,
+            "cpu_ms": _stats[f"{encoding}.cpu_seconds"] * 1000,
+        }
+    result["skipped_small"] = {"responses": _stats["skipped_small"]}
+    return result
+
+
+def _timed(compressor, data: bytes, flush: bool) -> Tuple[bytes, float]:
+    start = time.thread_time()
+    result = compressor.compress(data)
+    if flush:
+        # Entrega ao cliente tudo o que já foi comprimido, sem fechar o fluxo
+        result += compressor.flush()
+    return result, time.thread_time() - start
+
+
+class CompressionMiddleware:
+    """Middleware ASGI que comprime as respostas conforme o Accept-Encoding"""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: Optional[int] = None,
+        groups: Optional[Dict[str, CompressionLevels]] = None,
+    ):
+        self.app = app
+        self.minimum_size = (
+            settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        )
+        groups = settings.COMPRESSION_GROUPS if groups is None else groups
+        self.groups = [(re.compile(g.pattern), g) for g in groups.values()]
+        self.encodings = available_encodings()
+
+    def _levels(self, path: str) -> CompressionLevels:
+        for pattern, levels in self.groups:
+            if pattern.match(path):
+                return levels
+        return settings.COMPRESSION_LEVELS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept, list(self.encodings)) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingSender(
+            send,
+            encoding,
+            lambda: self.encodings[encoding](self._levels(scope["path"])),
+            self.minimum_size,
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingSender:
+    def __init__(self, send, encoding: str, make_compressor, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.make_compressor = make_compressor
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def _compress(self, data: bytes, flush: bool = False) -> bytes:
+        if len(data) >= OFFLOAD_SIZE:
+            result, cpu = await anyio.to_thread.run_sync(
+                _timed, self.compressor, data, flush
+            )
+        else:
+            result, cpu = _timed(self.compressor, data, flush)
+        _stats[f"{self.encoding}.bytes_in"] += len(data)
+        _stats[f"{self.encoding}.bytes_out"] += len(result)
+        _stats[f"{self.encoding}.cpu_seconds"] += cpu
+        return result
+
+    def _finish(self) -> bytes:
+        result = self.compressor.finish()
+        _stats[f"{self.encoding}.bytes_out"] += len(result)
+        return result
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            headers = {k.lower(): v for k, v in message.get("headers", [])}
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            self.passthrough = b"content-encoding" in headers or not (
+                content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            if self.passthrough:
+                await self._send(message)
+            else:
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = [
+                *self.start_message.get("headers", []),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            if not more_body and len(body) < self.minimum_size:
+                _stats["skipped_small"] += 1
+                self.passthrough = True
+                await self._send({**self.start_message, "headers": headers})
+                await self._send(message)
+                return
+
+            self.compressor = self.make_compressor()
+            _stats[f"{self.encoding}.responses"] += 1
+            headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+            headers.append((b"content-encoding", self.encoding.encode()))
+            if not more_body:
+                compressed = await self._compress(body) + self._finish()
+                headers.append((b"content-length", str(len(compressed)).encode()))
+                await self._send({**self.start_message, "headers": headers})
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            await self._send({**self.start_message, "headers": headers})
+
+        chunk = await self._compress(body, flush=more_body) if body else b""
+        if not more_body:
+            chunk += self._finish()
+        if chunk or not more_body:
+            await self._send(
+                {"type": "http.response.body", "body": chunk, "more_body": more_body}
+            )
@@ -0,0 +1,83 @@
+"""
+GET condicional (ETag / If-None-Match) a partir das versões das tabelas.
+
+A dependência criada por `conditional_get(*tabelas)` calcula a versão do
+recurso sem consultar os dados: se o `If-None-Match` do cliente ainda
+corresponde, a requisição termina em 304 antes de a rota executar a consulta.
+Com os contadores na memória do processo (sem `REDIS_URL`), as escritas dos
+jobs de linha de comando não chegam à API: nenhum ETag é emitido, a menos que
+`CONDITIONAL_GET_IN_MEMORY` seja ativado.
+"""
+
+import hashlib
+from email.utils import formatdate
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+from ..db.versions import table_versions
+from .cache import call_store
+from .settings import settings
+
+
+class ResourceVersion:
+    def __init__(self, etag: Optional[str], last_modified: Optional[float]):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Headers de validação a incluir na resposta"""
+        if self.etag is None:
+            return {}
+        return {
+            "ETag": self.etag,
+            "Last-Modified": formatdate(self.last_modified, usegmt=True),
+            # Permite guardar a resposta, mas exige revalidação a cada uso
+            "Cache-Control": "private, no-cache",
+        }
+
+
+# Versão sem validadores, para quando as versões das tabelas não são confiáveis
+UNVERSIONED = ResourceVersion(None, None)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    weak = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == weak
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_get(*tables: str):
+    """
+    Cria a dependência das rotas de leitura cujo conteúdo depende de `tables`.
+    Responde 304 se nada mudou; senão inclui ETag/Last-Modified na resposta
+    e retorna a versão, para rotas que montam o próprio Response.
+    """
+
+    async def dependency(request: Request, response: Response) -> ResourceVersion:
+        if not (table_versions.remote or settings.CONDITIONAL_GET_IN_MEMORY):
+            return UNVERSIONED
+        token, last_modified = await call_store(
+            table_versions, table_versions.get, tables
+        )
+        digest = hashlib.sha1(
+            f"{request.url.path}?{request.url.query}|{token}".encode()
+        ).hexdigest()[:20]
+        version = ResourceVersion(f'W/"{digest}"', last_modified)
+
+        if etag_matches(request.headers.get("if-none-match"), version.etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=version.headers
+            )
+        response.headers.update(version.headers)
+        return version
+
+    return dependency
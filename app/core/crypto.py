@@ -0,0 +1,52 @@
+from base64 import b64encode
+from functools import lru_cache
+from typing import TYPE_CHECKING, Tuple
+
+from .settings import settings
+
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet, MultiFernet
+
+
+def derive_legacy_key(secret_key: str) -> bytes:
+    """Chave derivada do SECRET_KEY, usada antes do chaveiro de criptografia"""
+    return b64encode(secret_key.encode()[:32].ljust(32, b"0"))
+
+
+@lru_cache(maxsize=8)
+def _keyring(keys: Tuple[str, ...], secret_key: str) -> Tuple["Fernet", "MultiFernet"]:
+    # O cryptography é importado só no primeiro uso do chaveiro
+    from cryptography.fernet import Fernet, MultiFernet
+
+    fernets = [Fernet(key) for key in keys]
+    fernets.append(Fernet(derive_legacy_key(secret_key)))
+    return fernets[0], MultiFernet(fernets)
+
+
+def get_fernet() -> "MultiFernet":
+    """
+    Chaveiro com as chaves de ENCRYPTION_KEYS seguidas da chave derivada do
+    SECRET_KEY: a primeira chave criptografa, todas descriptografam.
+    """
+    return _keyring(tuple(settings.ENCRYPTION_KEYS), settings.SECRET_KEY)[1]
+
+
+def get_primary_fernet() -> "Fernet":
+    """Somente a chave atual, usada para identificar valores já rotacionados"""
+    return _keyring(tuple(settings.ENCRYPTION_KEYS), settings.SECRET_KEY)[0]
+
+
+def encrypt_value(value: str) -> str:
+    """Criptografa um valor usando Fernet"""
+    if not value:
+        return None
+    f = get_fernet()
+    return f.encrypt(value.encode()).decode()
+
+
+def decrypt_value(encrypted_value: str) -> str:
+    """Descriptografa um valor usando Fernet"""
+    if not encrypted_value:
+        return None
+    f = get_fernet()
+    return f.decrypt(encrypted_value.encode()).decode()
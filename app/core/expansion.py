@@ -0,0 +1,94 @@
+"""
+Expansão de relacionamentos nas rotas de leitura (`?expand=part,part.supplier`).
+
+Os relacionamentos pedidos são carregados com `selectinload`, que emite uma
+única consulta `IN (...)` por relacionamento e nível, independente da
+quantidade de itens da página, evitando o padrão N+1.
+"""
+
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import selectinload
+
+from ..models.models import (
+    DimLocations,
+    DimParts,
+    DimPurchances,
+    DimSupplier,
+    DimVehicle,
+    FactWarranties,
+)
+from ..schemas.base import Location, Part, Purchance, Supplier, Vehicle, Warranty
+
+# Schema usado para serializar as colunas de cada modelo
+SCHEMAS = {
+    DimSupplier: Supplier,
+    DimParts: Part,
+    DimPurchances: Purchance,
+    FactWarranties: Warranty,
+    DimVehicle: Vehicle,
+    DimLocations: Location,
+}
+
+ExpandTree = Dict[str, "ExpandTree"]
+
+
+def parse_expand(expand: Optional[str], allowed: Set[str]) -> ExpandTree:
+    """
+    Valida a lista separada por vírgulas de caminhos a expandir e devolve
+    a árvore de relacionamentos. `part.supplier` implica expandir `part`.
+    """
+    tree: ExpandTree = {}
+    if not expand:
+        return tree
+
+    for path in filter(None, (p.strip() for p in expand.split(","))):
+        if path not in allowed:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=(
+                    f"Expansão inválida: {path}. "
+                    f"Permitidas: {', '.join(sorted(allowed))}"
+                ),
+            )
+        node = tree
+        for name in path.split("."):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def expand_options(model, tree: ExpandTree, parent=None) -> List[Any]:
+    """Converte a árvore de expansão em opções `selectinload` encadeadas"""
+    options = []
+    for name, children in tree.items():
+        attribute = getattr(model, name)
+        loader = parent.selectinload(attribute) if parent else selectinload(attribute)
+        options.append(loader)
+        target = attribute.property.mapper.class_
+        options.extend(expand_options(target, children, loader))
+    return options
+
+
+def with_expansions(statement, model, tree: ExpandTree):
+    """Aplica as opções de carregamento à query/statement, se houver expansões"""
+    if not tree:
+        return statement
+    return statement.options(*expand_options(model, tree))
+
+
+def serialize(obj, tree: ExpandTree) -> Dict[str, Any]:
+    """
+    Serializa as colunas do objeto e apenas os relacionamentos expandidos,
+    sem disparar o carregamento dos demais.
+    """
+    data = SCHEMAS[type(obj)].model_validate(obj).model_dump()
+    for name, children in tree.items():
+        value = getattr(obj, name)
+        if value is None:
+            data[name] = None
+        elif isinstance(value, list):
+            data[name] = [serialize(item, children) for item in value]
+        else:
+            data[name] = serialize(value, children)
+    return data
@@ -0,0 +1,57 @@
+"""
+Fieldsets esparsos nas listagens (`?fields=supplier_id,supplier_name`).
+
+Apenas as colunas pedidas são selecionadas, sem hidratar entidades ORM, e
+a resposta é serializada diretamente, sem passar pelo response_model
+completo. A chave primária é sempre incluída para permitir a paginação.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import inspect
+
+from .expansion import ExpandTree
+from .responses import FastJSONResponse
+
+
+def parse_fields(
+    fields: Optional[str],
+    schema: type[BaseModel],
+    model,
+    tree: Optional[ExpandTree] = None,
+) -> List[Any]:
+    """Valida os campos pedidos e devolve as colunas a selecionar"""
+    if not fields:
+        return []
+    if tree:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Os parâmetros fields e expand não podem ser combinados",
+        )
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    invalid = [name for name in names if name not in schema.model_fields]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Campos inválidos: {', '.join(invalid)}. "
+                f"Permitidos: {', '.join(schema.model_fields)}"
+            ),
+        )
+
+    primary_key = inspect(model).primary_key[0].key
+    ordered = [primary_key] + [n for n in dict.fromkeys(names) if n != primary_key]
+    return [getattr(model, name) for name in ordered]
+
+
+def projected_page(
+    rows, next_cursor: Optional[str], headers: Optional[Dict[str, str]] = None
+) -> FastJSONResponse:
+    """Resposta paginada a partir das linhas projetadas (sem entidades ORM)"""
+    return FastJSONResponse(
+        {"items": [row._asdict() for row in rows], "next_cursor": next_cursor},
+        headers=headers,
+    )
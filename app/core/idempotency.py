@@ -0,0 +1,251 @@
+"""
+Chaves de idempotência (`Idempotency-Key`) nas rotas de criação.
+
+A primeira requisição com uma chave reserva a chave, é executada e tem a
+resposta guardada por `IDEMPOTENCY_TTL_SECONDS`; repetições com a mesma chave
+(do mesmo cliente, na mesma rota) recebem a resposta guardada, com o header
+`Idempotent-Replayed: true`, sem executar a rota de novo. Uma repetição que
+chega enquanto a original ainda está em andamento espera por ela. Reusar a
+chave com outro corpo retorna 422. Respostas 5xx, 401, 403 e 429 não são
+guardadas, para que a repetição seja de fato executada. A reserva vale por
+`IDEMPOTENCY_LOCK_SECONDS` e é renovada enquanto a requisição roda, então
+cargas longas não a perdem; se o processo morrer, ela expira. Com o cache no
+Redis, as consultas à chave rodam no threadpool, fora do event loop.
+"""
+
+import asyncio
+import base64
+import hashlib
+import re
+import time
+from typing import Optional
+
+import anyio
+from starlette.responses import JSONResponse
+
+from .cache import get_cache
+from .rate_limit import client_identity
+from .settings import settings
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+
+# Respostas que não representam o resultado da operação
+NOT_STORED = {401, 403, 429}
+
+# Intervalo entre consultas à chave enquanto a requisição original não
+# termina; dobra a cada consulta até o máximo
+POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 0.5
+
+idempotency_cache = get_cache("idempotency")
+
+
+def _error(status_code: int, detail: str, headers: Optional[dict] = None):
+    return JSONResponse(
+        status_code=status_code, content={"detail": detail}, headers=headers
+    )
+
+
+def _idempotency_key(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == HEADER:
+            return value.decode("latin-1").strip()
+    return None
+
+
+async def _read_body(receive) -> Optional[bytes]:
+    """Corpo completo da requisição, ou None se o cliente desconectou"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def _replay_receive(body: bytes, receive):
+    """`receive` que entrega à rota o corpo já lido pelo middleware"""
+    body_sent = False
+
+    async def replay():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+class _ResponseRecorder:
+    """`send` que repassa a resposta e guarda uma cópia para as repetições"""
+
+    def __init__(self, send):
+        self.send = send
+        self.start = None
+        self.body_chunks = []
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+        elif message["type"] == "http.response.body":
+            self.body_chunks.append(message.get("body", b""))
+        await self.send(message)
+
+    def entry(self, fingerprint: str) -> Optional[dict]:
+        """Entrada do cache com a resposta, ou None se não deve ser guardada"""
+        start = self.start
+        if start is None or start["status"] >= 500 or start["status"] in NOT_STORED:
+            return None
+        return {
+            "state": "completed",
+            "fingerprint": fingerprint,
+            "status": start["status"],
+            "headers": [
+                [k.decode("latin-1"), v.decode("latin-1")]
+                for k, v in start.get("headers", [])
+            ],
+            "body": base64.b64encode(b"".join(self.body_chunks)).decode(),
+        }
+
+
+class IdempotencyMiddleware:
+    """Middleware ASGI que aplica o Idempotency-Key aos POST de criação"""
+
+    def __init__(self, app, pattern: Optional[str] = None, cache=None):
+        self.app = app
+        self.pattern = re.compile(pattern or settings.IDEMPOTENCY_PATTERN)
+        self.cache = cache or idempotency_cache
+
+    async def __call__(self, scope, receive, send):
+        key = None
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and self.pattern.match(scope["path"])
+        ):
+            key = _idempotency_key(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = _error(
+                400,
+                f"Idempotency-Key deve ter entre 1 e {MAX_KEY_LENGTH} caracteres",
+            )
+            await response(scope, receive, send)
+            return
+
+        # O corpo é lido por inteiro para conferir se a repetição é idêntica
+        body = await _read_body(receive)
+        if body is None:
+            return
+        fingerprint = hashlib.sha256(body).hexdigest()
+        cache_key = hashlib.sha256(
+            f"{client_identity(scope)}|{scope['path']}|{key}".encode()
+        ).hexdigest()
+
+        response = await self._claim_or_replay(cache_key, fingerprint)
+        if response is not None:
+            await response(scope, receive, send)
+            return
+        await self._run_and_record(scope, receive, send, body, cache_key, fingerprint)
+
+    async def _heartbeat(self, cache_key: str, fingerprint: str, done: asyncio.Event):
+        """Renova a reserva da chave até `done`, para não expirar durante a rota"""
+        in_flight = {"state": "in_flight", "fingerprint": fingerprint}
+        interval = settings.IDEMPOTENCY_LOCK_SECONDS / 3
+        while True:
+            try:
+                await asyncio.wait_for(done.wait(), interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            # Só substitui uma reserva existente: uma chave liberada não volta
+            await self.cache.areplace(
+                cache_key, in_flight, settings.IDEMPOTENCY_LOCK_SECONDS
+            )
+
+    async def _run_and_record(self, scope, receive, send, body, cache_key, fingerprint):
+        """Executa a rota com a chave reservada e guarda a resposta"""
+        recorder = _ResponseRecorder(send)
+        done = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(cache_key, fingerprint, done))
+        try:
+            await self.app(scope, _replay_receive(body, receive), recorder)
+        except BaseException:
+            # Libera a chave mesmo se a requisição foi cancelada
+            with anyio.CancelScope(shield=True):
+                done.set()
+                await heartbeat
+                await self.cache.adelete(cache_key)
+            raise
+        # Espera uma renovação em andamento, para que ela não sobrescreva a resposta
+        done.set()
+        await heartbeat
+
+        entry = recorder.entry(fingerprint)
+        if entry is None:
+            await self.cache.adelete(cache_key)
+        else:
+            await self.cache.aset(cache_key, entry, settings.IDEMPOTENCY_TTL_SECONDS)
+
+    async def _claim_or_replay(self, cache_key: str, fingerprint: str):
+        """
+        Reserva a chave (retorna None: a requisição deve ser executada) ou
+        devolve a resposta a enviar: a guardada, ou um erro.
+        """
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        in_flight = {"state": "in_flight", "fingerprint": fingerprint}
+        interval = POLL_INTERVAL
+        while True:
+            if await self.cache.aadd(
+                cache_key, in_flight, settings.IDEMPOTENCY_LOCK_SECONDS
+            ):
+                return None
+
+            entry = await self.cache.aget(cache_key)
+            if entry is None:
+                continue
+            if entry["fingerprint"] != fingerprint:
+                return _error(
+                    422,
+                    "Idempotency-Key já usada com outro corpo de requisição",
+                )
+            if entry["state"] == "completed":
+                return _StoredResponse(entry)
+            if time.monotonic() >= deadline:
+                return _error(
+                    409,
+                    "Requisição com esta Idempotency-Key ainda em andamento",
+                    headers={"Retry-After": "1"},
+                )
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+
+class _StoredResponse:
+    def __init__(self, entry):
+        self.entry = entry
+
+    async def __call__(self, scope, receive, send):
+        headers = [
+            (k.encode("latin-1"), v.encode("latin-1")) for k, v in self.entry["headers"]
+        ]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.entry["status"],
+                "headers": headers,
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": base64.b64decode(self.entry["body"]),
+            }
+        )
@@ -0,0 +1,271 @@
+"""
+Métricas do processo no formato texto do Prometheus (`GET /metrics`).
+
+Contadores, gauges e histogramas simples, sem dependências externas. As
+métricas observadas também nas threads do pool têm um lock; as registradas só
+pelo middleware, no event loop, dispensam o lock no caminho quente.
+O `MetricsMiddleware` mede a latência por rota (o template, não o caminho
+concreto) e status, as requisições em andamento e o número de statements
+e o tempo de banco de cada requisição; as demais métricas são registradas
+onde os eventos acontecem. Cada processo expõe as próprias métricas.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .settings import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        lock: bool = True,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        # Métricas atualizadas só no event loop dispensam o lock
+        self._lock = threading.Lock() if lock else None
+        _registry.append(self)
+
+    @abstractmethod
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Amostras (nome, labels formatados, valor) no formato de exposição"""
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines += [
+            f"{name}{labels} {_format_value(value)}"
+            for name, labels, value in self.samples()
+        ]
+        return "\n".join(lines)
+
+    def clear(self):
+        self._values.clear()
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _add(self, labels: Tuple[str, ...], amount: float):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        if self._lock is None:
+            self._add(labels, amount)
+            return
+        with self._lock:
+            self._add(labels, amount)
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self):
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}_total", _format_labels(self.labelnames, labels), value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def samples(self):
+        for labels, value in list(self._values.items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        lock: bool = True,
+    ):
+        super().__init__(name, documentation, labelnames, lock)
+        self.buckets = tuple(sorted(buckets))
+
+    def _add(self, labels: Tuple[str, ...], index: int, value: float):
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][index] += 1
+        state[1] += value
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        if self._lock is None:
+            self._add(labels, index, value)
+            return
+        with self._lock:
+            self._add(labels, index, value)
+
+    def count(self, *labels: str) -> int:
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def samples(self):
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = _format_value(bound)
+                yield f"{self.name}_bucket", _format_labels(
+                    names, (*labels, le)
+                ), cumulative
+            labels_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum", labels_text, total
+            yield f"{self.name}_count", labels_text, cumulative
+
+
+def render_metrics() -> str:
+    """Todas as métricas do processo no formato de exposição do Prometheus"""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+def clear_metrics():
+    for metric in _registry:
+        metric.clear()
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP por rota e status",
+    ("method", "route", "status"),
+    lock=False,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requisições HTTP em andamento",
+    ("method",),
+    lock=False,
+)
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request",
+    "Statements SQL executados por requisição",
+    ("route",),
+    buckets=STATEMENT_BUCKETS,
+    lock=False,
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Tempo gasto em statements SQL por requisição",
+    ("route",),
+    lock=False,
+)
+DB_STATEMENTS = Counter("db_statements", "Statements SQL executados")
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Espera para obter uma conexão do pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+BULK_ROWS_INSERTED = Counter(
+    "bulk_rows_inserted", "Linhas inseridas pelas cargas em massa", ("table",)
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests", "Leituras dos caches por resultado", ("namespace", "result")
+)
+
+
+class RequestDbStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+# Estatísticas de banco da requisição em andamento (visível nas threads do pool)
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def record_statement(seconds: float):
+    """Registra um statement executado (chamado pelos eventos do engine)"""
+    DB_STATEMENTS.inc()
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += seconds
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede latência, concorrência e uso do banco por rota"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_PROGRESS.dec(method)
+            request_db_stats.reset(token)
+            # Template da rota (ex.: /api/v1/suppliers/{supplier_id}), que
+            # mantém a cardinalidade limitada
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            REQUEST_LATENCY.observe(elapsed, method, route, str(status_code))
+            DB_STATEMENTS_PER_REQUEST.observe(stats.statements, route)
+            DB_TIME_PER_REQUEST.observe(stats.seconds, route)
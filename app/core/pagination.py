@@ -0,0 +1,71 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+
+from .settings import settings
+
+
+def encode_cursor(values: Tuple[Any, ...]) -> str:
+    """Codifica os valores da chave de ordenação em um cursor opaco"""
+    payload = json.dumps(list(values), default=str, separators=(",", ":"))
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _matches_type(value: Any, expected: type) -> bool:
+    """Confere um valor decodificado do JSON contra o tipo Python da coluna"""
+    if expected not in (bool, int, float, str):
+        # Datas e demais tipos são codificados como texto (default=str)
+        expected = str
+    if isinstance(value, bool):
+        return expected is bool
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, types: Tuple[type, ...]) -> List[Any]:
+    """
+    Decodifica um cursor gerado por encode_cursor, conferindo cada valor
+    contra o tipo da respectiva coluna da chave de ordenação.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(map(_matches_type, values, types))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido"
+        )
+    return values
+
+
+def page_size(
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+) -> int:
+    """Dependency que limita o tamanho da página a MAX_PAGE_SIZE"""
+    return limit
+
+
+def keyset_paginate(query, key, cursor: Optional[str], limit: int):
+    """
+    Aplica paginação por keyset (seek) a uma query ORM ordenada pela
+    chave primária `key`, evitando o custo linear do OFFSET.
+    Retorna os itens da página e o cursor da próxima página (ou None).
+    """
+    if cursor:
+        (last_key,) = decode_cursor(cursor, (key.type.python_type,))
+        query = query.filter(key > last_key)
+
+    rows = query.order_by(key).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor((getattr(rows[-1], key.key),))
@@ -0,0 +1,151 @@
+"""
+Hash e verificação de senhas fora do event loop.
+
+bcrypt e argon2 são propositalmente lentos (centenas de milissegundos por
+operação). As chamadas rodam num pool de threads dedicado, com limite próprio
+de concorrência e de fila, para que um pico de logins não trave as demais
+rotas nem esgote o threadpool usado pelos endpoints síncronos.
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from .settings import settings
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+
+def build_crypt_context() -> "CryptContext":
+    """
+    Contexto de hash configurado pelas settings. Hashes gerados com outro
+    algoritmo ou com custo menor que o configurado são marcados para rehash.
+    """
+    from passlib.context import CryptContext
+
+    schemes = ["bcrypt"]
+    if settings.PASSWORD_HASH_SCHEME == "argon2":
+        try:
+            import argon2  # noqa: F401
+        except ImportError as exc:
+            raise RuntimeError(
+                "PASSWORD_HASH_SCHEME=argon2 requer o pacote argon2-cffi"
+            ) from exc
+        schemes.insert(0, "argon2")
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+        argon2__rounds=settings.ARGON2_TIME_COST,
+        argon2__min_rounds=settings.ARGON2_TIME_COST,
+        argon2__memory_cost=settings.ARGON2_MEMORY_COST_KIB,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_crypt_context() -> "CryptContext":
+    """Contexto de hash da aplicação, construído no primeiro uso (importa o passlib)"""
+    return build_crypt_context()
+
+
+class PasswordHasher:
+    """Executa as operações de hash num pool limitado e mede o tempo de fila"""
+
+    def __init__(
+        self, context: Optional["CryptContext"], workers: int, max_pending: int
+    ):
+        # Sem contexto, usa o da aplicação, construído no primeiro hash
+        self._context = context
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._counters: Counter = Counter()
+        self._max_queue_time = 0.0
+
+    async def _run(self, func: Callable, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._counters["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Muitas autenticações em andamento, tente novamente",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._pending -= 1
+                    self._counters["completed"] += 1
+                    self._counters["queue_seconds"] += started - submitted
+                    self._counters["hash_seconds"] += finished - started
+                    self._max_queue_time = max(
+                        self._max_queue_time, started - submitted
+                    )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, task)
+
+    @property
+    def context(self) -> "CryptContext":
+        return self._context or get_crypt_context()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica a senha e, se o hash estiver desatualizado (algoritmo ou
+        custo), retorna também o novo hash a ser gravado.
+        """
+        return await self._run(
+            self.context.verify_and_update, password, hashed_password
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """Ocupação do pool e tempos médios de fila e de hash"""
+        with self._lock:
+            completed = self._counters["completed"]
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": completed,
+                "rejected": self._counters["rejected"],
+                "queue_time_avg_ms": (
+                    self._counters["queue_seconds"] / completed * 1000
+                    if completed
+                    else 0.0
+                ),
+                "queue_time_max_ms": self._max_queue_time * 1000,
+                "hash_time_avg_ms": (
+                    self._counters["hash_seconds"] / completed * 1000
+                    if completed
+                    else 0.0
+                ),
+            }
+
+
+password_hasher = PasswordHasher(
+    None, settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING
+)
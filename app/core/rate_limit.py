@@ -0,0 +1,210 @@
+"""
+Limite de requisições por cliente (token bucket) para grupos de rotas.
+
+Cada grupo configurado em `settings.RATE_LIMITS` tem um balde por IP e um por
+usuário do token, que se recarregam a `rate` fichas por segundo até `burst`.
+Requisições com token válido consomem dos dois baldes, e as sem token só do
+balde do IP. Sem fichas em algum deles, a requisição recebe 429 com
+`Retry-After`. Rotas fora dos grupos passam direto pelo middleware.
+"""
+
+import math
+import re
+import time
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from .cache import call_store, get_redis, register_for_eviction
+from .settings import RateLimitRule, settings
+
+
+class MemoryTokenBuckets:
+    """
+    Baldes na memória do processo. As operações não têm pontos de espera e
+    rodam no event loop, então dispensam locks.
+    """
+
+    remote = False
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Consome uma ficha; retorna 0 ou os segundos até haver uma ficha"""
+        now = time.monotonic()
+        tokens, last, _ = self._buckets.get(key, (burst, now, 0.0))
+        tokens = min(burst, tokens + (now - last) * rate)
+        # Instante em que o balde estará cheio de novo (equivale a não existir)
+        full_at = now + (burst - tokens + 1) / rate
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now, full_at)
+            return 0.0
+        self._buckets[key] = (tokens, now, full_at)
+        return (1 - tokens) / rate
+
+    def purge_expired(self) -> int:
+        """Descarta os baldes que já se recarregaram por completo"""
+        now = time.monotonic()
+        expired = [k for k, (_, _, full_at) in self._buckets.items() if full_at < now]
+        for key in expired:
+            self._buckets.pop(key, None)
+        return len(expired)
+
+    def clear(self):
+        self._buckets.clear()
+
+
+# Recarga e consumo atômicos no Redis, compartilhando os baldes entre workers
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst + 1) / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisTokenBuckets:
+    remote = True
+
+    def __init__(self, url: str):
+        self.client = get_redis(url)
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        wait = self._take(keys=[f"rate_limit:{key}"], args=[rate, burst, time.time()])
+        return float(wait)
+
+    def purge_expired(self) -> int:
+        return 0
+
+    def clear(self):
+        for key in self.client.scan_iter("rate_limit:*"):
+            self.client.delete(key)
+
+
+def get_token_buckets():
+    """Armazenamento dos baldes: Redis se configurado, senão memória"""
+    if settings.REDIS_URL:
+        return RedisTokenBuckets(settings.REDIS_URL)
+    return register_for_eviction(MemoryTokenBuckets())
+
+
+token_buckets = get_token_buckets()
+
+
+@lru_cache(maxsize=4096)
+def _token_subject(token: str) -> Optional[Tuple[str, float]]:
+    """(sub, exp) de um token com assinatura válida; memorizado por token"""
+    from jose import JWTError, jwt
+
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+    except JWTError:
+        return None
+    if not payload.get("sub") or "exp" not in payload:
+        return None
+    return payload["sub"], payload["exp"]
+
+
+def _token_user(scope) -> Optional[str]:
+    """Usuário do token de acesso válido da requisição, se houver"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                subject = _token_subject(token)
+                if subject is not None and subject[1] > time.time():
+                    return f"user:{subject[0]}"
+            break
+    return None
+
+
+def _client_ip(scope) -> str:
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def client_identity(scope) -> str:
+    """Usuário do token de acesso válido ou, na falta dele, o IP do cliente"""
+    return _token_user(scope) or _client_ip(scope)
+
+
+def client_identities(scope) -> List[str]:
+    """Baldes da requisição: o do IP e, com token válido, também o do usuário"""
+    user = _token_user(scope)
+    return [_client_ip(scope), user] if user else [_client_ip(scope)]
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI que aplica os limites dos grupos de rotas"""
+
+    def __init__(
+        self,
+        app,
+        rules: Optional[Mapping[str, RateLimitRule]] = None,
+        store=None,
+    ):
+        self.app = app
+        rules = settings.RATE_LIMITS if rules is None else rules
+        self.rules = [
+            (name, re.compile(rule.pattern), rule) for name, rule in rules.items()
+        ]
+        self.store = store or token_buckets
+
+    def _rule_for(self, scope) -> Optional[Tuple[str, RateLimitRule]]:
+        path, method = scope["path"], scope["method"]
+        for name, pattern, rule in self.rules:
+            if pattern.match(path) and (not rule.methods or method in rule.methods):
+                return name, rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        match = self._rule_for(scope)
+        if match is not None:
+            name, rule = match
+            wait = 0.0
+            for identity in client_identities(scope):
+                wait = max(
+                    wait,
+                    await call_store(
+                        self.store,
+                        self.store.take,
+                        f"{name}:{identity}",
+                        rule.rate,
+                        rule.burst,
+                    ),
+                )
+            if wait > 0:
+                retry_after = math.ceil(wait)
+                response = JSONResponse(
+                    status_code=429,
+                    content={
+                        "detail": "Limite de requisições excedido, "
+                        f"tente novamente em {retry_after} s"
+                    },
+                    headers={"Retry-After": str(retry_after)},
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,51 @@
+"""
+Resposta JSON rápida para rotas que já devolvem dados tipados.
+
+Retornar `FastJSONResponse` diretamente da rota evita a revalidação pelo
+`response_model` e o `jsonable_encoder` do FastAPI. Com o orjson instalado e
+`FAST_JSON_RESPONSES` ativo, a serialização é feita por ele (datas, UUIDs e
+dataclasses nativamente); caso contrário usa o `json` da biblioteca padrão,
+convertendo só os valores que ele não conhece.
+"""
+
+import json
+from decimal import Decimal
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from .settings import settings
+from .tracing import span
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa `content` em JSON (UTF-8) pelo caminho mais rápido disponível"""
+    if orjson is not None and settings.FAST_JSON_RESPONSES:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with span("serialize.json") as current:
+            body = dumps(content)
+            current.set_attribute("response.bytes", len(body))
+        return body
@@ -1,48 +1,70 @@
-from base64 import b64encode
+import time
+import uuid
+from contextvars import ContextVar
 from datetime import datetime, timedelta
 from typing import Optional
 
-from cryptography.fernet import Fernet
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 
 from ..db.database import get_db
+from ..db.statements import USER_BY_USERNAME
 from ..models.auth import User
+from .cache import get_cache
+from .crypto import decrypt_value, encrypt_value, get_fernet
+from .passwords import get_crypt_context, password_hasher
 from .settings import settings
+from .tracing import span
 
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
+# Cache dos usuários já resolvidos, indexado pelo username (claim "sub")
+user_cache = get_cache("user")
+USER_CACHE_FIELDS = ("id", "email", "username", "is_active", "is_superuser")
+
+# Usuário já autenticado pela requisição de batch, reaproveitado nas
+# sub-requisições sem decodificar o token de novo
+authenticated_user: ContextVar[Optional[User]] = ContextVar(
+    "authenticated_user", default=None
+)
+
+# Tokens revogados antes do vencimento, indexados pelo claim "jti". Cada
+# entrada expira junto com o token, então o conjunto não cresce sem limite
+revoked_tokens = get_cache("revoked_token")
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_crypt_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_crypt_context().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    # O jose (e com ele o cryptography) é importado no primeiro token, não no início
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
+async def decode_access_token(token: str) -> dict:
+    """Valida assinatura, expiração e revogação do token e retorna o payload"""
+    from jose import JWTError, jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -52,16 +74,74 @@ async def get_current_user(
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
         raise credentials_exception
-
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    jti = payload.get("jti")
+    if payload.get("sub") is None or jti is None:
+        raise credentials_exception
+    if await revoked_tokens.aget(jti) is not None:
         raise credentials_exception
-    return user
+    return payload
+
+
+async def revoke_token(payload: dict):
+    """Revoga o token até o seu vencimento"""
+    ttl = payload["exp"] - time.time()
+    if ttl > 0:
+        await revoked_tokens.aset(payload["jti"], True, ttl)
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> User:
+    user = authenticated_user.get()
+    if user is not None:
+        return user
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    with span("auth.decode_token"):
+        username: str = (await decode_access_token(token))["sub"]
+
+    with span("auth.load_user") as current:
+        cached = await user_cache.aget(username)
+        current.set_attribute("cache.hit", cached is not None)
+        if cached is not None:
+            return User(**cached)
+
+        user = db.scalars(USER_BY_USERNAME, {"username": username}).first()
+        if user is None:
+            raise credentials_exception
+        if settings.USER_CACHE_TTL_SECONDS > 0:
+            await user_cache.aset(
+                username,
+                {field: getattr(user, field) for field in USER_CACHE_FIELDS},
+                settings.USER_CACHE_TTL_SECONDS,
+            )
+        return user
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    """Remove do cache o usuário alterado ou removido (inclusive o username antigo)"""
+    usernames = {target.username, *inspect(target).attrs.username.history.deleted}
+    for username in usernames:
+        user_cache.delete(username)
+    # Invalida novamente após o commit, caso outra requisição tenha lido o
+    # registro antigo entre o flush e o commit
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("invalidated_users", set()).update(usernames)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cached_users_after_commit(session):
+    for username in session.info.pop("invalidated_users", ()):
+        user_cache.delete(username)
 
 
 async def get_current_active_user(
@@ -72,24 +152,3 @@ async def get_current_active_user(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
     return current_user
-
-
-def get_fernet():
-    key = b64encode(settings.SECRET_KEY.encode()[:32].ljust(32, b"0"))
-    return Fernet(key)
-
-
-def encrypt_value(value: str) -> str:
-    """Criptografa um valor usando Fernet"""
-    if not value:
-        return None
-    f = get_fernet()
-    return f.encrypt(value.encode()).decode()
-
-
-def decrypt_value(encrypted_value: str) -> str:
-    """Descriptografa um valor usando Fernet"""
-    if not encrypted_value:
-        return None
-    f = get_fernet()
-    return f.decrypt(encrypted_value.encode()).decode()
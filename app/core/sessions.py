@@ -0,0 +1,84 @@
+"""
+Sessões de usuário mantidas no servidor, renovadas por refresh tokens.
+
+O login cria uma sessão e devolve um refresh token opaco
+(`<id da sessão>.<segredo>`). Cada renovação troca o segredo (rotação): o
+refresh token anterior deixa de valer e, se for reapresentado, a sessão
+inteira é encerrada, pois indica que o token vazou. Apenas o hash do segredo
+fica armazenado no cache de sessões.
+"""
+
+import hashlib
+import hmac
+import secrets
+from typing import Tuple
+
+from fastapi import HTTPException, status
+
+from .cache import get_cache
+from .settings import settings
+
+
+def _digest(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+class SessionStore:
+    def __init__(self, namespace: str = "session"):
+        self.cache = get_cache(namespace)
+
+    @property
+    def remote(self) -> bool:
+        return self.cache.remote
+
+    @property
+    def ttl(self) -> float:
+        return settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+
+    def _new_secret(self, session_id: str, username: str) -> Tuple[str, dict]:
+        """(refresh token, sessão a gravar) com um segredo novo"""
+        secret = secrets.token_urlsafe(32)
+        session = {"username": username, "secret": _digest(secret)}
+        return f"{session_id}.{secret}", session
+
+    def create(self, username: str) -> Tuple[str, str]:
+        """Abre uma sessão e retorna (id da sessão, refresh token)"""
+        session_id = secrets.token_urlsafe(16)
+        refresh_token, session = self._new_secret(session_id, username)
+        self.cache.set(session_id, session, self.ttl)
+        return session_id, refresh_token
+
+    def rotate(self, refresh_token: str) -> Tuple[str, str, str]:
+        """
+        Valida o refresh token e o substitui por um novo.
+        Retorna (username, id da sessão, novo refresh token).
+
+        A troca do segredo é atômica (`replace`) e a validação é feita sobre o
+        valor substituído: de duas renovações simultâneas com o mesmo token,
+        só a primeira encontra o segredo apresentado; a segunda é tratada como
+        reuso e encerra a sessão.
+        """
+        invalid = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token inválido ou expirado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        session_id, _, secret = refresh_token.partition(".")
+        session = self.cache.get(session_id) if secret else None
+        if session is None:
+            raise invalid
+        new_token, new_session = self._new_secret(session_id, session["username"])
+        previous = self.cache.replace(session_id, new_session, self.ttl)
+        if previous is None:
+            raise invalid
+        if not hmac.compare_digest(previous["secret"], _digest(secret)):
+            # Token já rotacionado sendo reutilizado: encerra a sessão
+            self.revoke(session_id)
+            raise invalid
+        return session["username"], session_id, new_token
+
+    def revoke(self, session_id: str):
+        self.cache.delete(session_id)
+
+
+sessions = SessionStore()
@@ -1,9 +1,27 @@
-from typing import List
+from typing import Dict, List
 
-from pydantic import field_validator
+from pydantic import BaseModel, field_validator
 from pydantic_settings import BaseSettings
 
 
+class RateLimitRule(BaseModel):
+    """Limite de um grupo de rotas: `rate` requisições/s com rajadas até `burst`"""
+
+    pattern: str  # expressão regular aplicada ao caminho
+    rate: float
+    burst: int
+    methods: List[str] = []  # vazio aplica a todos os métodos
+
+
+class CompressionLevels(BaseModel):
+    """Níveis de compressão por algoritmo para um grupo de rotas"""
+
+    pattern: str = ""  # expressão regular aplicada ao caminho
+    gzip: int = 5  # 1 a 9
+    brotli: int = 4  # 0 a 11
+    zstd: int = 3  # 1 a 22
+
+
 class Settings(BaseSettings):
     # API
     API_V1_STR: str = "/api/v1"
@@ -17,7 +35,21 @@ class Settings(BaseSettings):
     # Segurança
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Chaves Fernet para dados sensíveis, da atual para as anteriores. A chave
+    # derivada do SECRET_KEY continua aceita na leitura dos dados antigos
+    ENCRYPTION_KEYS: List[str] = []
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    # Sessões renovadas por refresh token expiram após este período sem uso
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+
+    # Hash de senhas ("bcrypt" ou "argon2"; argon2 requer argon2-cffi)
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST_KIB: int = 65536
+    # Pool dedicado ao hash: threads e limite de operações em andamento/fila
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
 
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
@@ -40,15 +72,95 @@ class Settings(BaseSettings):
         "Accept",
         "Origin",
         "X-Requested-With",
+        "Idempotency-Key",
+        "traceparent",
     ]
 
+    # Compressão das respostas (gzip; brotli e zstd se os pacotes estiverem instalados)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_LEVELS: CompressionLevels = CompressionLevels()
+    COMPRESSION_GROUPS: Dict[str, CompressionLevels] = {
+        # Respostas de analytics são menores e repetitivas: compensa comprimir mais
+        "analytics": CompressionLevels(
+            pattern=r"^/api/v1/analytics/", gzip=6, brotli=6, zstd=6
+        ),
+        # Exportações são grandes e em streaming: prioriza a vazão
+        "export": CompressionLevels(
+            pattern=r"^/api/v1/[^/]+/export$", gzip=1, brotli=1, zstd=1
+        ),
+    }
+
+    # Serialização das rotas pesadas com orjson (se instalado)
+    FAST_JSON_RESPONSES: bool = True
+
+    # Métricas no formato do Prometheus em /metrics, sem autenticação: ative
+    # só com a rota restrita na rede ou no proxy
+    METRICS_ENABLED: bool = False
+
+    # Routers opcionais (desativados, nem são importados). Os diagnósticos
+    # expõem detalhes internos a qualquer usuário autenticado
+    DIAGNOSTICS_ENABLED: bool = False
+    BATCH_ENABLED: bool = True
+
+    # Contagem de statements por requisição (header X-Query-Count) e alerta de
+    # N+1 quando um mesmo statement se repete QUERY_REPEAT_THRESHOLD vezes
+    QUERY_DEBUG: bool = False
+    QUERY_REPEAT_THRESHOLD: int = 3
+
+    # Tracing das requisições: fração amostrada quando o traceparent recebido não
+    # decide e arquivo com os traces (uma linha JSON do OTLP por trace)
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_RATIO: float = 0.01
+    TRACE_EXPORT_PATH: str = "traces.jsonl"
+    TRACE_SERVICE_NAME: str = "garantias-api"
+    # Acima deste tamanho o arquivo vira `<arquivo>.1` (substituindo o anterior)
+    TRACE_EXPORT_MAX_BYTES: int = 100 * 1024 * 1024
+    # Traces aguardando gravação; com a fila cheia os novos são descartados
+    TRACE_EXPORT_QUEUE_SIZE: int = 10_000
+
     # Paginação
     DEFAULT_PAGE_SIZE: int = 100
     MAX_PAGE_SIZE: int = 1000
 
-    # Cache (para implementação futura)
+    # Cache (em memória por padrão; compartilhado via Redis se REDIS_URL for definido)
     REDIS_URL: str | None = None
     CACHE_EXPIRE_MINUTES: int = 60
+    USER_CACHE_TTL_SECONDS: int = 60
+    # Intervalo da limpeza das entradas expiradas dos caches em memória
+    CACHE_EVICTION_INTERVAL_SECONDS: int = 60
+    # ETags e 304 a partir das versões das tabelas. Sem REDIS_URL os contadores
+    # ficam na memória do processo e não veem as escritas de outros processos
+    # (workers, arquivamento, rotação de chaves, seeds), então os ETags só são
+    # emitidos se isto for ativado: um único processo e nenhum job externo
+    CONDITIONAL_GET_IN_MEMORY: bool = False
+
+    # Rate limiting por IP e por usuário do token, por grupo de rotas
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, RateLimitRule] = {
+        "bulk": RateLimitRule(
+            pattern=r"^/api/v1/[^/]+/bulk$", rate=0.5, burst=10, methods=["POST"]
+        ),
+        "analytics": RateLimitRule(pattern=r"^/api/v1/analytics/", rate=2, burst=20),
+        "export": RateLimitRule(pattern=r"^/api/v1/[^/]+/export$", rate=0.2, burst=5),
+    }
+
+    # Linhas lidas do banco e serializadas por bloco nas exportações
+    EXPORT_BATCH_SIZE: int = 10000
+
+    # Idempotency-Key nos POST de criação: rotas cobertas, validade das
+    # respostas guardadas, reserva da chave (renovada a cada terço do prazo
+    # enquanto a requisição roda) e espera por uma requisição em andamento
+    IDEMPOTENCY_PATTERN: str = r"^/api/v1/[^/]+/(bulk)?$"
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_LOCK_SECONDS: float = 60
+    IDEMPOTENCY_WAIT_SECONDS: float = 30
+
+    # Máximo de sub-requisições por chamada ao /api/v1/batch
+    BATCH_MAX_REQUESTS: int = 20
+
+    # Arquivo frio (Parquet) das garantias antigas
+    ARCHIVE_DIR: str = "./archive"
 
     # Logs
     LOG_LEVEL: str = "INFO"
@@ -65,7 +177,7 @@ class Settings(BaseSettings):
             "DATABASE_URL": "sqlite:///./warranty.db",
             "SECRET_KEY": "your-secret-key-here",
             "ALGORITHM": "HS256",
-            "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+            "ACCESS_TOKEN_EXPIRE_MINUTES": "15",
         }
 
         @field_validator("SECRET_KEY")
@@ -0,0 +1,361 @@
+"""
+Tracing leve das requisições, sem dependências externas.
+
+O `TracingMiddleware` abre um span raiz por requisição, continuando o trace
+recebido no header W3C `traceparent` (se houver), e devolve o `traceparent`
+do span raiz na resposta. `span()` abre spans filhos nas fases da requisição
+(decodificação do JWT, busca do usuário, conversão dos resultados e
+codificação do JSON) e `record_span()` registra spans já medidos, como os
+statements SQL dos eventos do engine.
+
+A amostragem respeita a flag `sampled` do `traceparent` recebido; sem ela,
+uma fração `TRACE_SAMPLE_RATIO` das requisições é amostrada. Fora de um trace
+amostrado, `span()` e `record_span()` não registram nada. Cada trace
+terminado vira uma linha de `TRACE_EXPORT_PATH` no formato JSON do OTLP, o
+mesmo lido pelo receiver de arquivos do OpenTelemetry Collector.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = b"traceparent"
+
+# Tipos de span do OTLP
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+STATUS_ERROR = 2
+
+_TRACEPARENT_FORMAT = re.compile(
+    r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?"
+)
+
+
+def parse_traceparent(value: str) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent_id, sampled) de um header `traceparent` válido"""
+    match = _TRACEPARENT_FORMAT.fullmatch(value.strip())
+    if not match:
+        return None
+    version, trace_id, parent_id, flags, extra = match.groups()
+    if version == "ff" or (version == "00" and extra):
+        return None
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "start",
+        "end",
+        "attributes",
+        "error",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        trace: "Trace",
+        name: str,
+        parent_id: Optional[str],
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        start: Optional[float] = None,
+    ):
+        self.trace = trace
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.perf_counter() if start is None else start
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+        trace.spans.append(self)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def finish(self, end: Optional[float] = None):
+        self.end = time.perf_counter() if end is None else end
+
+    def __enter__(self) -> "Span":
+        self._token = current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.finish()
+        current_span.reset(self._token)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace.trace_id}-{self.span_id}-01"
+
+
+class _NoopSpan:
+    """Span de requisições fora de um trace amostrado: não registra nada"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Trace:
+    """Spans de uma requisição; os tempos são do relógio monotônico"""
+
+    __slots__ = ("trace_id", "spans", "_wall_start", "_perf_start")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+        self._wall_start = time.time_ns()
+        self._perf_start = time.perf_counter()
+
+    def _unix_nano(self, timestamp: float) -> str:
+        return str(self._wall_start + int((timestamp - self._perf_start) * 1e9))
+
+    def to_otlp(self) -> Dict[str, Any]:
+        spans = []
+        for span in self.spans:
+            if span.end is None:
+                continue
+            data = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": span.kind,
+                "startTimeUnixNano": self._unix_nano(span.start),
+                "endTimeUnixNano": self._unix_nano(span.end),
+                "attributes": [
+                    {"key": key, "value": _otlp_value(value)}
+                    for key, value in span.attributes.items()
+                ],
+            }
+            if span.parent_id:
+                data["parentSpanId"] = span.parent_id
+            if span.error:
+                data["status"] = {"code": STATUS_ERROR, "message": span.error}
+            spans.append(data)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": _otlp_value(settings.TRACE_SERVICE_NAME),
+                            },
+                            {
+                                "key": "service.version",
+                                "value": _otlp_value(settings.VERSION),
+                            },
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+                }
+            ]
+        }
+
+
+class FileSpanExporter:
+    """
+    Acrescenta cada trace como uma linha JSON (OTLP) ao arquivo. A conversão e
+    a gravação rodam numa thread própria, alimentada por uma fila limitada, e
+    não no event loop; com a fila cheia os traces novos são descartados.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_writer(self):
+        # A thread é criada no processo que exporta (depois do fork dos workers)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(settings.TRACE_EXPORT_QUEUE_SIZE)
+                threading.Thread(
+                    target=self._write_loop, name="trace-exporter", daemon=True
+                ).start()
+                self._pid = os.getpid()
+
+    def export(self, trace: Trace):
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a gravação dos traces já exportados; retorna se terminou"""
+        if self._pid != os.getpid():
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _write_loop(self):
+        while True:
+            traces = [self._queue.get()]
+            # Grava de uma vez tudo o que já estiver na fila
+            while True:
+                try:
+                    traces.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(traces)
+            except Exception:
+                logger.exception("Falha ao gravar %d trace(s)", len(traces))
+            finally:
+                for _ in traces:
+                    self._queue.task_done()
+
+    def _write(self, traces: List[Trace]):
+        path = self.path or settings.TRACE_EXPORT_PATH
+        data = b"".join(
+            json.dumps(trace.to_otlp(), separators=(",", ":")).encode() + b"\n"
+            for trace in traces
+        )
+        try:
+            if os.path.getsize(path) + len(data) > settings.TRACE_EXPORT_MAX_BYTES:
+                os.replace(path, f"{path}.1")
+        except FileNotFoundError:
+            pass
+        with open(path, "ab") as file:
+            file.write(data)
+
+
+span_exporter = FileSpanExporter()
+atexit.register(span_exporter.flush, 5)
+
+
+# Span em andamento (visível nas threads do pool)
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def span(name: str, kind: int = KIND_INTERNAL, **attributes):
+    """Span filho do span em andamento, para usar num bloco `with`"""
+    parent = current_span.get()
+    if parent is None:
+        return _NOOP_SPAN
+    return Span(parent.trace, name, parent.span_id, kind, attributes)
+
+
+def record_span(
+    name: str, start: float, end: float, kind: int = KIND_INTERNAL, **attributes
+):
+    """Registra um span já medido (tempos de `time.perf_counter`)"""
+    parent = current_span.get()
+    if parent is not None:
+        Span(parent.trace, name, parent.span_id, kind, attributes, start).finish(end)
+
+
+class TracingMiddleware:
+    """Middleware ASGI que abre o span raiz das requisições amostradas"""
+
+    def __init__(self, app, exporter: Optional[FileSpanExporter] = None):
+        self.app = app
+        self.exporter = exporter or span_exporter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == TRACEPARENT:
+                incoming = parse_traceparent(value.decode("latin-1"))
+                break
+        if incoming is not None:
+            trace_id, parent_id, sampled = incoming
+        else:
+            trace_id, parent_id = _new_id(128), None
+            sampled = random.random() < settings.TRACE_SAMPLE_RATIO
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(trace_id)
+        root = Span(
+            trace,
+            scope["method"],
+            parent_id,
+            KIND_SERVER,
+            {"http.request.method": scope["method"], "url.path": scope["path"]},
+        )
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((TRACEPARENT, root.traceparent.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            with root:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                root.name = f"{scope['method']} {route}"
+                root.set_attribute("http.route", route)
+            root.set_attribute("http.response.status_code", status_code)
+            if status_code >= 500 and root.error is None:
+                root.error = f"HTTP {status_code}"
+            self.exporter.export(trace)
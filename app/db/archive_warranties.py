@@ -0,0 +1,35 @@
+import argparse
+from datetime import date
+
+from ..services.warranty_archive import WarrantyArchive
+from .database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move garantias antigas para o arquivo frio em Parquet"
+    )
+    parser.add_argument(
+        "--before",
+        type=date.fromisoformat,
+        required=True,
+        help="Arquiva garantias com data de reparo anterior a esta (AAAA-MM-DD)",
+    )
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--archive-dir", default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"Arquivando garantias anteriores a {args.before}...")
+        archive = WarrantyArchive(args.archive_dir)
+        total = archive.archive(db, args.before, args.batch_size)
+        print(f"{total} garantias arquivadas em {archive.root}")
+    except Exception as e:
+        print(f"Erro ao arquivar garantias: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,92 @@
-from sqlalchemy import create_engine
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
+from ..core.metrics import DB_POOL_CHECKOUT_WAIT, record_statement
 from ..core.settings import settings
+from ..core.tracing import KIND_CLIENT, record_span
+
+# Registra os eventos que sobem as versões das tabelas a cada commit, em
+# qualquer processo que abra sessões (API e jobs de linha de comando)
+from . import versions  # noqa: F401
+
+# Tamanho máximo do SQL guardado nos spans dos statements
+TRACED_STATEMENT_LENGTH = 2000
+
+
+def _track_checkout_wait(engine: Engine) -> Engine:
+    """Mede a espera por uma conexão do pool a cada checkout do engine"""
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        start = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+    engine.raw_connection = timed_raw_connection
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    """Engine da aplicação, criado na primeira sessão (e não na importação)"""
+    return _track_checkout_wait(create_engine(settings.DATABASE_URL))
+
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker que se liga ao engine só ao abrir a primeira sessão"""
+
+    def __call__(self, **local_kw) -> Session:
+        local_kw.setdefault("bind", get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
 
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(conn, cursor, statement, parameters, context, many):
+    context._metrics_started_at = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement_time(conn, cursor, statement, parameters, context, many):
+    start, end = context._metrics_started_at, time.perf_counter()
+    record_statement(end - start)
+    record_span(
+        "db.statement",
+        start,
+        end,
+        KIND_CLIENT,
+        **{
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:TRACED_STATEMENT_LENGTH],
+        },
+    )
+
+
+# Sessão compartilhada pelas sub-requisições de um batch (/api/v1/batch)
+shared_session: ContextVar[Optional[Session]] = ContextVar(
+    "shared_session", default=None
+)
+
+
 # Dependency
 def get_db():
+    shared = shared_session.get()
+    if shared is not None:
+        yield shared
+        return
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,142 @@
+"""
+Contagem dos statements SQL por requisição e detecção de N+1.
+
+Com `QUERY_DEBUG` ligado, o `QueryCounterMiddleware` registra os statements
+executados durante a requisição e devolve o total no header `X-Query-Count`.
+Um mesmo formato de statement (o SQL com os parâmetros normalizados) repetido
+`QUERY_REPEAT_THRESHOLD` vezes ou mais é o sinal típico de N+1: o número de
+formatos repetidos vai no header `X-Query-Repeated` e cada um é registrado no
+log. A contagem vai até o início da resposta; statements de respostas em
+streaming não entram no header. Nos testes, `capture_queries` faz a mesma
+contagem para um bloco de código (ver a fixture `query_budget`).
+"""
+
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Placeholders dos drivers (?, %s, %(nome)s, $1) e listas de parâmetros (IN, VALUES)
+_PLACEHOLDER = re.compile(r"\?|%s|%\(\w+\)s|\$\d+")
+_PARAMETER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL normalizado: mesmo formato para statements que só mudam os parâmetros"""
+    shape = _PARAMETER_LIST.sub("?", _PLACEHOLDER.sub("?", statement))
+    return " ".join(shape.split())
+
+
+class QueryLog:
+    """Statements executados num escopo (uma requisição ou um bloco de teste)"""
+
+    def __init__(self):
+        self.count = 0
+        self._statements: Counter = Counter()
+
+    def record(self, statement: str, context=None):
+        # Um INSERT em lote (insertmanyvalues) pode passar várias vezes pelo
+        # cursor com o mesmo contexto de execução: conta uma execução só
+        if context is not None:
+            logged = getattr(context, "_query_logs", None)
+            if logged is None:
+                logged = context._query_logs = set()
+            if id(self) in logged:
+                return
+            logged.add(id(self))
+        self.count += 1
+        self._statements[statement] += 1
+
+    def shapes(self) -> Counter:
+        shapes: Counter = Counter()
+        for statement, count in self._statements.items():
+            shapes[statement_shape(statement)] += count
+        return shapes
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Formatos executados `threshold` vezes ou mais, do mais repetido ao menos"""
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        return [
+            (shape, count)
+            for shape, count in self.shapes().most_common()
+            if count >= threshold
+        ]
+
+
+# Registro da requisição em andamento (visível nas threads do pool)
+current_query_log: ContextVar[Optional[QueryLog]] = ContextVar(
+    "current_query_log", default=None
+)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _log_statement(conn, cursor, statement, parameters, context, many):
+    log = current_query_log.get()
+    if log is not None:
+        log.record(statement, context)
+
+
+@contextmanager
+def capture_queries(target=Engine) -> Iterator[QueryLog]:
+    """
+    Registra os statements executados por `target` (um engine; por padrão,
+    todos) enquanto o bloco roda, em qualquer thread: o TestClient executa a
+    aplicação numa thread própria, fora do contexto do teste.
+    """
+    log = QueryLog()
+
+    def listener(conn, cursor, statement, parameters, context, many):
+        log.record(statement, context)
+
+    event.listen(target, "after_cursor_execute", listener)
+    try:
+        yield log
+    finally:
+        event.remove(target, "after_cursor_execute", listener)
+
+
+class QueryCounterMiddleware:
+    """Middleware ASGI que expõe a contagem de statements da requisição"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_DEBUG:
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = current_query_log.set(log)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(log.count).encode()))
+                repeated = log.repeated()
+                if repeated:
+                    headers.append((b"x-query-repeated", str(len(repeated)).encode()))
+                for shape, count in repeated:
+                    logger.warning(
+                        "Possível N+1 em %s %s: %d execuções de %s",
+                        scope["method"],
+                        scope["path"],
+                        count,
+                        shape,
+                    )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_log.reset(token)
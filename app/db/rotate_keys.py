@@ -0,0 +1,45 @@
+import argparse
+
+from ..services.key_rotation import CpfReencryptionJob
+from .database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recriptografa os CPFs de fornecedores com a chave atual"
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--rows-per-second",
+        type=float,
+        default=None,
+        help="Limita a vazão do job para não competir com a aplicação",
+    )
+    parser.add_argument(
+        "--after-id",
+        type=int,
+        default=0,
+        help="Retoma a partir do fornecedor seguinte a este id",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        job = CpfReencryptionJob(db, args.batch_size, args.rows_per_second)
+        progress = None
+        for progress in job.run(args.after_id):
+            print(
+                f"{progress['scanned']}/{progress['total']} verificados, "
+                f"{progress['rotated']} recriptografados, "
+                f"{progress['unreadable']} ilegíveis (último id: {progress['last_id']})"
+            )
+        if progress is None:
+            print("Nenhum CPF a recriptografar")
+    except Exception as e:
+        print(f"Erro ao recriptografar CPFs: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Índices de busca textual mantidos pelo próprio banco de dados.
+
+No SQLite os índices são tabelas virtuais FTS5 sincronizadas por triggers;
+no Postgres são índices GIN (pg_trgm), atualizados automaticamente.
+Estes comandos são usados pelo metadata (create_all); as migrações guardam
+uma cópia congelada do DDL da sua revisão, que não muda junto com este módulo.
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import DDL, Table, event
+
+# Busca por trigramas no nome do fornecedor
+SUPPLIER_NAME_FTS = "dim_supplier_name_fts"
+
+SUPPLIER_NAME_INDEX: Dict[str, List[str]] = {
+    "sqlite": [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {SUPPLIER_NAME_FTS} USING fts5(
+            supplier_name,
+            content='dim_supplier',
+            content_rowid='supplier_id',
+            tokenize='trigram'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {SUPPLIER_NAME_FTS}_ai
+        AFTER INSERT ON dim_supplier BEGIN
+            INSERT INTO {SUPPLIER_NAME_FTS}(rowid, supplier_name)
+            VALUES (new.supplier_id, new.supplier_name);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {SUPPLIER_NAME_FTS}_ad
+        AFTER DELETE ON dim_supplier BEGIN
+            INSERT INTO {SUPPLIER_NAME_FTS}({SUPPLIER_NAME_FTS}, rowid, supplier_name)
+            VALUES ('delete', old.supplier_id, old.supplier_name);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {SUPPLIER_NAME_FTS}_au
+        AFTER UPDATE OF supplier_name ON dim_supplier BEGIN
+            INSERT INTO {SUPPLIER_NAME_FTS}({SUPPLIER_NAME_FTS}, rowid, supplier_name)
+            VALUES ('delete', old.supplier_id, old.supplier_name);
+            INSERT INTO {SUPPLIER_NAME_FTS}(rowid, supplier_name)
+            VALUES (new.supplier_id, new.supplier_name);
+        END
+        """,
+    ],
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        """
+        CREATE INDEX IF NOT EXISTS ix_dim_supplier_name_trgm
+        ON dim_supplier USING gin (supplier_name gin_trgm_ops)
+        """,
+    ],
+}
+
+SUPPLIER_NAME_INDEX_DROP: Dict[str, List[str]] = {
+    "sqlite": [
+        f"DROP TRIGGER IF EXISTS {SUPPLIER_NAME_FTS}_ai",
+        f"DROP TRIGGER IF EXISTS {SUPPLIER_NAME_FTS}_ad",
+        f"DROP TRIGGER IF EXISTS {SUPPLIER_NAME_FTS}_au",
+        f"DROP TABLE IF EXISTS {SUPPLIER_NAME_FTS}",
+    ],
+    "postgresql": ["DROP INDEX IF EXISTS ix_dim_supplier_name_trgm"],
+}
+
+# Reconstrói o índice a partir dos dados já existentes na tabela
+SUPPLIER_NAME_INDEX_REBUILD: Dict[str, List[str]] = {
+    "sqlite": [
+        f"INSERT INTO {SUPPLIER_NAME_FTS}({SUPPLIER_NAME_FTS}) VALUES ('rebuild')"
+    ],
+    "postgresql": [],
+}
+
+
+# Busca textual nos comentários de garantia (cliente e técnico)
+WARRANTY_COMMENTS_FTS = "fact_warranties_fts"
+WARRANTY_COMMENTS_TS_CONFIG = "portuguese"
+WARRANTY_COMMENTS_TSVECTOR = (
+    f"to_tsvector('{WARRANTY_COMMENTS_TS_CONFIG}', "
+    "coalesce(client_comment, '') || ' ' || coalesce(tech_comment, ''))"
+)
+
+WARRANTY_COMMENTS_INDEX: Dict[str, List[str]] = {
+    "sqlite": [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {WARRANTY_COMMENTS_FTS} USING fts5(
+            client_comment,
+            tech_comment,
+            content='fact_warranties',
+            content_rowid='claim_key',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {WARRANTY_COMMENTS_FTS}_ai
+        AFTER INSERT ON fact_warranties BEGIN
+            INSERT INTO {WARRANTY_COMMENTS_FTS}(rowid, client_comment, tech_comment)
+            VALUES (new.claim_key, new.client_comment, new.tech_comment);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {WARRANTY_COMMENTS_FTS}_ad
+        AFTER DELETE ON fact_warranties BEGIN
+            INSERT INTO {WARRANTY_COMMENTS_FTS}(
+                {WARRANTY_COMMENTS_FTS}, rowid, client_comment, tech_comment
+            )
+            VALUES ('delete', old.claim_key, old.client_comment, old.tech_comment);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {WARRANTY_COMMENTS_FTS}_au
+        AFTER UPDATE OF client_comment, tech_comment ON fact_warranties BEGIN
+            INSERT INTO {WARRANTY_COMMENTS_FTS}(
+                {WARRANTY_COMMENTS_FTS}, rowid, client_comment, tech_comment
+            )
+            VALUES ('delete', old.claim_key, old.client_comment, old.tech_comment);
+            INSERT INTO {WARRANTY_COMMENTS_FTS}(rowid, client_comment, tech_comment)
+            VALUES (new.claim_key, new.client_comment, new.tech_comment);
+        END
+        """,
+    ],
+    "postgresql": [
+        f"""
+        CREATE INDEX IF NOT EXISTS ix_fact_warranties_comments_fts
+        ON fact_warranties USING gin ({WARRANTY_COMMENTS_TSVECTOR})
+        """,
+    ],
+}
+
+WARRANTY_COMMENTS_INDEX_DROP: Dict[str, List[str]] = {
+    "sqlite": [
+        f"DROP TRIGGER IF EXISTS {WARRANTY_COMMENTS_FTS}_ai",
+        f"DROP TRIGGER IF EXISTS {WARRANTY_COMMENTS_FTS}_ad",
+        f"DROP TRIGGER IF EXISTS {WARRANTY_COMMENTS_FTS}_au",
+        f"DROP TABLE IF EXISTS {WARRANTY_COMMENTS_FTS}",
+    ],
+    "postgresql": ["DROP INDEX IF EXISTS ix_fact_warranties_comments_fts"],
+}
+
+WARRANTY_COMMENTS_INDEX_REBUILD: Dict[str, List[str]] = {
+    "sqlite": [
+        f"INSERT INTO {WARRANTY_COMMENTS_FTS}({WARRANTY_COMMENTS_FTS}) "
+        "VALUES ('rebuild')"
+    ],
+    "postgresql": [],
+}
+
+
+def attach_ddl(
+    table: Table,
+    create: Dict[str, List[str]],
+    drop: Dict[str, List[str]],
+):
+    """Cria/remove os objetos auxiliares junto com a tabela no metadata"""
+    for dialect, statements in create.items():
+        for statement in statements:
+            event.listen(
+                table, "after_create", DDL(statement).execute_if(dialect=dialect)
+            )
+    for dialect, statements in drop.items():
+        for statement in statements:
+            event.listen(
+                table, "before_drop", DDL(statement).execute_if(dialect=dialect)
+            )
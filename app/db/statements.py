@@ -0,0 +1,61 @@
+"""
+Statements pré-construídos para as consultas mais frequentes.
+
+Construídos uma única vez na importação do módulo, com parâmetros nomeados,
+de forma que cada requisição apenas executa o statement já existente e o
+SQL compilado é reaproveitado do cache de compilação do SQLAlchemy.
+"""
+
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy import bindparam, event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+from ..models.auth import User
+from ..models.models import DimParts, DimPurchances, DimSupplier, FactWarranties
+
+SUPPLIER_BY_ID = select(DimSupplier).where(
+    DimSupplier.supplier_id == bindparam("supplier_id")
+)
+
+TRANSACTION_BY_ID = select(DimPurchances).where(
+    DimPurchances.purchance_id == bindparam("purchance_id")
+)
+
+PART_BY_ID = select(DimParts).where(DimParts.part_id == bindparam("part_id"))
+
+WARRANTY_BY_ID = select(FactWarranties).where(
+    FactWarranties.claim_key == bindparam("claim_key")
+)
+
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+
+# Contadores do cache de compilação de todos os engines do processo
+_cache_counters: Counter = Counter()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_compilation_cache(conn, cursor, statement, parameters, context, many):
+    cache_hit = getattr(context, "cache_hit", None)
+    if cache_hit == CACHE_HIT:
+        _cache_counters["hits"] += 1
+    elif cache_hit == CACHE_MISS:
+        _cache_counters["misses"] += 1
+    else:
+        _cache_counters["uncached"] += 1
+
+
+def statement_cache_stats() -> Dict[str, float]:
+    """Acertos e falhas do cache de compilação de SQL desde o início do processo"""
+    hits, misses = _cache_counters["hits"], _cache_counters["misses"]
+    return {
+        "hits": hits,
+        "misses": misses,
+        "uncached": _cache_counters["uncached"],
+        "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+    }
@@ -0,0 +1,113 @@
+"""
+Contadores de versão por tabela, incrementados a cada commit que escreve nela.
+
+As escritas são detectadas nos eventos da Session (flush do ORM e DML
+executado via `session.execute`) e os contadores sobem depois do commit, de
+modo que uma versão nova nunca aponta para dados ainda não confirmados.
+Sem `REDIS_URL` os contadores ficam na memória do processo (identificados por
+um id de inicialização); com Redis são compartilhados entre workers e jobs.
+"""
+
+import time
+import uuid
+from typing import Dict, Iterable, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..core.cache import get_redis
+from ..core.settings import settings
+
+
+class MemoryTableVersions:
+    remote = False
+
+    def __init__(self):
+        self.boot_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self._versions: Dict[str, int] = {}
+        self._modified: Dict[str, float] = {}
+
+    def bump(self, tables: Iterable[str]):
+        now = time.time()
+        for table in tables:
+            self._versions[table] = self._versions.get(table, 0) + 1
+            self._modified[table] = now
+
+    def get(self, tables: Tuple[str, ...]) -> Tuple[str, float]:
+        """Retorna (marcador de versão, data da última escrita) das tabelas"""
+        versions = ",".join(str(self._versions.get(t, 0)) for t in tables)
+        modified = max(self._modified.get(t, self.started_at) for t in tables)
+        return f"{self.boot_id}:{versions}", modified
+
+    def clear(self):
+        self._versions.clear()
+        self._modified.clear()
+
+
+class RedisTableVersions:
+    VERSIONS_KEY = "table_versions"
+    MODIFIED_KEY = "table_modified"
+    remote = True
+
+    def __init__(self, url: str):
+        self.client = get_redis(url)
+
+    def bump(self, tables: Iterable[str]):
+        now = time.time()
+        pipeline = self.client.pipeline()
+        for table in tables:
+            pipeline.hincrby(self.VERSIONS_KEY, table, 1)
+            pipeline.hset(self.MODIFIED_KEY, table, now)
+        pipeline.execute()
+
+    def get(self, tables: Tuple[str, ...]) -> Tuple[str, float]:
+        pipeline = self.client.pipeline()
+        pipeline.hmget(self.VERSIONS_KEY, list(tables))
+        pipeline.hmget(self.MODIFIED_KEY, list(tables))
+        versions, modified = pipeline.execute()
+        token = ",".join((v or b"0").decode() for v in versions)
+        return token, max(float(m or 0) for m in modified)
+
+    def clear(self):
+        self.client.delete(self.VERSIONS_KEY, self.MODIFIED_KEY)
+
+
+def get_table_versions():
+    if settings.REDIS_URL:
+        return RedisTableVersions(settings.REDIS_URL)
+    return MemoryTableVersions()
+
+
+table_versions = get_table_versions()
+
+
+def _written_tables(session: Session) -> Set[str]:
+    return session.info.setdefault("written_tables", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_tables(session, flush_context):
+    written = _written_tables(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        written.update(table.name for table in inspect(obj).mapper.tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_executed_dml(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None:
+            _written_tables(state.session).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_written_tables(session):
+    written = session.info.pop("written_tables", None)
+    if written:
+        table_versions.bump(written)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_tables(session):
+    session.info.pop("written_tables", None)
@@ -1,38 +1,116 @@
+"""
+Fábrica da aplicação.
+
+`create_app()` importa os routers e middlewares e monta a aplicação; importar
+este módulo não cria nada. O engine, os contextos de hash de senha e o jose
+são inicializados no primeiro uso, e os routers opcionais desativados nem são
+importados. `app` continua disponível (`uvicorn app.main:app`), criado no
+primeiro acesso; `uvicorn --factory app.main:create_app` dispensa até isso.
+"""
+
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
 
-from .api import auth, bulk_operations, suppliers, transactions
 from .core.settings import settings
 
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    description=settings.DESCRIPTION,
-    version=settings.VERSION,
-)
-
-# Configuração CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.BACKEND_CORS_ORIGINS,  # Em produção, especifique os domínios permitidos
-    allow_credentials=True,
-    allow_methods=settings.ALLOWED_METHODS,
-    allow_headers=settings.ALLOWED_HEADERS,
-    expose_headers=["*"],
-    max_age=600,
-)
-
-# Inclusão dos routers
-app.include_router(auth.router, prefix=settings.API_V1_STR)
-app.include_router(bulk_operations.router)
-app.include_router(suppliers.router)
-app.include_router(transactions.router)
-
-
-@app.get("/")
-async def root():
-    return {
-        "message": f"Bem-vindo ao {settings.PROJECT_NAME}",
-        "version": settings.VERSION,
-        "docs": "/docs",
-        "redoc": "/redoc",
-    }
+# Routers que podem ser desativados: módulo em app.api e a setting que o ativa
+OPTIONAL_ROUTERS = {
+    "diagnostics": "DIAGNOSTICS_ENABLED",
+    "batch": "BATCH_ENABLED",
+    "metrics": "METRICS_ENABLED",
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from .core.cache import evict_expired_periodically
+
+    # Limpeza periódica das sessões e demais entradas expiradas em memória
+    eviction = asyncio.create_task(
+        evict_expired_periodically(settings.CACHE_EVICTION_INTERVAL_SECONDS)
+    )
+    yield
+    eviction.cancel()
+
+
+def create_app() -> FastAPI:
+    from fastapi.middleware.cors import CORSMiddleware
+
+    from .api import auth, bulk_operations, parts, suppliers, transactions, warranties
+    from .core.compression import CompressionMiddleware
+    from .core.idempotency import IdempotencyMiddleware
+    from .core.metrics import MetricsMiddleware
+    from .core.rate_limit import RateLimitMiddleware
+    from .core.tracing import TracingMiddleware
+    from .db.query_counter import QueryCounterMiddleware
+
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        description=settings.DESCRIPTION,
+        version=settings.VERSION,
+        lifespan=lifespan,
+    )
+
+    # Idempotency-Key nos POST de criação (mais interno: guarda a resposta original)
+    app.add_middleware(IdempotencyMiddleware)
+
+    # Limite de requisições por cliente nas rotas de bulk e analytics
+    app.add_middleware(RateLimitMiddleware)
+
+    # Compressão negociada (gzip/brotli/zstd) das respostas grandes
+    app.add_middleware(CompressionMiddleware)
+
+    # Configuração CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.BACKEND_CORS_ORIGINS,  # Em produção, especifique os domínios permitidos
+        allow_credentials=True,
+        allow_methods=settings.ALLOWED_METHODS,
+        allow_headers=settings.ALLOWED_HEADERS,
+        expose_headers=["*"],
+        max_age=600,
+    )
+
+    # Contagem de statements e alerta de N+1 por requisição (com QUERY_DEBUG)
+    app.add_middleware(QueryCounterMiddleware)
+
+    # Span raiz das requisições amostradas, com propagação do traceparent W3C
+    app.add_middleware(TracingMiddleware)
+
+    # Métricas de latência, concorrência e uso do banco (mais externo: mede tudo)
+    app.add_middleware(MetricsMiddleware)
+
+    # Inclusão dos routers
+    app.include_router(auth.router, prefix=settings.API_V1_STR)
+    app.include_router(bulk_operations.router)
+    app.include_router(suppliers.router)
+    app.include_router(transactions.router)
+    app.include_router(warranties.router)
+    app.include_router(parts.router)
+    for name, flag in OPTIONAL_ROUTERS.items():
+        if getattr(settings, flag):
+            module = importlib.import_module(f".api.{name}", __package__)
+            app.include_router(module.router)
+
+    @app.get("/")
+    async def root():
+        return {
+            "message": f"Bem-vindo ao {settings.PROJECT_NAME}",
+            "version": settings.VERSION,
+            "docs": "/docs",
+            "redoc": "/redoc",
+        }
+
+    return app
+
+
+def __getattr__(name: str):
+    # `app` é criado no primeiro acesso (ex.: uvicorn app.main:app, testes)
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
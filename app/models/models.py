@@ -1,11 +1,16 @@
-# criptografia para CPF
-from cryptography.fernet import Fernet
 from sqlalchemy import Column, Date, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import relationship
 
-from ..core.security import decrypt_value, encrypt_value
+from ..core.crypto import decrypt_value, encrypt_value
 from ..core.settings import settings
 from ..db.database import Base
+from ..db.search import (
+    SUPPLIER_NAME_INDEX,
+    SUPPLIER_NAME_INDEX_DROP,
+    WARRANTY_COMMENTS_INDEX,
+    WARRANTY_COMMENTS_INDEX_DROP,
+    attach_ddl,
+)
 
 
 class DimVehicle(Base):
@@ -30,6 +35,7 @@ class DimParts(Base):
 
     supplier = relationship("DimSupplier", back_populates="parts")
     warranties = relationship("FactWarranties", back_populates="part")
+    purchances = relationship("DimPurchances", back_populates="part")
 
 
 class DimSupplier(Base):
@@ -59,6 +65,9 @@ class DimSupplier(Base):
             self._encrypted_cpf = None
 
 
+attach_ddl(DimSupplier.__table__, SUPPLIER_NAME_INDEX, SUPPLIER_NAME_INDEX_DROP)
+
+
 class DimLocations(Base):
     __tablename__ = "dim_locations"
 
@@ -80,6 +89,7 @@ class DimPurchances(Base):
     purchance_date = Column(Date)
     part_id = Column(Integer, ForeignKey("dim_parts.part_id"))
 
+    part = relationship("DimParts", back_populates="purchances")
     warranties = relationship("FactWarranties", back_populates="purchance")
 
 
@@ -100,3 +110,8 @@ class FactWarranties(Base):
     part = relationship("DimParts", back_populates="warranties")
     location = relationship("DimLocations", back_populates="warranties")
     purchance = relationship("DimPurchances", back_populates="warranties")
+
+
+attach_ddl(
+    FactWarranties.__table__, WARRANTY_COMMENTS_INDEX, WARRANTY_COMMENTS_INDEX_DROP
+)
@@ -1,5 +1,5 @@
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -52,6 +52,10 @@ class Supplier(SupplierBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class SupplierSearchResult(Supplier):
+    score: float
+
+
 # Schemas para Location
 class LocationBase(BaseModel):
     market: str
@@ -108,6 +112,39 @@ class Warranty(WarrantyBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class WarrantySearchHit(Warranty):
+    score: float
+
+
+# Schemas de leitura com relacionamentos expandidos (parâmetro `expand`)
+class SupplierRead(Supplier):
+    location: Optional[Location] = None
+    parts: Optional[List["PartRead"]] = None
+
+
+class PartRead(Part):
+    supplier: Optional[SupplierRead] = None
+    warranties: Optional[List["WarrantyRead"]] = None
+    purchances: Optional[List["PurchanceRead"]] = None
+
+
+class PurchanceRead(Purchance):
+    part: Optional[PartRead] = None
+    warranties: Optional[List["WarrantyRead"]] = None
+
+
+class WarrantyRead(Warranty):
+    vehicle: Optional[Vehicle] = None
+    part: Optional[PartRead] = None
+    location: Optional[Location] = None
+    purchance: Optional[Purchance] = None
+
+
+SupplierRead.model_rebuild()
+PartRead.model_rebuild()
+PurchanceRead.model_rebuild()
+
+
 # Schemas para respostas analíticas
 class SupplierSalesReport(BaseModel):
     supplier_id: int
@@ -0,0 +1,40 @@
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+from ..core.settings import settings
+
+
+class BatchSubRequest(BaseModel):
+    id: Optional[str] = None  # devolvido na resposta correspondente
+    method: Literal["GET"] = "GET"
+    path: str  # caminho com query string, ex.: /api/v1/suppliers/1?expand=location
+    headers: Dict[str, str] = {}
+
+    @field_validator("path")
+    @classmethod
+    def validate_path(cls, v):
+        if not v.startswith(f"{settings.API_V1_STR}/") or v.startswith(
+            f"{settings.API_V1_STR}/batch"
+        ):
+            raise ValueError(f"O caminho deve ser uma rota de {settings.API_V1_STR}")
+        if v.split("?")[0].endswith("/export"):
+            raise ValueError("Exportações devem ser baixadas diretamente")
+        return v
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest] = Field(
+        ..., min_length=1, max_length=settings.BATCH_MAX_REQUESTS
+    )
+
+
+class BatchSubResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchSubResponse]
@@ -0,0 +1,12 @@
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """Página de resultados com cursor opaco para a próxima página"""
+
+    items: List[T]
+    next_cursor: Optional[str] = None
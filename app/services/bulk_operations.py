@@ -1,8 +1,10 @@
 from typing import Any, Dict, List
 
-from sqlalchemy import case, distinct, func, literal
+from sqlalchemy import case, distinct, func, insert, literal
 from sqlalchemy.orm import Session
 
+from ..core.metrics import BULK_ROWS_INSERTED
+from ..core.tracing import span
 from ..models.models import (
     DimParts,
     DimPurchances,
@@ -20,102 +22,135 @@ from ..schemas.bulk_operations import (
     SupplierFilter,
     TransactionFilter,
 )
+from .supplier_search import SupplierSearchService
+from .warranty_archive import WarrantyArchive, merge_group_counts
+
+# Tamanho dos lotes de IDs nas consultas às dimensões dos dados arquivados
+LOOKUP_CHUNK_SIZE = 5000
+
+# Colunas devolvidas pelas cargas em massa de cada tabela
+BULK_RESULT_COLUMNS = {
+    DimSupplier: ("supplier_id", "supplier_name", "location_id"),
+    DimPurchances: ("purchance_id", "purchance_type", "purchance_date", "part_id"),
+    DimVehicle: ("vehicle_id", "model", "prod_date", "year", "propulsion"),
+    DimParts: ("part_id", "part_name", "supplier_id", "last_id_purchase"),
+    FactWarranties: (
+        "claim_key",
+        "vehicle_id",
+        "repair_date",
+        "part_id",
+        "classifed_as",
+        "location_id",
+        "purchance_id",
+    ),
+}
 
 
 class BulkOperationsService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, archive: WarrantyArchive | None = None):
         self.db = db
+        self.archive = archive or WarrantyArchive()
 
-    async def bulk_create_suppliers(self, suppliers: BulkCreateSupplier):
-        db_suppliers = [
-            DimSupplier(**supplier.model_dump()) for supplier in suppliers.suppliers
-        ]
-        self.db.add_all(db_suppliers)
-        self.db.commit()
-        return [
-            {
-                "supplier_id": supplier.supplier_id,
-                "supplier_name": supplier.supplier_name,
-                "location_id": supplier.location_id,
-            }
-            for supplier in db_suppliers
-        ]
+    def _lookup(self, query, key, ids) -> Dict[Any, tuple]:
+        """Carrega atributos de dimensão para os IDs informados: {id: (colunas...)}"""
+        ids = list(ids)
+        result = {}
+        for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+            chunk = ids[start : start + LOOKUP_CHUNK_SIZE]
+            for row in query.filter(key.in_(chunk)):
+                result[row[0]] = tuple(row[1:])
+        return result
 
-    async def bulk_create_purchances(self, purchances: BulkCreatePurchance):
-        db_purchances = [
-            DimPurchances(**purchance.model_dump())
-            for purchance in purchances.purchances
-        ]
-        self.db.add_all(db_purchances)
+    async def bulk_insert_rows(self, model, rows: List[Dict[str, Any]]):
+        """
+        Insere linhas já validadas (cargas colunares) num único INSERT em lote,
+        sem criar entidades ORM, e devolve as colunas de BULK_RESULT_COLUMNS.
+        """
+        if not rows:
+            return []
+        table = model.__table__
+        statement = insert(table).returning(
+            *(table.c[name] for name in BULK_RESULT_COLUMNS[model]),
+            sort_by_parameter_order=True,
+        )
+        created = [row._asdict() for row in self.db.execute(statement, rows)]
         self.db.commit()
-        return [
-            {
-                "purchance_id": purchance.purchance_id,
-                "purchance_type": purchance.purchance_type,
-                "purchance_date": purchance.purchance_date,
-                "part_id": purchance.part_id,
-            }
-            for purchance in db_purchances
-        ]
+        BULK_ROWS_INSERTED.inc(table.name, amount=len(created))
+        return created
 
-    async def bulk_create_vehicles(self, vehicles: BulkCreateVehicle):
-        db_vehicles = [
-            DimVehicle(**vehicle.model_dump()) for vehicle in vehicles.vehicles
+    def _insert_entities(self, model, entities: List[Any]):
+        """
+        Insere as entidades e devolve as colunas de BULK_RESULT_COLUMNS. As
+        colunas são lidas após o flush e antes do commit, que expira as
+        entidades: lidas depois, custariam um SELECT de refresh por linha.
+        """
+        self.db.add_all(entities)
+        self.db.flush()
+        created = [
+            {name: getattr(entity, name) for name in BULK_RESULT_COLUMNS[model]}
+            for entity in entities
         ]
-        self.db.add_all(db_vehicles)
         self.db.commit()
+        BULK_ROWS_INSERTED.inc(model.__tablename__, amount=len(created))
+        return created
 
-        # Convertendo para dicionário antes de retornar
-        return [
-            {
-                "vehicle_id": vehicle.vehicle_id,
-                "model": vehicle.model,
-                "prod_date": vehicle.prod_date,
-                "year": vehicle.year,
-                "propulsion": vehicle.propulsion,
-            }
-            for vehicle in db_vehicles
-        ]
+    async def bulk_create_suppliers(self, suppliers: BulkCreateSupplier):
+        return self._insert_entities(
+            DimSupplier,
+            [DimSupplier(**supplier.model_dump()) for supplier in suppliers.suppliers],
+        )
+
+    async def bulk_create_purchances(self, purchances: BulkCreatePurchance):
+        return self._insert_entities(
+            DimPurchances,
+            [
+                DimPurchances(**purchance.model_dump())
+                for purchance in purchances.purchances
+            ],
+        )
+
+    async def bulk_create_vehicles(self, vehicles: BulkCreateVehicle):
+        return self._insert_entities(
+            DimVehicle,
+            [DimVehicle(**vehicle.model_dump()) for vehicle in vehicles.vehicles],
+        )
 
     async def bulk_create_parts(self, parts: BulkCreatePart):
-        db_parts = [DimParts(**part.model_dump()) for part in parts.parts]
-        self.db.add_all(db_parts)
-        self.db.commit()
-        return [
-            {
-                "part_id": part.part_id,
-                "part_name": part.part_name,
-                "supplier_id": part.supplier_id,
-                "last_id_purchase": part.last_id_purchase,
-            }
-            for part in db_parts
-        ]
+        return self._insert_entities(
+            DimParts, [DimParts(**part.model_dump()) for part in parts.parts]
+        )
 
     async def bulk_create_warranties(self, warranties: BulkCreateWarranty):
-        db_warranties = [
-            FactWarranties(**warranty.model_dump())
-            for warranty in warranties.warranties
-        ]
-        self.db.add_all(db_warranties)
-        self.db.commit()
-        return [
-            {
-                "claim_key": warranty.claim_key,
-                "vehicle_id": warranty.vehicle_id,
-                "repair_date": warranty.repair_date,
-                "part_id": warranty.part_id,
-                "classifed_as": warranty.classifed_as,
-                "location_id": warranty.location_id,
-                "purchance_id": warranty.purchance_id,
-            }
-            for warranty in db_warranties
-        ]
+        return self._insert_entities(
+            FactWarranties,
+            [
+                FactWarranties(**warranty.model_dump())
+                for warranty in warranties.warranties
+            ],
+        )
+
+    def _filter_suppliers(self, query, supplier_filter: SupplierFilter | None):
+        if supplier_filter:
+            if supplier_filter.name:
+                query = query.filter(
+                    SupplierSearchService(self.db).name_filter(supplier_filter.name)
+                )
+            if supplier_filter.location_id:
+                query = query.filter(
+                    DimSupplier.location_id == supplier_filter.location_id
+                )
+        return query
 
     async def get_supplier_sales_analytics(
         self,
         supplier_filter: SupplierFilter | None = None,
         date_range: DateRangeFilter | None = None,
     ):
+        # O período filtra as compras, e não os reparos: com dados arquivados,
+        # qualquer período inclui as garantias do arquivo
+        if self.archive.archived_before is not None:
+            return self._supplier_sales_with_archive(supplier_filter, date_range)
+
         query = (
             self.db.query(
                 DimSupplier.supplier_id,
@@ -128,37 +163,91 @@ class BulkOperationsService:
             .outerjoin(DimPurchances, DimParts.part_id == DimPurchances.part_id)
             .group_by(DimSupplier.supplier_id, DimSupplier.supplier_name)
         )
+        query = self._filter_suppliers(query, supplier_filter)
 
-        if supplier_filter:
-            if supplier_filter.name:
-                query = query.filter(
-                    DimSupplier.supplier_name.ilike(f"%{supplier_filter.name}%")
-                )
-            if supplier_filter.location_id:
-                query = query.filter(
-                    DimSupplier.location_id == supplier_filter.location_id
+        if date_range:
+            query = query.filter(
+                DimPurchances.purchance_date.between(
+                    date_range.start_date, date_range.end_date
                 )
+            )
+
+        rows = query.all()
+        with span("serialize.rows", rows=len(rows)):
+            return [
+                {
+                    "supplier_id": row.supplier_id,
+                    "supplier_name": row.supplier_name,
+                    "total_warranties": row.total_warranties,
+                    "total_purchases": row.total_purchases,
+                }
+                for row in rows
+            ]
 
+    def _supplier_sales_with_archive(
+        self,
+        supplier_filter: SupplierFilter | None,
+        date_range: DateRangeFilter | None,
+    ):
+        """
+        Mesma análise, combinando a tabela quente com o arquivo Parquet. As
+        contagens são feitas por peça e reproduzem as da junção peça x garantias
+        x compras: cada garantia conta uma vez por compra da peça, e vice-versa.
+        """
+        parts = self._filter_suppliers(
+            self.db.query(
+                DimSupplier.supplier_id, DimSupplier.supplier_name, DimParts.part_id
+            ).join(DimParts, DimSupplier.supplier_id == DimParts.supplier_id),
+            supplier_filter,
+        )
+        purchases_query = self.db.query(
+            DimPurchances.part_id, func.count(DimPurchances.purchance_id)
+        ).group_by(DimPurchances.part_id)
         if date_range:
-            query = query.filter(
+            purchases_query = purchases_query.filter(
                 DimPurchances.purchance_date.between(
                     date_range.start_date, date_range.end_date
                 )
             )
+        purchases = dict(purchases_query.all())
+        warranties = merge_group_counts(
+            self.db.query(FactWarranties.part_id, func.count(FactWarranties.claim_key))
+            .group_by(FactWarranties.part_id)
+            .all()
+            + self.archive.group_counts(["part_id"]),
+            1,
+        )
+
+        suppliers: Dict[Any, list] = {}
+        for supplier_id, supplier_name, part_id in parts:
+            part_purchases = purchases.get(part_id, 0)
+            # Com período, a junção descarta as peças sem compras nele
+            if date_range and not part_purchases:
+                continue
+            (part_warranties,) = warranties.get((part_id,), (0,))
+            totals = suppliers.setdefault((supplier_id, supplier_name), [0, 0])
+            totals[0] += part_warranties * max(1, part_purchases)
+            totals[1] += part_purchases * max(1, part_warranties)
 
         return [
             {
-                "supplier_id": row.supplier_id,
-                "supplier_name": row.supplier_name,
-                "total_warranties": row.total_warranties,
-                "total_purchases": row.total_purchases,
+                "supplier_id": supplier_id,
+                "supplier_name": supplier_name,
+                "total_warranties": total_warranties,
+                "total_purchases": total_purchases,
             }
-            for row in query.all()
+            for (supplier_id, supplier_name), (
+                total_warranties,
+                total_purchases,
+            ) in suppliers.items()
         ]
 
     async def get_warranty_analytics_by_model(
         self, date_range: DateRangeFilter | None = None
     ):
+        if self.archive.reaches(date_range):
+            return self._warranty_analytics_by_model_with_archive(date_range)
+
         query = (
             self.db.query(
                 DimVehicle.model,
@@ -178,13 +267,52 @@ class BulkOperationsService:
                 )
             )
 
+        rows = query.all()
+        with span("serialize.rows", rows=len(rows)):
+            return [
+                {
+                    "model": row.model,
+                    "total_warranties": row.total_warranties,
+                    "unique_issues": row.unique_issues,
+                }
+                for row in rows
+            ]
+
+    def _warranty_analytics_by_model_with_archive(
+        self, date_range: DateRangeFilter | None
+    ):
+        """Mesma análise, combinando a tabela quente com o arquivo Parquet"""
+        query = (
+            self.db.query(
+                DimVehicle.model,
+                FactWarranties.classifed_as,
+                func.count(FactWarranties.claim_key),
+            )
+            .join(FactWarranties, DimVehicle.vehicle_id == FactWarranties.vehicle_id)
+            .group_by(DimVehicle.model, FactWarranties.classifed_as)
+        )
+        if date_range:
+            query = query.filter(
+                FactWarranties.repair_date.between(
+                    date_range.start_date, date_range.end_date
+                )
+            )
+
+        archived = self.archive.group_counts(["vehicle_id", "classifed_as"], date_range)
+        vehicles = self._lookup(
+            self.db.query(DimVehicle.vehicle_id, DimVehicle.model),
+            DimVehicle.vehicle_id,
+            {row[0] for row in archived},
+        )
+        rows = query.all() + [
+            (*vehicles[vehicle_id], issue, count)
+            for vehicle_id, issue, count in archived
+            if vehicle_id in vehicles
+        ]
+
         return [
-            {
-                "model": row.model,
-                "total_warranties": row.total_warranties,
-                "unique_issues": row.unique_issues,
-            }
-            for row in query.all()
+            {"model": model, "total_warranties": total, "unique_issues": issues}
+            for (model,), (total, issues) in merge_group_counts(rows, 1).items()
         ]
 
     async def get_transaction_analytics(self, filter: TransactionFilter | None = None):
@@ -208,11 +336,12 @@ class BulkOperationsService:
                 query = query.filter(DimPurchances.part_id == filter.part_id)
 
         results = query.all()
-        return {
-            "transactions": [
-                {"type": r.purchance_type, "count": r.total_count} for r in results
-            ]
-        }
+        with span("serialize.rows", rows=len(results)):
+            return {
+                "transactions": [
+                    {"type": r.purchance_type, "count": r.total_count} for r in results
+                ]
+            }
 
     async def get_average_transactions_by_supplier(
         self, date_range: DateRangeFilter | None = None
@@ -248,26 +377,31 @@ class BulkOperationsService:
                 )
             )
 
-        return [
-            {
-                "supplier_id": row.supplier_id,
-                "supplier_name": row.supplier_name,
-                "total_transactions": row.total_transactions,
-                "average_purchases": row.total_purchases,
-                "average_warranties": row.total_warranties,
-                "transaction_ratio": (
-                    row.total_warranties / row.total_purchases
-                    if row.total_purchases > 0
-                    else 0
-                ),
-            }
-            for row in query.all()
-        ]
+        rows = query.all()
+        with span("serialize.rows", rows=len(rows)):
+            return [
+                {
+                    "supplier_id": row.supplier_id,
+                    "supplier_name": row.supplier_name,
+                    "total_transactions": row.total_transactions,
+                    "average_purchases": row.total_purchases,
+                    "average_warranties": row.total_warranties,
+                    "transaction_ratio": (
+                        row.total_warranties / row.total_purchases
+                        if row.total_purchases > 0
+                        else 0
+                    ),
+                }
+                for row in rows
+            ]
 
     async def get_transactions_by_model(
         self, date_range: DateRangeFilter | None = None
     ):
         """Analisa transações por modelo de veículo"""
+        if self.archive.reaches(date_range):
+            return self._transactions_by_model_with_archive(date_range)
+
         query = (
             self.db.query(
                 DimVehicle.model,
@@ -288,21 +422,84 @@ class BulkOperationsService:
                 )
             )
 
+        rows = query.all()
+        with span("serialize.rows", rows=len(rows)):
+            return [
+                {
+                    "model": row.model,
+                    "year": row.year,
+                    "warranty_count": row.warranty_count,
+                    "unique_parts": row.unique_parts,
+                    "unique_suppliers": row.unique_suppliers,
+                }
+                for row in rows
+            ]
+
+    def _transactions_by_model_with_archive(self, date_range: DateRangeFilter | None):
+        """Mesma análise, combinando a tabela quente com o arquivo Parquet"""
+        query = (
+            self.db.query(
+                DimVehicle.model,
+                DimVehicle.year,
+                DimParts.part_id,
+                DimParts.supplier_id,
+                func.count(FactWarranties.claim_key),
+            )
+            .join(FactWarranties, DimVehicle.vehicle_id == FactWarranties.vehicle_id)
+            .join(DimParts, FactWarranties.part_id == DimParts.part_id)
+            .group_by(
+                DimVehicle.model,
+                DimVehicle.year,
+                DimParts.part_id,
+                DimParts.supplier_id,
+            )
+        )
+        if date_range:
+            query = query.filter(
+                FactWarranties.repair_date.between(
+                    date_range.start_date, date_range.end_date
+                )
+            )
+
+        archived = self.archive.group_counts(["vehicle_id", "part_id"], date_range)
+        vehicles = self._lookup(
+            self.db.query(DimVehicle.vehicle_id, DimVehicle.model, DimVehicle.year),
+            DimVehicle.vehicle_id,
+            {row[0] for row in archived},
+        )
+        parts = self._lookup(
+            self.db.query(DimParts.part_id, DimParts.supplier_id),
+            DimParts.part_id,
+            {row[1] for row in archived},
+        )
+        rows = query.all() + [
+            (*vehicles[vehicle_id], part_id, *parts[part_id], count)
+            for vehicle_id, part_id, count in archived
+            if vehicle_id in vehicles and part_id in parts
+        ]
+
         return [
             {
-                "model": row.model,
-                "year": row.year,
-                "warranty_count": row.warranty_count,
-                "unique_parts": row.unique_parts,
-                "unique_suppliers": row.unique_suppliers,
+                "model": model,
+                "year": year,
+                "warranty_count": total,
+                "unique_parts": unique_parts,
+                "unique_suppliers": unique_suppliers,
             }
-            for row in query.all()
+            for (model, year), (
+                total,
+                unique_parts,
+                unique_suppliers,
+            ) in merge_group_counts(rows, 2).items()
         ]
 
     async def get_part_performance_analytics(
         self, date_range: DateRangeFilter | None = None
     ):
         """Analisa o desempenho das peças baseado em garantias"""
+        if self.archive.reaches(date_range):
+            return self._part_performance_with_archive(date_range)
+
         query = (
             self.db.query(
                 DimParts.part_id,
@@ -325,13 +522,69 @@ class BulkOperationsService:
                 )
             )
 
+        rows = query.all()
+        with span("serialize.rows", rows=len(rows)):
+            return [
+                {
+                    "part_id": row.part_id,
+                    "part_name": row.part_name,
+                    "supplier_name": row.supplier_name,
+                    "warranty_count": row.warranty_count,
+                    "failure_types": row.failure_types,
+                }
+                for row in rows
+            ]
+
+    def _part_performance_with_archive(self, date_range: DateRangeFilter | None):
+        """Mesma análise, combinando a tabela quente com o arquivo Parquet"""
+        query = (
+            self.db.query(
+                DimParts.part_id,
+                DimParts.part_name,
+                DimSupplier.supplier_name,
+                FactWarranties.classifed_as,
+                func.count(FactWarranties.claim_key),
+            )
+            .join(DimSupplier, DimParts.supplier_id == DimSupplier.supplier_id)
+            .join(FactWarranties, DimParts.part_id == FactWarranties.part_id)
+            .group_by(
+                DimParts.part_id,
+                DimParts.part_name,
+                DimSupplier.supplier_name,
+                FactWarranties.classifed_as,
+            )
+        )
+        if date_range:
+            query = query.filter(
+                FactWarranties.repair_date.between(
+                    date_range.start_date, date_range.end_date
+                )
+            )
+
+        archived = self.archive.group_counts(["part_id", "classifed_as"], date_range)
+        parts = self._lookup(
+            self.db.query(
+                DimParts.part_id, DimParts.part_name, DimSupplier.supplier_name
+            ).join(DimSupplier, DimParts.supplier_id == DimSupplier.supplier_id),
+            DimParts.part_id,
+            {row[0] for row in archived},
+        )
+        rows = query.all() + [
+            (part_id, *parts[part_id], failure, count)
+            for part_id, failure, count in archived
+            if part_id in parts
+        ]
+
         return [
             {
-                "part_id": row.part_id,
-                "part_name": row.part_name,
-                "supplier_name": row.supplier_name,
-                "warranty_count": row.warranty_count,
-                "failure_types": row.failure_types,
+                "part_id": part_id,
+                "part_name": part_name,
+                "supplier_name": supplier_name,
+                "warranty_count": total,
+                "failure_types": failure_types,
             }
-            for row in query.all()
+            for (part_id, part_name, supplier_name), (
+                total,
+                failure_types,
+            ) in merge_group_counts(rows, 3).items()
         ]
@@ -0,0 +1,203 @@
+"""
+Exportação em streaming de tabelas em CSV, NDJSON, Parquet ou Arrow IPC.
+
+A consulta é executada com `yield_per` (cursor no servidor no Postgres) e as
+linhas são lidas em blocos de `EXPORT_BATCH_SIZE`; cada bloco é serializado
+e enviado antes de o próximo ser buscado, então a memória usada não depende
+do tamanho do resultado. Parquet e Arrow IPC requerem pyarrow.
+"""
+
+import csv
+import io
+from enum import Enum
+from typing import Iterator, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric, Select
+from sqlalchemy.orm import Session
+
+from ..core.responses import dumps
+from ..core.settings import settings
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+    parquet = "parquet"
+    arrow = "arrow"
+
+
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv",
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.parquet: "application/vnd.apache.parquet",
+    ExportFormat.arrow: "application/vnd.apache.arrow.stream",
+}
+
+EXTENSIONS = {
+    ExportFormat.csv: "csv",
+    ExportFormat.ndjson: "ndjson",
+    ExportFormat.parquet: "parquet",
+    ExportFormat.arrow: "arrows",
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _arrow_type(pa, column_type):
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destino de escrita do pyarrow que acumula os bytes até serem enviados"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class TableExport:
+    def __init__(
+        self, db: Session, statement: Select, batch_size: Optional[int] = None
+    ):
+        self.db = db
+        self.statement = statement
+        self.batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+        self.columns = list(statement.selected_columns)
+        self.names = [column.key for column in self.columns]
+
+    def _batches(self) -> Iterator[Sequence]:
+        # Executa na conexão da sessão (mesma transação), sem a camada de
+        # resultados do ORM, que não é necessária para linhas de colunas
+        result = self.db.connection().execute(
+            self.statement.execution_options(
+                stream_results=True, yield_per=self.batch_size
+            )
+        )
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
+
+    def stream(self, fmt: ExportFormat) -> Iterator[bytes]:
+        """Gera o arquivo no formato pedido, um bloco de linhas por vez"""
+        return getattr(self, f"_{fmt.value}")()
+
+    def _csv(self) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(self.names)
+        for rows in self._batches():
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    def _ndjson(self) -> Iterator[bytes]:
+        names = self.names
+        for rows in self._batches():
+            yield b"".join(dumps(dict(zip(names, row))) + b"\n" for row in rows)
+
+    def _record_batches(self, pa):
+        schema = pa.schema(
+            [
+                (name, _arrow_type(pa, column.type))
+                for name, column in zip(self.names, self.columns)
+            ]
+        )
+
+        def batches():
+            for rows in self._batches():
+                arrays = [
+                    pa.array(values, type=field.type)
+                    for values, field in zip(zip(*rows), schema)
+                ]
+                yield pa.record_batch(arrays, schema=schema)
+
+        return schema, batches()
+
+    def _parquet(self) -> Iterator[bytes]:
+        pa = _pyarrow()
+        schema, batches = self._record_batches(pa)
+        sink = _ChunkSink()
+        # Cada bloco vira um row group, gravado e enviado assim que lido
+        with pa.parquet.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                yield sink.drain()
+        yield sink.drain()
+
+    def _arrow(self) -> Iterator[bytes]:
+        pa = _pyarrow()
+        schema, batches = self._record_batches(pa)
+        sink = _ChunkSink()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            yield sink.drain()
+            for batch in batches:
+                writer.write_batch(batch)
+                yield sink.drain()
+        yield sink.drain()
+
+
+def export_response(
+    db: Session,
+    statement: Select,
+    fmt: ExportFormat,
+    filename: str,
+    headers: Optional[dict] = None,
+) -> StreamingResponse:
+    """Resposta em streaming com o resultado de `statement` no formato `fmt`"""
+    if fmt in (ExportFormat.parquet, ExportFormat.arrow) and _pyarrow() is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"O formato {fmt.value} requer o pacote pyarrow",
+        )
+    export = TableExport(db, statement)
+    return StreamingResponse(
+        export.stream(fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            **(headers or {}),
+            "Content-Disposition": (
+                f'attachment; filename="{filename}.{EXTENSIONS[fmt]}"'
+            ),
+        },
+    )
@@ -0,0 +1,128 @@
+"""
+Recriptografia dos CPFs de fornecedores com a chave atual do chaveiro.
+
+O job percorre `dim_supplier` em lotes pela chave primária, cada lote numa
+transação curta, com vazão limitada. Valores que a chave atual já abre são
+pulados, então o job pode ser interrompido e executado de novo (ou retomado
+a partir do último id informado no progresso) sem refazer o trabalho.
+"""
+
+import time
+from typing import Dict, Iterator, List, Optional
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from ..core.crypto import get_fernet, get_primary_fernet
+from ..models.models import DimSupplier
+
+suppliers = DimSupplier.__table__
+
+# Só grava se o valor não mudou desde a leitura do lote
+_UPDATE_CPF = (
+    update(suppliers)
+    .where(suppliers.c.supplier_id == bindparam("b_supplier_id"))
+    .where(suppliers.c.encrypted_cpf == bindparam("b_old_cpf"))
+    .values(encrypted_cpf=bindparam("b_new_cpf"))
+)
+
+
+class CpfReencryptionJob:
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int = 500,
+        rows_per_second: Optional[float] = None,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.rows_per_second = rows_per_second
+
+    def _total(self, after_id: int) -> int:
+        return self.db.scalar(
+            select(func.count())
+            .select_from(suppliers)
+            .where(suppliers.c.supplier_id > after_id)
+            .where(suppliers.c.encrypted_cpf.is_not(None))
+        )
+
+    def _next_batch(self, after_id: int):
+        return self.db.execute(
+            select(suppliers.c.supplier_id, suppliers.c.encrypted_cpf)
+            .where(suppliers.c.supplier_id > after_id)
+            .where(suppliers.c.encrypted_cpf.is_not(None))
+            .order_by(suppliers.c.supplier_id)
+            .limit(self.batch_size)
+        ).all()
+
+    @staticmethod
+    def _reencrypt(keyring, primary, encrypted_cpf: str) -> Optional[str]:
+        """
+        CPF recriptografado com a chave atual, ou None se ela já o abre.
+        Levanta InvalidToken se nenhuma chave do chaveiro abre o valor.
+        """
+        token = encrypted_cpf.encode()
+        try:
+            primary.decrypt(token)
+            return None
+        except InvalidToken:
+            return keyring.rotate(token).decode()
+
+    def _batch_changes(
+        self, rows, keyring, primary, progress: Dict[str, int]
+    ) -> List[dict]:
+        """Parâmetros do UPDATE para as linhas do lote ainda com chave antiga"""
+        changes = []
+        for supplier_id, encrypted_cpf in rows:
+            try:
+                rotated = self._reencrypt(keyring, primary, encrypted_cpf)
+            except InvalidToken:
+                progress["unreadable"] += 1
+                continue
+            if rotated is not None:
+                changes.append(
+                    {
+                        "b_supplier_id": supplier_id,
+                        "b_old_cpf": encrypted_cpf,
+                        "b_new_cpf": rotated,
+                    }
+                )
+        return changes
+
+    def _throttle(self, rows: int, started: float):
+        if self.rows_per_second:
+            pause = rows / self.rows_per_second - (time.monotonic() - started)
+            if pause > 0:
+                time.sleep(pause)
+
+    def run(self, after_id: int = 0) -> Iterator[Dict[str, int]]:
+        """
+        Executa o job a partir do fornecedor seguinte a `after_id`, gerando o
+        progresso após cada lote confirmado.
+        """
+        keyring, primary = get_fernet(), get_primary_fernet()
+        progress = {
+            "total": self._total(after_id),
+            "scanned": 0,
+            "rotated": 0,
+            "unreadable": 0,
+            "last_id": after_id,
+        }
+
+        while True:
+            started = time.monotonic()
+            rows = self._next_batch(progress["last_id"])
+            if not rows:
+                break
+
+            changes = self._batch_changes(rows, keyring, primary, progress)
+            if changes:
+                self.db.execute(_UPDATE_CPF, changes)
+            self.db.commit()
+
+            progress["scanned"] += len(rows)
+            progress["rotated"] += len(changes)
+            progress["last_id"] = rows[-1].supplier_id
+            yield dict(progress)
+            self._throttle(len(rows), started)
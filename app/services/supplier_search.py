@@ -0,0 +1,138 @@
+import re
+from enum import Enum
+from typing import List, Set, Tuple
+
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.orm import Session
+
+from ..db.search import SUPPLIER_NAME_FTS
+from ..models.models import DimSupplier
+
+# Quantidade de candidatos avaliados por resultado na busca aproximada do SQLite
+FUZZY_CANDIDATES_FACTOR = 5
+
+
+class SearchMode(str, Enum):
+    prefix = "prefix"
+    substring = "substring"
+    fuzzy = "fuzzy"
+
+
+def trigrams(value: str) -> Set[str]:
+    """Extrai os trigramas de um texto seguindo as regras do pg_trgm"""
+    result = set()
+    for word in re.findall(r"\w+", value.lower()):
+        padded = f"  {word} "
+        result.update(map("".join, zip(padded, padded[1:], padded[2:])))
+    return result
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Similaridade entre dois textos (equivalente ao similarity() do pg_trgm)"""
+    ta, tb = trigrams(a or ""), trigrams(b or "")
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def _like_pattern(value: str, mode: SearchMode) -> str:
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%" if mode == SearchMode.prefix else f"%{escaped}%"
+
+
+def _fts_phrase(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+class SupplierSearchService:
+    """
+    Busca de fornecedores por nome apoiada em índice de trigramas
+    (FTS5 no SQLite, pg_trgm no Postgres), evitando o full scan do
+    `ILIKE '%nome%'`.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def _uses_fts(self, name: str) -> bool:
+        # O trigram do FTS5 só indexa termos com pelo menos 3 caracteres
+        return self.dialect == "sqlite" and len(name.strip()) >= 3
+
+    def _fts_query(self, name: str, mode: SearchMode) -> str:
+        if mode != SearchMode.fuzzy:
+            return _fts_phrase(name)
+        value = name.lower()
+        grams = set(map("".join, zip(value, value[1:], value[2:])))
+        return " OR ".join(_fts_phrase(g) for g in sorted(grams))
+
+    def name_filter(self, name: str, mode: SearchMode = SearchMode.substring):
+        """Expressão de filtro reutilizável em qualquer query sobre DimSupplier"""
+        name_column = DimSupplier.supplier_name
+
+        if self._uses_fts(name):
+            ids = text(
+                f"SELECT rowid FROM {SUPPLIER_NAME_FTS} "
+                f"WHERE {SUPPLIER_NAME_FTS} MATCH :fts_query"
+            ).bindparams(fts_query=self._fts_query(name, mode))
+            clause = DimSupplier.supplier_id.in_(ids.columns(literal_column("rowid")))
+            if mode == SearchMode.prefix:
+                clause = clause & name_column.ilike(
+                    _like_pattern(name, mode), escape="\\"
+                )
+            return clause
+
+        if self.dialect == "postgresql" and mode == SearchMode.fuzzy:
+            return name_column.op("%")(name)
+
+        if mode == SearchMode.fuzzy:
+            mode = SearchMode.substring
+        return name_column.ilike(_like_pattern(name, mode), escape="\\")
+
+    def search(
+        self, name: str, mode: SearchMode = SearchMode.substring, limit: int = 20
+    ) -> List[Tuple[DimSupplier, float]]:
+        """Retorna os fornecedores encontrados ordenados por relevância"""
+        name_column = DimSupplier.supplier_name
+
+        if mode == SearchMode.fuzzy:
+            query = self.db.query(DimSupplier)
+            if self._uses_fts(name):
+                # Pré-seleciona candidatos pelo bm25 e reordena pela mesma
+                # métrica do pg_trgm para manter o score consistente
+                candidates = self.db.execute(
+                    text(
+                        f"SELECT rowid FROM {SUPPLIER_NAME_FTS} "
+                        f"WHERE {SUPPLIER_NAME_FTS} MATCH :fts_query "
+                        "ORDER BY rank LIMIT :limit"
+                    ),
+                    {
+                        "fts_query": self._fts_query(name, mode),
+                        "limit": limit * FUZZY_CANDIDATES_FACTOR,
+                    },
+                ).scalars()
+                query = query.filter(DimSupplier.supplier_id.in_(list(candidates)))
+            elif self.dialect == "postgresql":
+                query = (
+                    query.filter(self.name_filter(name, mode))
+                    .order_by(func.similarity(name_column, name).desc())
+                    .limit(limit)
+                )
+            else:
+                query = query.filter(self.name_filter(name, mode)).limit(
+                    limit * FUZZY_CANDIDATES_FACTOR
+                )
+            results = [(s, trigram_similarity(name, s.supplier_name)) for s in query]
+            results.sort(key=lambda r: (-r[1], r[0].supplier_id))
+            return results[:limit]
+
+        query = self.db.query(DimSupplier).filter(self.name_filter(name, mode))
+        position = (
+            func.strpos(func.lower(name_column), name.lower())
+            if self.dialect == "postgresql"
+            else func.instr(func.lower(name_column), name.lower())
+        )
+        query = query.order_by(
+            position, func.length(name_column), DimSupplier.supplier_id
+        ).limit(limit)
+        return [(s, trigram_similarity(name, s.supplier_name)) for s in query]
@@ -0,0 +1,209 @@
+"""
+Armazenamento frio das garantias antigas em arquivos Parquet.
+
+As linhas de `fact_warranties` com `repair_date` anterior ao corte são
+gravadas em arquivos Parquet comprimidos, particionados por ano/mês de
+reparo, e removidas da tabela quente. As consultas analíticas consultam o
+arquivo apenas quando o período pedido alcança datas arquivadas.
+"""
+
+import json
+import os
+import uuid
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..core.settings import settings
+from ..models.models import FactWarranties
+from ..schemas.bulk_operations import DateRangeFilter
+
+MANIFEST = "_manifest.json"
+
+# Manifestos já lidos: {caminho: ((mtime_ns, inode), data de corte)}
+_manifests: Dict[str, Tuple[Tuple[int, int], date]] = {}
+
+COLUMNS = [
+    "claim_key",
+    "vehicle_id",
+    "repair_date",
+    "client_comment",
+    "tech_comment",
+    "part_id",
+    "classifed_as",
+    "location_id",
+    "purchance_id",
+]
+
+
+def _schema(pa):
+    return pa.schema(
+        [
+            ("claim_key", pa.int64()),
+            ("vehicle_id", pa.int64()),
+            ("repair_date", pa.date32()),
+            ("client_comment", pa.string()),
+            ("tech_comment", pa.string()),
+            ("part_id", pa.int64()),
+            ("classifed_as", pa.string()),
+            ("location_id", pa.int64()),
+            ("purchance_id", pa.int64()),
+            ("repair_year", pa.int32()),
+            ("repair_month", pa.int32()),
+        ]
+    )
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise RuntimeError(
+            "O arquivamento de garantias requer o pacote pyarrow"
+        ) from exc
+    return pyarrow
+
+
+class WarrantyArchive:
+    def __init__(self, base_dir: Optional[str] = None):
+        self.root = os.path.join(base_dir or settings.ARCHIVE_DIR, "fact_warranties")
+
+    @property
+    def archived_before(self) -> Optional[date]:
+        """
+        Data de corte: garantias anteriores a ela podem estar arquivadas. O
+        manifesto só é relido quando o arquivo muda (mtime ou inode, já que ele
+        é substituído por `os.replace`).
+        """
+        path = os.path.join(self.root, MANIFEST)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_ino)
+        cached = _manifests.get(path)
+        if cached and cached[0] == version:
+            return cached[1]
+        with open(path) as manifest:
+            cutoff = date.fromisoformat(json.load(manifest)["archived_before"])
+        _manifests[path] = (version, cutoff)
+        return cutoff
+
+    def _save_manifest(self, cutoff: date):
+        path = os.path.join(self.root, MANIFEST)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as manifest:
+            json.dump({"archived_before": cutoff.isoformat()}, manifest)
+        os.replace(tmp_path, path)
+
+    def reaches(self, date_range: DateRangeFilter | None) -> bool:
+        """Indica se o período consultado inclui datas já arquivadas"""
+        archived_before = self.archived_before
+        if archived_before is None:
+            return False
+        return date_range is None or date_range.start_date < archived_before
+
+    def archive(self, db: Session, cutoff: date, batch_size: int = 50_000) -> int:
+        """
+        Move as garantias com repair_date < cutoff para o arquivo Parquet.
+        Cada lote é removido da tabela quente na mesma transação em que o
+        arquivo é gravado; se o commit falhar, os arquivos do lote são apagados.
+        """
+        pa = _pyarrow()
+        os.makedirs(self.root, exist_ok=True)
+        columns = [getattr(FactWarranties, name) for name in COLUMNS]
+        archived = 0
+        last_key = None
+
+        while True:
+            query = db.query(*columns).filter(FactWarranties.repair_date < cutoff)
+            if last_key is not None:
+                query = query.filter(FactWarranties.claim_key > last_key)
+            rows = query.order_by(FactWarranties.claim_key).limit(batch_size).all()
+            if not rows:
+                break
+
+            keys = [row.claim_key for row in rows]
+            batch = pa.table(
+                {
+                    **{name: [getattr(r, name) for r in rows] for name in COLUMNS},
+                    "repair_year": [r.repair_date.year for r in rows],
+                    "repair_month": [r.repair_date.month for r in rows],
+                },
+                schema=_schema(pa),
+            )
+            written: List[str] = []
+            try:
+                db.query(FactWarranties).filter(
+                    FactWarranties.claim_key.in_(keys)
+                ).delete(synchronize_session=False)
+                pa.parquet.write_to_dataset(
+                    batch,
+                    self.root,
+                    partition_cols=["repair_year", "repair_month"],
+                    compression="zstd",
+                    basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                    file_visitor=lambda f: written.append(f.path),
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                for path in written:
+                    os.remove(path)
+                raise
+
+            archived += len(rows)
+            last_key = keys[-1]
+
+        if self.archived_before is None or cutoff > self.archived_before:
+            self._save_manifest(cutoff)
+        return archived
+
+    def group_counts(
+        self, columns: Sequence[str], date_range: DateRangeFilter | None = None
+    ) -> List[Tuple]:
+        """
+        Conta as garantias arquivadas agrupadas por `columns`, dentro do período.
+        Retorna tuplas (*valores, contagem).
+        """
+        if self.archived_before is None:
+            return []
+        pa = _pyarrow()
+        dataset = pa.dataset.dataset(self.root, format="parquet", partitioning="hive")
+        expression = None
+        if date_range:
+            field = pa.dataset.field("repair_date")
+            expression = (field >= pa.scalar(date_range.start_date)) & (
+                field <= pa.scalar(date_range.end_date)
+            )
+        table = dataset.to_table(columns=[*columns, "claim_key"], filter=expression)
+        grouped = table.group_by(list(columns)).aggregate([("claim_key", "count")])
+        values = [grouped.column(name).to_pylist() for name in columns]
+        counts = grouped.column("claim_key_count").to_pylist()
+        return list(zip(*values, counts))
+
+
+def merge_group_counts(
+    rows: Iterable[Tuple], key_size: int
+) -> Dict[Tuple, Tuple[int, ...]]:
+    """
+    Combina linhas (*chave, *valores_distintos, contagem) vindas da tabela
+    quente e do arquivo em {chave: (contagem_total, *contagens_distintas)}.
+    Valores nulos não entram nas contagens distintas, como em COUNT(DISTINCT).
+    """
+    groups: Dict[Tuple, list] = {}
+    for row in rows:
+        key = tuple(row[:key_size])
+        distinct_values = row[key_size:-1]
+        entry = groups.setdefault(key, [0] + [set() for _ in distinct_values])
+        entry[0] += row[-1]
+        for values, value in zip(entry[1:], distinct_values):
+            if value is not None:
+                values.add(value)
+    return {
+        key: (entry[0], *(len(values) for values in entry[1:]))
+        for key, entry in groups.items()
+    }
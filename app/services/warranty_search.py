@@ -0,0 +1,153 @@
+import re
+from datetime import date
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import column, func, literal_column, or_, select, table
+from sqlalchemy.orm import Session
+
+from ..core.pagination import decode_cursor, encode_cursor
+from ..db.search import (
+    WARRANTY_COMMENTS_FTS,
+    WARRANTY_COMMENTS_TS_CONFIG,
+    WARRANTY_COMMENTS_TSVECTOR,
+)
+from ..models.models import DimVehicle, FactWarranties
+
+_TOKEN = re.compile(r'-?"[^"]*"?|\S+')
+
+
+def websearch_to_fts5(query: str) -> str:
+    """
+    Converte a sintaxe de busca web (a mesma do websearch_to_tsquery do
+    Postgres) para a sintaxe de consulta do FTS5:
+    termos separados por espaço (E), "frase exata", OR e -exclusão.
+    """
+    positives: List[str] = []
+    negatives: List[str] = []
+    pending_or = False
+
+    for token in _TOKEN.findall(query):
+        if token.upper() == "OR":
+            pending_or = bool(positives)
+            continue
+
+        negated = token.startswith("-") and len(token) > 1
+        term = token[1:] if negated else token
+        term = term.strip('"').replace('"', '""').strip()
+        # Tokens sem letras ou dígitos (ex.: um "-" solto) não viram termos,
+        # como no websearch_to_tsquery, em vez de uma frase que nunca casa
+        if not any(char.isalnum() for char in term):
+            continue
+        phrase = f'"{term}"'
+
+        if negated:
+            negatives.append(phrase)
+        elif pending_or:
+            positives.append(f"OR {phrase}")
+        elif positives:
+            positives.append(f"AND {phrase}")
+        else:
+            positives.append(phrase)
+        pending_or = False
+
+    if not positives:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A consulta precisa de ao menos um termo a ser buscado",
+        )
+
+    expression = " ".join(positives)
+    if negatives:
+        expression = f"({expression})" + "".join(f" NOT {n}" for n in negatives)
+    return expression
+
+
+class WarrantySearchService:
+    """
+    Busca textual nos comentários do cliente e do técnico usando índice
+    invertido (FTS5 no SQLite, tsvector + GIN no Postgres).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def _ranked_query(self, q: str):
+        if self.dialect == "sqlite":
+            fts = table(WARRANTY_COMMENTS_FTS, column("rowid"))
+            # bm25 retorna valores menores para documentos mais relevantes
+            matches = (
+                select(
+                    fts.c.rowid.label("claim_key"),
+                    func.bm25(literal_column(WARRANTY_COMMENTS_FTS)).label("rank"),
+                )
+                .where(
+                    literal_column(WARRANTY_COMMENTS_FTS).op("MATCH")(
+                        websearch_to_fts5(q)
+                    )
+                )
+                .subquery()
+            )
+            query = self.db.query(FactWarranties, matches.c.rank).join(
+                matches, FactWarranties.claim_key == matches.c.claim_key
+            )
+            return query, matches.c.rank
+
+        if self.dialect == "postgresql":
+            document = literal_column(WARRANTY_COMMENTS_TSVECTOR)
+            tsquery = func.websearch_to_tsquery(WARRANTY_COMMENTS_TS_CONFIG, q)
+            rank = -func.ts_rank(document, tsquery)
+            query = self.db.query(FactWarranties, rank.label("rank")).filter(
+                document.op("@@")(tsquery)
+            )
+            return query, rank
+
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Busca textual não suportada neste banco de dados",
+        )
+
+    def search(
+        self,
+        q: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        part_id: Optional[int] = None,
+        model: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+    ):
+        """
+        Retorna as garantias que casam com a consulta, da mais para a menos
+        relevante, paginadas por cursor sobre (relevância, claim_key).
+        """
+        query, rank = self._ranked_query(q)
+
+        if start_date and end_date:
+            query = query.filter(
+                FactWarranties.repair_date.between(start_date, end_date)
+            )
+        if part_id:
+            query = query.filter(FactWarranties.part_id == part_id)
+        if model:
+            query = query.join(
+                DimVehicle, DimVehicle.vehicle_id == FactWarranties.vehicle_id
+            ).filter(DimVehicle.model == model)
+
+        if cursor:
+            last_rank, last_key = decode_cursor(cursor, (float, int))
+            query = query.filter(
+                or_(
+                    rank > last_rank,
+                    (rank == last_rank) & (FactWarranties.claim_key > last_key),
+                )
+            )
+
+        rows = query.order_by(rank, FactWarranties.claim_key).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor((last.rank, last[0].claim_key))
+        return rows, next_cursor
@@ -0,0 +1,49 @@
+"""
+Custo da autenticação por requisição: resolução do usuário a cada chamada
+(consulta ao banco) contra o cache de usuários resolvidos.
+
+Mede a dependência `get_current_user` diretamente; pelo TestClient o custo
+fica encoberto pela troca de threads do próprio cliente.
+
+Uso:
+    python -m benchmarks.auth_overhead --requests 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.security import get_current_user, user_cache
+from app.core.settings import settings
+
+from .common import make_client
+
+
+async def resolve(token, db, requests):
+    for _ in range(requests):
+        await get_current_user(token, db)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    _, SessionLocal, headers = make_client()
+    token = headers["Authorization"].split()[1]
+
+    print(f"{args.requests} resoluções de usuário")
+    with SessionLocal() as db:
+        for name, ttl in (("sem cache", 0), ("com cache", 60)):
+            settings.USER_CACHE_TTL_SECONDS = ttl
+            user_cache.clear()
+            asyncio.run(resolve(token, db, 1))
+
+            start = time.perf_counter()
+            asyncio.run(resolve(token, db, args.requests))
+            elapsed = (time.perf_counter() - start) / args.requests * 1e6
+            print(f"  {name:<10} {elapsed:8.1f} µs/resolução")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Carga em massa de garantias por formato do corpo: tempo de leitura e
+validação (parse) e de inserção, cada formato num banco SQLite novo.
+
+"json (antes)" reproduz o caminho anterior (json.loads + validação do
+pydantic a partir de objetos Python + entidades ORM).
+
+Uso:
+    python -m benchmarks.bulk_ingest --rows 200000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core.columnar import (
+    ARROW_STREAM,
+    MSGPACK,
+    PARQUET,
+    ColumnarRows,
+    read_table,
+    validate_table,
+)
+from app.db.database import Base
+from app.models.models import FactWarranties
+from app.schemas.base import WarrantyBase
+from app.schemas.bulk_operations import BulkCreateWarranty
+from app.services.bulk_operations import BulkOperationsService
+
+
+def make_columns(count: int):
+    start = date(2024, 1, 1)
+    return {
+        "vehicle_id": [i % 5000 for i in range(count)],
+        "repair_date": [
+            (start + timedelta(days=i % 365)).isoformat() for i in range(count)
+        ],
+        "client_comment": [f"Ruído na suspensão traseira {i}" for i in range(count)],
+        "tech_comment": ["Amortecedor substituído"] * count,
+        "part_id": [i % 800 for i in range(count)],
+        "classifed_as": ["MECANICO" if i % 3 else "ELETRICO" for i in range(count)],
+        "location_id": [i % 40 for i in range(count)],
+        "purchance_id": list(range(count)),
+    }
+
+
+def encode_bodies(columns):
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    bodies = {"json": json.dumps({"warranties": rows}).encode()}
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        return bodies
+
+    table = pyarrow.table(columns)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    bodies[ARROW_STREAM] = sink.getvalue().to_pybytes()
+    sink = pyarrow.BufferOutputStream()
+    pyarrow.parquet.write_table(table, sink)
+    bodies[PARQUET] = sink.getvalue().to_pybytes()
+    try:
+        import msgpack
+
+        bodies[MSGPACK] = msgpack.packb({"warranties": columns})
+    except ImportError:
+        pass
+    return bodies
+
+
+def parse(body: bytes, content_type: str):
+    if content_type == "json (antes)":
+        return BulkCreateWarranty.model_validate(json.loads(body))
+    if content_type == "json":
+        return BulkCreateWarranty.model_validate_json(body)
+    table = read_table(body, content_type, "warranties")
+    return ColumnarRows(validate_table(table, WarrantyBase, "warranties"))
+
+
+async def insert(service: BulkOperationsService, payload):
+    if isinstance(payload, ColumnarRows):
+        return await service.bulk_insert_rows(FactWarranties, payload.to_rows())
+    return await service.bulk_create_warranties(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    bodies = encode_bodies(make_columns(args.rows))
+    cases = [("json (antes)", bodies["json"])] + list(bodies.items())
+
+    print(f"carga de {args.rows} garantias")
+    for content_type, body in cases:
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            start = time.perf_counter()
+            payload = parse(body, content_type)
+            parsed = time.perf_counter()
+            asyncio.run(insert(BulkOperationsService(db), payload))
+            inserted = time.perf_counter()
+        engine.dispose()
+        print(
+            f"  {content_type:<36} {len(body) / 1024 / 1024:7.1f} MiB"
+            f"  parse {parsed - start:6.2f} s  inserção {inserted - parsed:6.2f} s"
+            f"  total {inserted - start:6.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
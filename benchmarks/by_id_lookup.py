@@ -0,0 +1,85 @@
+"""
+Microbenchmark das consultas por ID: CPU por chamada com a query ORM
+reconstruída a cada requisição contra o statement pré-construído.
+
+Uso:
+    python -m benchmarks.by_id_lookup --iterations 20000
+"""
+
+import argparse
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.db.statements import (
+    SUPPLIER_BY_ID,
+    TRANSACTION_BY_ID,
+    USER_BY_USERNAME,
+    statement_cache_stats,
+)
+from app.models.auth import User
+from app.models.models import DimPurchances, DimSupplier
+
+
+def cpu_per_call(fn, iterations: int) -> float:
+    start = time.process_time()
+    for i in range(iterations):
+        fn(i % 100 + 1)
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as db:
+        db.add_all(
+            [DimSupplier(supplier_name=f"Fornecedor {i}") for i in range(100)]
+            + [DimPurchances(purchance_type="COMPRA") for _ in range(100)]
+            + [User(username=f"user{i}", email=f"u{i}@x.com") for i in range(1, 101)]
+        )
+        db.commit()
+
+        cases = {
+            "supplier": (
+                lambda i: db.query(DimSupplier)
+                .filter(DimSupplier.supplier_id == i)
+                .first(),
+                lambda i: db.scalars(SUPPLIER_BY_ID, {"supplier_id": i}).first(),
+            ),
+            "transaction": (
+                lambda i: db.query(DimPurchances)
+                .filter(DimPurchances.purchance_id == i)
+                .first(),
+                lambda i: db.scalars(TRANSACTION_BY_ID, {"purchance_id": i}).first(),
+            ),
+            "user": (
+                lambda i: db.query(User).filter(User.username == f"user{i}").first(),
+                lambda i: db.scalars(
+                    USER_BY_USERNAME, {"username": f"user{i}"}
+                ).first(),
+            ),
+        }
+
+        print(f"{'consulta':<12} {'query ORM':>12} {'statement':>12}  (µs CPU/chamada)")
+        for name, (before, after) in cases.items():
+            print(
+                f"{name:<12} {cpu_per_call(before, args.iterations):12.1f} "
+                f"{cpu_per_call(after, args.iterations):12.1f}"
+            )
+    print("cache de compilação:", statement_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
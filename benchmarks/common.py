@@ -0,0 +1,39 @@
+"""Infraestrutura compartilhada pelos benchmarks: app com banco em memória"""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.security import create_access_token
+from app.db.database import Base, get_db
+from app.main import app
+from app.models.auth import User
+
+USERNAME = "bench"
+
+
+def make_client():
+    """Retorna (client, SessionLocal, headers) com um usuário autenticado"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+
+    with SessionLocal() as db:
+        db.add(User(username=USERNAME, email="bench@example.com", is_active=True))
+        db.commit()
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': USERNAME})}"}
+    return TestClient(app), SessionLocal, headers
@@ -0,0 +1,49 @@
+"""
+Bytes economizados e custo de CPU de cada algoritmo/nível de compressão
+sobre uma resposta JSON típica de listagem.
+
+Uso:
+    python -m benchmarks.compression --rows 20000
+"""
+
+import argparse
+import time
+
+from app.core.compression import available_encodings
+from app.core.responses import FastJSONResponse
+from app.core.settings import CompressionLevels
+
+from .json_serialization import make_rows
+
+LEVELS = {
+    "gzip": [1, 5, 6, 9],
+    "br": [1, 4, 6, 11],
+    "zstd": [1, 3, 6, 19],
+}
+FIELD = {"gzip": "gzip", "br": "brotli", "zstd": "zstd"}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    payload = FastJSONResponse(make_rows(args.rows)).body
+    print(f"payload de {len(payload) / 1024 / 1024:.2f} MiB ({args.rows} linhas)")
+    for encoding, compressor_class in available_encodings().items():
+        for level in LEVELS[encoding]:
+            compressor = compressor_class(CompressionLevels(**{FIELD[encoding]: level}))
+            start = time.thread_time()
+            compressed = compressor.compress(payload) + compressor.finish()
+            cpu = time.thread_time() - start
+            print(
+                f"  {encoding:<5} nível {level:>2}  "
+                f"{len(compressed) / 1024:9.1f} KiB  "
+                f"({len(compressed) / len(payload):6.1%})  "
+                f"{cpu * 1000:8.1f} ms CPU  "
+                f"{len(payload) / 1024 / 1024 / cpu:7.1f} MiB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
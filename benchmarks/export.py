@@ -0,0 +1,92 @@
+"""
+Vazão e memória da exportação em streaming de garantias, por formato.
+
+As garantias são gravadas num SQLite em arquivo temporário e exportadas
+pelo TableExport; a memória medida é o pico de alocações Python durante a
+exportação (deve ficar estável ao aumentar --rows).
+
+Uso:
+    python -m benchmarks.export --rows 500000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.database import Base
+from app.models.models import FactWarranties
+from app.services.export import ExportFormat, TableExport, _pyarrow
+
+
+def populate(engine, count: int):
+    with engine.begin() as conn:
+        for start in range(0, count, 50_000):
+            conn.execute(
+                insert(FactWarranties.__table__),
+                [
+                    {
+                        "claim_key": i,
+                        "vehicle_id": i % 5000,
+                        "repair_date": date(2024, 1 + i % 12, 1 + i % 28),
+                        "client_comment": f"Ruído na suspensão traseira {i}",
+                        "tech_comment": "Amortecedor substituído",
+                        "part_id": i % 800,
+                        "classifed_as": "MECANICO" if i % 3 else "ELETRICO",
+                        "location_id": i % 40,
+                        "purchance_id": i,
+                    }
+                    for i in range(start, min(start + 50_000, count))
+                ],
+            )
+
+
+def run(engine, fmt: ExportFormat):
+    """Exporta todas as garantias; retorna (segundos, bytes gerados)"""
+    statement = select(*FactWarranties.__table__.columns).order_by(
+        FactWarranties.claim_key
+    )
+    with Session(engine) as db:
+        start = time.perf_counter()
+        size = sum(len(chunk) for chunk in TableExport(db, statement).stream(fmt))
+        return time.perf_counter() - start, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'export.db')}")
+        Base.metadata.create_all(engine)
+        populate(engine, args.rows)
+
+        formats = list(ExportFormat)
+        if _pyarrow() is None:
+            formats = [ExportFormat.csv, ExportFormat.ndjson]
+
+        print(f"exportação de {args.rows} garantias")
+        for fmt in formats:
+            elapsed, size = run(engine, fmt)
+            # Segunda execução só para medir o pico de memória (tracemalloc
+            # deixa a exportação várias vezes mais lenta)
+            tracemalloc.start()
+            run(engine, fmt)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            mib = size / 1024 / 1024
+            print(
+                f"  {fmt.value:<8} {elapsed:6.2f} s  {args.rows / elapsed:9,.0f} linhas/s"
+                f"  {mib:7.1f} MiB  {mib / elapsed:6.1f} MiB/s"
+                f"  pico {peak / 1024 / 1024:5.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
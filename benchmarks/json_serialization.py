@@ -0,0 +1,71 @@
+"""
+Serialização de respostas grandes: caminho padrão do FastAPI
+(response_model + jsonable_encoder + json) contra o FastJSONResponse.
+
+Uso:
+    python -m benchmarks.json_serialization --rows 100000
+"""
+
+import argparse
+import time
+from datetime import date
+from typing import Any, Dict, List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.responses import FastJSONResponse, orjson
+from app.core.settings import settings
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "claim_key": i,
+            "vehicle_id": i % 5000,
+            "repair_date": date(2024, 1 + i % 12, 1 + i % 28),
+            "part_id": i % 800,
+            "classifed_as": "MECANICO" if i % 3 else "ELETRICO",
+            "location_id": i % 40,
+            "purchance_id": i,
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    app = FastAPI()
+
+    @app.get("/default", response_model=List[Dict[str, Any]])
+    async def default():
+        return rows
+
+    @app.get("/fast", response_model=List[Dict[str, Any]])
+    async def fast():
+        return FastJSONResponse(rows)
+
+    client = TestClient(app)
+    cases = [("padrão do FastAPI", "/default", True), ("fast (json)", "/fast", False)]
+    if orjson is not None:
+        cases.append(("fast (orjson)", "/fast", True))
+
+    print(f"resposta com {args.rows} linhas")
+    for name, path, fast_json in cases:
+        settings.FAST_JSON_RESPONSES = fast_json
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(path)
+            timings.append(time.perf_counter() - start)
+        size = len(response.content) / 1024 / 1024
+        print(f"  {name:<18} {min(timings) * 1000:8.1f} ms  {size:6.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
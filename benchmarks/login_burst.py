@@ -0,0 +1,108 @@
+"""
+Pico de logins: vazão do /auth/token e latência vista pelas demais rotas
+enquanto os logins estão em andamento.
+
+Compara a verificação da senha dentro do event loop (comportamento antigo)
+com o pool dedicado de hash.
+
+Uso:
+    python -m benchmarks.login_burst --logins 32
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.api import auth
+from app.core.passwords import PasswordHasher, get_crypt_context, password_hasher
+from app.main import app
+from app.models.auth import User
+
+from .common import make_client
+
+PASSWORD = "senha-do-benchmark"
+PROBE_INTERVAL = 0.005
+
+
+class InlineHasher(PasswordHasher):
+    """Executa o hash no próprio event loop, como antes do pool"""
+
+    async def _run(self, func, *args):
+        return func(*args)
+
+
+async def burst(logins: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        latencies = []
+        done = asyncio.Event()
+
+        async def probe():
+            # Mede a partir do instante em que a requisição deveria sair, para
+            # incluir o tempo em que o event loop ficou bloqueado
+            scheduled = time.perf_counter()
+            while not done.is_set():
+                await c.get("/")
+                finished = time.perf_counter()
+                latencies.append((finished - scheduled) * 1000)
+                scheduled = finished + PROBE_INTERVAL
+                await asyncio.sleep(PROBE_INTERVAL)
+
+        async def login():
+            response = await c.post(
+                "/api/v1/auth/token",
+                data={"username": "login", "password": PASSWORD},
+            )
+            assert response.status_code == 200, response.text
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+        return elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+
+    pwd_context = get_crypt_context()
+    _, SessionLocal, _ = make_client()
+    with SessionLocal() as db:
+        db.add(
+            User(
+                username="login",
+                email="login@example.com",
+                hashed_password=pwd_context.hash(PASSWORD),
+                is_active=True,
+            )
+        )
+        db.commit()
+
+    inline = InlineHasher(pwd_context, 1, args.logins)
+    print(
+        f"{args.logins} logins simultâneos (bcrypt, {password_hasher.workers} workers)"
+    )
+    for name, hasher in (("no event loop", inline), ("pool dedicado", password_hasher)):
+        auth.password_hasher = hasher
+        elapsed, latencies = asyncio.run(burst(args.logins))
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(
+            f"  {name:<14} {args.logins / elapsed:6.1f} logins/s   "
+            f"GET / durante o pico: p50 {statistics.median(latencies):7.1f} ms  "
+            f"p99 {p99:7.1f} ms  máx {latencies[-1]:7.1f} ms  "
+            f"({len(latencies)} amostras)"
+        )
+    auth.password_hasher = password_hasher
+    print(f"  estatísticas do pool: {password_hasher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
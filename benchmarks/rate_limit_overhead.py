@@ -0,0 +1,75 @@
+"""
+Custo do middleware de rate limiting por requisição, chamando a pilha ASGI
+diretamente (sem servidor nem cliente HTTP) com uma aplicação vazia.
+
+Uso:
+    python -m benchmarks.rate_limit_overhead --requests 200000
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.rate_limit import MemoryTokenBuckets, RateLimitMiddleware
+from app.core.security import create_access_token
+from app.core.settings import RateLimitRule
+
+
+async def empty_app(scope, receive, send):
+    pass
+
+
+def scope(path, method="GET", headers=()):
+    return {
+        "type": "http",
+        "path": path,
+        "method": method,
+        "headers": list(headers),
+        "client": ("127.0.0.1", 5000),
+    }
+
+
+async def run(app, request_scope, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(request_scope, None, None)
+    return (time.perf_counter() - start) / requests * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # Balde que nunca se esgota, para medir só o caminho de sucesso
+    limited = RateLimitMiddleware(
+        empty_app,
+        rules={
+            "bulk": RateLimitRule(
+                pattern=r"^/api/v1/[^/]+/bulk$", rate=1e9, burst=10**9
+            )
+        },
+        store=MemoryTokenBuckets(),
+    )
+    token = create_access_token({"sub": "bench"}).encode()
+    cases = {
+        "sem middleware": (empty_app, scope("/api/v1/suppliers/")),
+        "rota sem limite": (limited, scope("/api/v1/suppliers/")),
+        "rota limitada (IP)": (limited, scope("/api/v1/parts/bulk", "POST")),
+        "rota limitada (token)": (
+            limited,
+            scope(
+                "/api/v1/parts/bulk",
+                "POST",
+                [(b"authorization", b"Bearer " + token)],
+            ),
+        ),
+    }
+    print(f"{args.requests} chamadas ASGI")
+    for name, (app, request_scope) in cases.items():
+        elapsed = asyncio.run(run(app, request_scope, args.requests))
+        print(f"  {name:<22} {elapsed:9.0f} ns/req")
+
+
+if __name__ == "__main__":
+    main()
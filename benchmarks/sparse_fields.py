@@ -0,0 +1,72 @@
+"""
+Tamanho do payload e latência das listagens com projeção estreita
+(`fields=`) contra a entidade completa, em garantias com comentários longos.
+
+Uso:
+    python -m benchmarks.sparse_fields --rows 5000 --page-size 1000
+"""
+
+import argparse
+import statistics
+import time
+from datetime import date
+
+from sqlalchemy import insert
+
+from app.models.models import FactWarranties
+
+from .common import make_client
+
+COMMENT = "Cliente relata ruído intermitente ao frear em baixa velocidade. " * 30
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    client, SessionLocal, headers = make_client()
+    with SessionLocal() as db:
+        db.execute(
+            insert(FactWarranties),
+            [
+                {
+                    "vehicle_id": i % 50,
+                    "repair_date": date(2024, 1, 1 + i % 28),
+                    "client_comment": COMMENT,
+                    "tech_comment": COMMENT,
+                    "part_id": i % 200,
+                    "classifed_as": "MECANICO",
+                    "location_id": 1,
+                    "purchance_id": i,
+                }
+                for i in range(args.rows)
+            ],
+        )
+        db.commit()
+
+    cases = {
+        "completo": {},
+        "fields (3 colunas)": {"fields": "repair_date,part_id,classifed_as"},
+    }
+    print(f"página de {args.page_size} garantias")
+    for name, params in cases.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(
+                "/api/v1/warranties/",
+                params={**params, "limit": args.page_size},
+                headers=headers,
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+        print(
+            f"  {name:<20} {len(response.content) / 1024:10.1f} KiB "
+            f"{statistics.median(timings):8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
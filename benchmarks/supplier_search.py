@@ -0,0 +1,86 @@
+"""
+Benchmark da busca de fornecedores por nome: ILIKE '%nome%' (full scan)
+contra o índice de trigramas, nos modos prefix, substring e fuzzy.
+
+Uso:
+    python -m benchmarks.supplier_search --rows 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import string
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.db.database import Base
+from app.models.models import DimSupplier
+from app.services.supplier_search import SearchMode, SupplierSearchService
+
+SYLLABLES = ["auto", "pecas", "metal", "freios", "brasil", "sul", "norte", "tec"]
+
+
+def random_name(rng: random.Random) -> str:
+    words = [rng.choice(SYLLABLES) + rng.choice(string.ascii_lowercase) for _ in "ab"]
+    return " ".join(words).title()[:50]
+
+
+def populate(session: Session, rows: int, batch: int = 50_000):
+    rng = random.Random(42)
+    for start in range(0, rows, batch):
+        session.execute(
+            insert(DimSupplier),
+            [
+                {"supplier_name": random_name(rng), "location_id": 1}
+                for _ in range(min(batch, rows - start))
+            ],
+        )
+    session.add(
+        DimSupplier(supplier_name="Zeta Componentes Automotivos", location_id=1)
+    )
+    session.commit()
+
+
+def measure(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        populate(session, args.rows)
+        service = SupplierSearchService(session)
+        term = "componentes"
+
+        baseline = measure(
+            lambda: session.query(DimSupplier)
+            .filter(DimSupplier.supplier_name.ilike(f"%{term}%"))
+            .all(),
+            args.repeat,
+        )
+        print(f"{args.rows} fornecedores")
+        print(f"  ilike '%{term}%' (full scan): {baseline:8.2f} ms")
+        for mode in SearchMode:
+            elapsed = measure(lambda: service.search(term, mode, 20), args.repeat)
+            print(f"  {mode.value:<28}: {elapsed:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
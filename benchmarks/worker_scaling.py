@@ -0,0 +1,214 @@
+"""
+Vazão do servidor de produção conforme o número de workers.
+
+Sobe o servidor com `gunicorn.conf.py` para cada número de workers (sem o
+gunicorn instalado, cai para `uvicorn --factory --workers N`, sem preload),
+gera carga HTTP/1.1 com keep-alive a partir de vários processos e mede as
+requisições por segundo. O gerador de carga também usa CPU: com poucos
+núcleos ele disputa com os workers e o ganho de escala fica subestimado.
+
+Sem o uvloop, o event loop do asyncio só liga o TCP_NODELAY nas conexões de
+sockets criados com `proto=IPPROTO_TCP`, e o socket que o `uvicorn --workers`
+(e o gunicorn) compartilha com os workers é criado com `proto=0`: cabeçalho e
+corpo da resposta saem em segmentos separados e o segundo espera o ACK
+atrasado do cliente (~40 ms). O uvloop liga o TCP_NODELAY sempre.
+
+Uso:
+    python -m benchmarks.worker_scaling --workers 1 2 4 --duration 10
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+WARMUP_SECONDS = 1.0
+READY_TIMEOUT = 60.0
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def use_gunicorn() -> bool:
+    return all(
+        importlib.util.find_spec(name) for name in ("gunicorn", "uvicorn_worker")
+    )
+
+
+def server_command(workers: int, port: int) -> list:
+    if use_gunicorn():
+        return [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+            "--workers",
+            str(workers),
+            "--bind",
+            f"127.0.0.1:{port}",
+        ]
+    return [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "--factory",
+        "app.main:create_app",
+        "--workers",
+        str(workers),
+        "--port",
+        str(port),
+        "--backlog",
+        "2048",
+        "--timeout-keep-alive",
+        "75",
+        "--no-access-log",
+        "--log-level",
+        "warning",
+    ]
+
+
+def wait_ready(port: int, path: str):
+    deadline = time.monotonic() + READY_TIMEOUT
+    request = f"GET {path} HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n"
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1) as sock:
+                sock.sendall(request.encode())
+                if sock.recv(64).startswith(b"HTTP/1.1 200"):
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"servidor não respondeu em {READY_TIMEOUT:.0f} s")
+
+
+async def keep_alive_client(port, request, start_at, end_at, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while True:
+            sent = time.time()
+            if sent >= end_at:
+                break
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            if not head.startswith(b"HTTP/1.1 2"):
+                raise RuntimeError(head.split(b"\r\n", 1)[0].decode())
+            received = time.time()
+            # Só conta o que foi enviado depois do aquecimento e terminou na janela
+            if start_at <= sent and received <= end_at:
+                latencies.append(received - sent)
+    finally:
+        writer.close()
+
+
+def generate_load(port, path, headers, connections, start_at, end_at):
+    """Processo gerador: `connections` conexões keep-alive em um event loop"""
+    extra = "".join(f"{header}\r\n" for header in headers)
+    request = f"GET {path} HTTP/1.1\r\nHost: bench\r\n{extra}\r\n".encode()
+    latencies = []
+
+    async def run():
+        await asyncio.gather(
+            *(
+                keep_alive_client(port, request, start_at, end_at, latencies)
+                for _ in range(connections)
+            )
+        )
+
+    asyncio.run(run())
+    return latencies
+
+
+def measure(workers: int, args) -> dict:
+    port = free_port()
+    env = {**os.environ, "ACCESS_LOG": ""}
+    server = subprocess.Popen(server_command(workers, port), cwd=ROOT, env=env)
+    try:
+        wait_ready(port, args.path)
+        start_at = time.time() + WARMUP_SECONDS
+        end_at = start_at + args.duration
+        per_process = max(1, args.connections // args.load_processes)
+        with multiprocessing.Pool(args.load_processes) as pool:
+            results = pool.starmap(
+                generate_load,
+                [
+                    (port, args.path, args.header, per_process, start_at, end_at)
+                    for _ in range(args.load_processes)
+                ],
+            )
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    latencies = sorted(latency * 1000 for result in results for latency in result)
+    return {
+        "rps": len(latencies) / args.duration,
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def main():
+    cpus = available_cpus()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({n for n in (1, 2, 4, 8, 16) if n <= cpus} | {cpus}),
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--load-processes", type=int, default=max(1, cpus // 2))
+    parser.add_argument("--path", default="/")
+    parser.add_argument(
+        "--header", action="append", default=[], help='ex.: "Authorization: Bearer …"'
+    )
+    args = parser.parse_args()
+
+    if use_gunicorn():
+        server = "gunicorn + UvicornWorker (gunicorn.conf.py)"
+    else:
+        server = "uvicorn --workers (gunicorn não instalado: sem preload)"
+    if not importlib.util.find_spec("uvloop"):
+        server += "; sem uvloop: com 2+ workers, ~40 ms de ACK atrasado por resposta"
+    print(
+        f"GET {args.path}: {server}, {cpus} CPUs, {args.connections} conexões "
+        f"keep-alive em {args.load_processes} processos, {args.duration:.0f} s"
+    )
+    baseline = None
+    for workers in args.workers:
+        result = measure(workers, args)
+        baseline = baseline or result["rps"]
+        print(
+            f"  {workers:>2} workers  {result['rps']:9.0f} req/s  "
+            f"({result['rps'] / baseline:4.2f}x)  "
+            f"p50 {result['p50']:6.1f} ms  p99 {result['p99']:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Configuração do servidor de produção: `gunicorn -c gunicorn.conf.py`.
+
+Um processo mestre com `WEB_CONCURRENCY` workers uvicorn, com uvloop e httptools
+quando instalados. Sessões, revogações, ETags, idempotência, limites de
+requisição e o cache de usuários só são compartilhados entre os workers via
+Redis: sem `REDIS_URL` o padrão é um único worker; com ele, um por CPU
+disponível para o contêiner, até `MAX_DEFAULT_WORKERS`.
+O código da aplicação é carregado no mestre antes do fork (`preload_app`) e
+compartilhado pelos workers em copy-on-write; o engine, as conexões e os
+caches são criados em cada worker no primeiro uso. No SIGTERM os workers
+deixam de aceitar conexões e terminam as requisições em andamento, inclusive
+cargas em massa longas, por até `GRACEFUL_TIMEOUT` segundos.
+"""
+
+import gc
+import os
+
+from app.core.settings import settings
+
+# Acima disso o ganho some e sobra disputa de CPU e conexões com o banco
+MAX_DEFAULT_WORKERS = 4
+
+
+def _available_cpus() -> int:
+    """CPUs que o processo pode usar (respeita o cpuset do contêiner)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS
+        return os.cpu_count() or 1
+
+
+def _default_workers() -> int:
+    """Um worker por CPU, limitado, e só com o estado compartilhado no Redis"""
+    if not settings.REDIS_URL:
+        return 1
+    return min(_available_cpus(), MAX_DEFAULT_WORKERS)
+
+
+wsgi_app = "app.main:create_app()"
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY") or _default_workers())
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+# Conexões aguardando accept (o kernel também limita por net.core.somaxconn)
+backlog = int(os.getenv("BACKLOG", 2048))
+
+# Keep-alive acima do idle timeout dos balanceadores (60 s em geral): quem fecha
+# a conexão ociosa é o balanceador, e não o servidor durante um novo envio
+keepalive = int(os.getenv("KEEPALIVE", 75))
+
+# Workers assíncronos só são reiniciados se o event loop travar pelo timeout todo
+timeout = int(os.getenv("TIMEOUT", 60))
+
+# Prazo para terminar as requisições em andamento no desligamento
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 120))
+
+preload_app = True
+# Log de acesso na saída padrão; ACCESS_LOG= (vazio) desativa
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+
+
+def when_ready(server):
+    # Os objetos carregados no mestre vão para a geração permanente do GC, para
+    # que as coletas nos workers não escrevam nas páginas compartilhadas
+    gc.collect()
+    gc.freeze()
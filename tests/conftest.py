@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 from datetime import datetime
 
 import pytest
@@ -6,12 +7,24 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app.core.security import get_password_hash
+from app.core.idempotency import idempotency_cache
+from app.core.rate_limit import token_buckets
+from app.core.security import get_password_hash, revoked_tokens, user_cache
+from app.core.sessions import sessions
+from app.core.settings import settings
 from app.db.database import Base, get_db
-from app.main import app
+from app.db.query_counter import capture_queries
+from app.main import create_app
 from app.models.auth import User
 from app.models.models import DimSupplier
 
+# Os routers opcionais, desativados por padrão, também são testados
+settings.METRICS_ENABLED = True
+settings.DIAGNOSTICS_ENABLED = True
+# Os testes rodam num único processo: os ETags valem com as versões em memória
+settings.CONDITIONAL_GET_IN_MEMORY = True
+app = create_app()
+
 # Criar banco de dados em memória para testes
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
@@ -45,8 +58,14 @@ def db():
         print(f"Erro durante o teste: {e}")
     finally:
         db.close()
-        # Limpar as tabelas após os testes
+        # Limpar as tabelas, os caches de autenticação, os limites e as chaves de
+        # idempotência após os testes
         Base.metadata.drop_all(bind=engine)
+        user_cache.clear()
+        revoked_tokens.clear()
+        sessions.cache.clear()
+        token_buckets.clear()
+        idempotency_cache.clear()
 
 
 @pytest.fixture
@@ -110,3 +129,28 @@ def test_supplier(db: Session):
     except Exception as e:
         print(f"Erro durante o teste: {e}")
         db.rollback()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fixture que limita os statements SQL de um bloco:
+
+        with query_budget(3):
+            client.get("/api/v1/suppliers/1", headers=auth_headers)
+
+    Falha se o bloco executar mais de `max_queries` statements ou repetir um
+    mesmo statement `max_repeats` vezes ou mais (N+1).
+    """
+
+    @contextmanager
+    def budget(max_queries: int, max_repeats: int = settings.QUERY_REPEAT_THRESHOLD):
+        with capture_queries(engine) as log:
+            yield log
+        shapes = "\n".join(f"{count}x {shape}" for shape, count in log.shapes().items())
+        assert (
+            log.count <= max_queries
+        ), f"{log.count} statements, orçamento de {max_queries}:\n{shapes}"
+        assert not log.repeated(max_repeats), f"possível N+1:\n{shapes}"
+
+    return budget
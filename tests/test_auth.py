@@ -0,0 +1,225 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from jose import jwt
+from passlib.context import CryptContext
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.cache import MemoryCache, purge_expired_entries
+from app.core.passwords import get_crypt_context
+from app.core.security import password_hasher
+from app.core.sessions import SessionStore
+from app.core.settings import settings
+from app.models.auth import User
+
+
+def test_register_and_login(client: TestClient):
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": "novo@example.com",
+            "username": "novo",
+            "password": "senha-forte",
+        },
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        "/api/v1/auth/token", data={"username": "novo", "password": "senha-forte"}
+    )
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+
+    response = client.post(
+        "/api/v1/auth/token", data={"username": "novo", "password": "errada"}
+    )
+    assert response.status_code == 401
+
+
+def test_login_rehashes_outdated_hash(client: TestClient, db: Session):
+    """Hashes com custo menor que o configurado são regravados no login"""
+    weak_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("antiga")
+    db.add(
+        User(username="legado", email="legado@example.com", hashed_password=weak_hash)
+    )
+    db.commit()
+    pwd_context = get_crypt_context()
+    assert pwd_context.needs_update(weak_hash)
+
+    response = client.post(
+        "/api/v1/auth/token", data={"username": "legado", "password": "antiga"}
+    )
+    assert response.status_code == 200
+
+    user = db.query(User).filter(User.username == "legado").one()
+    db.refresh(user)
+    assert user.hashed_password != weak_hash
+    assert not pwd_context.needs_update(user.hashed_password)
+    assert pwd_context.verify("antiga", user.hashed_password)
+
+
+def test_login_rejected_when_hash_pool_is_saturated(client: TestClient, monkeypatch):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = client.post(
+        "/api/v1/auth/token", data={"username": "testuser", "password": "testpass"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert password_hasher.stats()["rejected"] >= 1
+
+
+def test_logout_revokes_token_immediately(client: TestClient, auth_headers):
+    assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 200
+
+    response = client.post("/api/v1/auth/logout", headers=auth_headers)
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 401
+    assert client.post("/api/v1/auth/logout", headers=auth_headers).status_code == 401
+
+
+def test_logout_keeps_other_tokens_valid(client: TestClient, auth_headers):
+    other = client.post(
+        "/api/v1/auth/token", data={"username": "testuser", "password": "testpass"}
+    ).json()["access_token"]
+
+    client.post("/api/v1/auth/logout", headers=auth_headers)
+
+    response = client.get(
+        "/api/v1/auth/me", headers={"Authorization": f"Bearer {other}"}
+    )
+    assert response.status_code == 200
+
+
+def test_token_without_jti_is_rejected(client: TestClient):
+    token = jwt.encode(
+        {"sub": "testuser", "exp": datetime.utcnow() + timedelta(minutes=5)},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+    response = client.get(
+        "/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 401
+
+
+def _login(client: TestClient) -> dict:
+    response = client.post(
+        "/api/v1/auth/token", data={"username": "testuser", "password": "testpass"}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_refresh_rotates_token(client: TestClient, db: Session, monkeypatch):
+    tokens = _login(client)
+    assert tokens["refresh_token"]
+
+    # A renovação não passa pelo hash de senha
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+    renewed = response.json()
+    assert renewed["refresh_token"] != tokens["refresh_token"]
+
+    headers = {"Authorization": f"Bearer {renewed['access_token']}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+
+def test_refresh_token_reuse_ends_session(client: TestClient):
+    tokens = _login(client)
+    renewed = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    ).json()
+
+    # O token antigo reapresentado encerra a sessão inteira
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": renewed["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_concurrent_refresh_with_same_token():
+    store = SessionStore("test_session")
+    _, refresh_token = store.create("testuser")
+    replace = store.cache.replace
+    results = []
+
+    def racing_replace(key, value, ttl):
+        # Outra renovação com o mesmo token termina entre a leitura e a troca
+        store.cache.replace = replace
+        results.append(store.rotate(refresh_token))
+        return replace(key, value, ttl)
+
+    store.cache.replace = racing_replace
+    with pytest.raises(HTTPException) as error:
+        store.rotate(refresh_token)
+
+    assert error.value.status_code == 401
+    # Só uma renovação vale, e o reuso encerrou a sessão
+    assert len(results) == 1
+    with pytest.raises(HTTPException):
+        store.rotate(results[0][2])
+
+
+def test_logout_ends_session(client: TestClient):
+    tokens = _login(client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.post("/api/v1/auth/logout", headers=headers).status_code == 200
+
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_expired_sessions_are_evicted(monkeypatch):
+    store = SessionStore("test_session")
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_EXPIRE_DAYS", -1)
+    store.create("testuser")
+
+    assert purge_expired_entries() >= 1
+    assert store.cache._data == {}
+
+
+class RemoteMemoryCache(MemoryCache):
+    """Cache em memória tratado como remoto; anota onde cada leitura rodou"""
+
+    remote = True
+
+    def __init__(self, namespace: str):
+        super().__init__(namespace)
+        self.on_event_loop = []
+
+    def get(self, key):
+        try:
+            asyncio.get_running_loop()
+            self.on_event_loop.append(True)
+        except RuntimeError:
+            self.on_event_loop.append(False)
+        return super().get(key)
+
+
+def test_remote_cache_calls_leave_the_event_loop(
+    client: TestClient, auth_headers, monkeypatch
+):
+    users, revoked = RemoteMemoryCache("user"), RemoteMemoryCache("revoked_token")
+    monkeypatch.setattr(security, "user_cache", users)
+    monkeypatch.setattr(security, "revoked_tokens", revoked)
+
+    for _ in range(2):
+        response = client.get("/api/v1/auth/me", headers=auth_headers)
+        assert response.status_code == 200
+
+    assert users.on_event_loop == revoked.on_event_loop == [False, False]
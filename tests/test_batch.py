@@ -0,0 +1,148 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.models.models import DimParts, DimPurchances, DimSupplier
+
+
+def create_data(db: Session):
+    supplier = DimSupplier(supplier_name="Fornecedor Batch", location_id=1)
+    part = DimParts(part_name="Peça Batch", supplier=supplier)
+    purchance = DimPurchances(
+        purchance_type="COMPRA", purchance_date=date(2024, 1, 1), part=part
+    )
+    db.add(purchance)
+    db.commit()
+    return supplier, purchance
+
+
+def test_batch_multiplexes_reads(
+    client: TestClient, auth_headers: dict, db: Session, monkeypatch
+):
+    supplier, purchance = create_data(db)
+    decoded = []
+    original = security.decode_access_token
+    monkeypatch.setattr(
+        security, "decode_access_token", lambda t: decoded.append(t) or original(t)
+    )
+
+    response = client.post(
+        "/api/v1/batch",
+        headers=auth_headers,
+        json={
+            "requests": [
+                {
+                    "id": "fornecedor",
+                    "path": f"/api/v1/suppliers/{supplier.supplier_id}",
+                },
+                {
+                    "id": "transacao",
+                    "path": f"/api/v1/transactions/{purchance.purchance_id}"
+                    "?expand=part",
+                },
+                {"id": "analytics", "path": "/api/v1/analytics/transactions"},
+                {"id": "inexistente", "path": "/api/v1/suppliers/999999"},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    results = {r["id"]: r for r in response.json()["responses"]}
+    assert list(results) == ["fornecedor", "transacao", "analytics", "inexistente"]
+    assert results["fornecedor"]["body"]["supplier_name"] == "Fornecedor Batch"
+    assert results["transacao"]["body"]["part"]["part_name"] == "Peça Batch"
+    assert results["analytics"]["body"]["transactions"][0]["count"] == 1
+    assert results["inexistente"]["status"] == 404
+    assert results["fornecedor"]["headers"]["etag"]
+
+    # O token é validado uma única vez para todo o batch
+    assert len(decoded) == 1
+
+
+def test_batch_sub_request_conditional_get(client: TestClient, auth_headers: dict):
+    url = "/api/v1/analytics/transactions"
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+
+    response = client.post(
+        "/api/v1/batch",
+        headers=auth_headers,
+        json={"requests": [{"path": url, "headers": {"If-None-Match": etag}}]},
+    )
+    assert response.json()["responses"][0]["status"] == 304
+
+
+def test_batch_rejects_invalid_requests(client: TestClient, auth_headers: dict):
+    for path in ["/docs", "/api/v1/batch"]:
+        response = client.post(
+            "/api/v1/batch", headers=auth_headers, json={"requests": [{"path": path}]}
+        )
+        assert response.status_code == 422
+
+    response = client.post(
+        "/api/v1/batch",
+        headers=auth_headers,
+        json={"requests": [{"method": "DELETE", "path": "/api/v1/suppliers/1"}]},
+    )
+    assert response.status_code == 422
+
+    response = client.post(
+        "/api/v1/batch", json={"requests": [{"path": "/api/v1/suppliers/"}]}
+    )
+    assert response.status_code == 401
+
+
+def test_batch_failed_sub_request_does_not_break_siblings(
+    client: TestClient, auth_headers: dict, db: Session, monkeypatch
+):
+    from app.db.database import get_db
+    from app.services.bulk_operations import BulkOperationsService
+
+    from .conftest import app
+
+    supplier, _ = create_data(db)
+    # Como o get_db da aplicação no batch, sem fechar a sessão a cada sub-requisição
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+
+    async def failing_flush(self, *args, **kwargs):
+        # Deixa a sessão compartilhada à espera de um rollback
+        self.db.add(DimSupplier(supplier_id=supplier.supplier_id))
+        self.db.flush()
+
+    monkeypatch.setattr(
+        BulkOperationsService, "get_transaction_analytics", failing_flush
+    )
+
+    response = client.post(
+        "/api/v1/batch",
+        headers=auth_headers,
+        json={
+            "requests": [
+                {"id": "falha", "path": "/api/v1/analytics/transactions"},
+                {"id": "ok", "path": f"/api/v1/suppliers/{supplier.supplier_id}"},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    falha, ok = response.json()["responses"]
+    assert falha["status"] == 500
+    assert ok["status"] == 200
+    assert ok["body"]["supplier_name"] == "Fornecedor Batch"
+
+
+def test_batch_sub_requests_do_not_inherit_the_batch_route(
+    client: TestClient, auth_headers: dict
+):
+    from app.core.metrics import REQUEST_LATENCY, clear_metrics
+
+    clear_metrics()
+    client.post(
+        "/api/v1/batch",
+        headers=auth_headers,
+        json={"requests": [{"path": "/api/v1/rota-inexistente"}]},
+    )
+
+    routes = {labels[1] for labels in REQUEST_LATENCY._values}
+    assert routes == {"/api/v1/batch", "<unmatched>"}
@@ -0,0 +1,155 @@
+import asyncio
+import gzip
+import json
+import zlib
+
+import brotli
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import (
+    CompressionMiddleware,
+    _CompressingSender,
+    available_encodings,
+    compression_stats,
+    negotiate,
+)
+from app.core.settings import settings
+
+LARGE = [{"claim_key": i, "classifed_as": "MECANICO"} for i in range(2000)]
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, groups={})
+
+    @app.get("/large")
+    async def large():
+        return LARGE
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(1000):
+                yield f'{{"line": {i}}}\n'
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/binary")
+    async def binary():
+        return StreamingResponse(
+            iter([b"\0" * 4096]), media_type="application/x-parquet"
+        )
+
+    return TestClient(app)
+
+
+def test_negotiate_prefers_highest_q():
+    encodings = ["zstd", "br", "gzip"]
+    assert negotiate("gzip, br;q=0.5", encodings) == "gzip"
+    assert negotiate("gzip;q=0.5, zstd", encodings) == "zstd"
+    assert negotiate("gzip;q=0, identity", encodings) is None
+    assert negotiate("*", encodings) == "zstd"
+
+
+def test_large_response_is_gzipped():
+    client = make_client()
+    before = compression_stats()["gzip"]["bytes_saved"]
+
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json() == LARGE
+    assert compression_stats()["gzip"]["bytes_saved"] > before
+
+
+def test_brotli_and_zstd_are_negotiated():
+    client = make_client()
+    decoders = {
+        "br": brotli.decompress,
+        "zstd": zstandard.ZstdDecompressor().decompressobj().decompress,
+    }
+
+    for encoding, decompress in decoders.items():
+        with client.stream(
+            "GET", "/large", headers={"Accept-Encoding": f"{encoding}, gzip;q=0.5"}
+        ) as response:
+            assert response.headers["content-encoding"] == encoding
+            body = b"".join(response.iter_raw())
+        assert json.loads(decompress(body)) == LARGE
+
+
+def test_small_or_refused_responses_are_not_compressed():
+    client = make_client()
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == LARGE
+
+
+def test_streaming_response_is_compressed_incrementally():
+    client = make_client()
+
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as r:
+        assert r.headers["content-encoding"] == "gzip"
+        assert "content-length" not in r.headers
+        raw = b"".join(r.iter_raw())
+
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert lines[0] == '{"line": 0}' and len(lines) == 1000
+
+
+def test_each_streamed_chunk_is_flushed():
+    decoders = {
+        "gzip": zlib.decompressobj(31).decompress,
+        "br": brotli.Decompressor().process,
+        "zstd": zstandard.ZstdDecompressor().decompressobj().decompress,
+    }
+    chunks = [f'{{"line": {i}}}\n'.encode() * 50 for i in range(3)]
+
+    for encoding, decompress in decoders.items():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        sender = _CompressingSender(
+            send,
+            encoding,
+            lambda: available_encodings()[encoding](settings.COMPRESSION_LEVELS),
+            minimum_size=0,
+        )
+
+        async def stream():
+            await sender.send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")],
+                }
+            )
+            for chunk in chunks:
+                await sender.send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+                # O bloco já chegou ao cliente inteiro, antes do fim da resposta
+                assert decompress(sent[-1]["body"]) == chunk, encoding
+
+        asyncio.run(stream())
+
+
+def test_already_compressed_types_pass_through():
+    client = make_client()
+    response = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
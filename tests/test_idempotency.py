@@ -0,0 +1,172 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.cache import MemoryCache
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.settings import settings
+from app.models.models import DimSupplier, FactWarranties
+
+
+class RemoteMemoryCache(MemoryCache):
+    """Cache em memória acessado como remoto (pelo threadpool, como o Redis)"""
+
+    remote = True
+
+
+def make_app(cache_class=MemoryCache):
+    calls = []
+    app = FastAPI()
+    app.add_middleware(
+        IdempotencyMiddleware,
+        pattern=r"^/api/v1/[^/]+/(bulk)?$",
+        cache=cache_class("idempotency-test"),
+    )
+
+    @app.post("/api/v1/items/bulk")
+    async def bulk(payload: dict):
+        calls.append(payload)
+        await asyncio.sleep(0.2)
+        return {"created": len(calls)}
+
+    @app.post("/api/v1/items/")
+    async def create(payload: dict):
+        calls.append(payload)
+        if len(calls) == 1:
+            return JSONResponse(status_code=503, content={"detail": "indisponível"})
+        return {"created": len(calls)}
+
+    return app, calls
+
+
+def test_create_replays_stored_response(
+    client: TestClient, auth_headers: dict, db: Session
+):
+    headers = {**auth_headers, "Idempotency-Key": "fornecedor-1"}
+    payload = {"supplier_name": "Fornecedor Idempotente", "location_id": 1}
+
+    first = client.post("/api/v1/suppliers/", json=payload, headers=headers)
+    second = client.post("/api/v1/suppliers/", json=payload, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert db.query(DimSupplier).count() == 1
+
+    # A mesma chave com outro corpo é rejeitada
+    response = client.post(
+        "/api/v1/suppliers/",
+        json={**payload, "location_id": 2},
+        headers=headers,
+    )
+    assert response.status_code == 422
+
+    # Outra chave executa de novo
+    response = client.post(
+        "/api/v1/suppliers/",
+        json=payload,
+        headers={**auth_headers, "Idempotency-Key": "fornecedor-2"},
+    )
+    assert response.json()["supplier_id"] != first.json()["supplier_id"]
+
+
+def test_bulk_retry_does_not_insert_twice(
+    client: TestClient, auth_headers: dict, db: Session
+):
+    headers = {**auth_headers, "Idempotency-Key": "carga-noturna-2024-04-01"}
+    payload = {
+        "warranties": [
+            {
+                "vehicle_id": 1,
+                "repair_date": "2024-04-01",
+                "part_id": 10,
+                "classifed_as": "MECANICO",
+                "location_id": 1,
+                "purchance_id": 1,
+            }
+        ]
+    }
+
+    first = client.post("/api/v1/warranties/bulk", json=payload, headers=headers)
+    retry = client.post("/api/v1/warranties/bulk", json=payload, headers=headers)
+
+    assert retry.json() == first.json()
+    assert db.query(FactWarranties).count() == 1
+
+    # Erros de validação também são resultados definitivos
+    invalid = {"warranties": [{"vehicle_id": 1}]}
+    headers["Idempotency-Key"] = "carga-invalida"
+    assert (
+        client.post("/api/v1/warranties/bulk", json=invalid, headers=headers)
+    ).status_code == 422
+    replay = client.post("/api/v1/warranties/bulk", json=invalid, headers=headers)
+    assert replay.status_code == 422
+    assert replay.headers["idempotent-replayed"] == "true"
+
+
+@pytest.mark.parametrize("cache_class", [MemoryCache, RemoteMemoryCache])
+def test_concurrent_duplicate_waits_for_in_flight_request(cache_class):
+    app, calls = make_app(cache_class)
+
+    async def run():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return await asyncio.gather(
+                *(
+                    client.post(
+                        "/api/v1/items/bulk",
+                        json={"item": 1},
+                        headers={"Idempotency-Key": "k1"},
+                    )
+                    for _ in range(3)
+                )
+            )
+
+    responses = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert [r.json() for r in responses] == [{"created": 1}] * 3
+    assert sum("idempotent-replayed" in r.headers for r in responses) == 2
+
+
+@pytest.mark.parametrize("cache_class", [MemoryCache, RemoteMemoryCache])
+def test_long_request_keeps_its_reservation(cache_class, monkeypatch):
+    # A rota (0,2 s) dura mais que a reserva: sem renovação, a repetição a executaria
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LOCK_SECONDS", 0.06)
+    app, calls = make_app(cache_class)
+
+    async def run():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+
+            async def post(delay):
+                await asyncio.sleep(delay)
+                return await client.post(
+                    "/api/v1/items/bulk",
+                    json={"item": 1},
+                    headers={"Idempotency-Key": "longa"},
+                )
+
+            return await asyncio.gather(post(0), post(0.15))
+
+    first, retry = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+
+
+def test_server_errors_are_not_stored():
+    app, calls = make_app()
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "k2"}
+
+    assert client.post("/api/v1/items/", json={}, headers=headers).status_code == 503
+    response = client.post("/api/v1/items/", json={}, headers=headers)
+
+    assert response.status_code == 200
+    assert len(calls) == 2
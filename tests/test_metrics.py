@@ -0,0 +1,101 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.metrics import Histogram, _Metric, clear_metrics, render_metrics
+from app.core.settings import Settings, settings
+from app.main import create_app
+from app.models.models import DimSupplier
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """Valor da amostra `name` com exatamente os labels informados"""
+    for line in text.splitlines():
+        match = re.fullmatch(r"(\w+)(?:\{(.*)\})? (\S+)", line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+        if found == {k: str(v) for k, v in labels.items()}:
+            return float(match.group(3))
+    raise AssertionError(f"amostra {name} {labels} não encontrada")
+
+
+def test_metrics_endpoint(client: TestClient, auth_headers: dict, db: Session):
+    supplier = DimSupplier(supplier_name="Fornecedor Métricas", location_id=1)
+    db.add(supplier)
+    db.commit()
+    clear_metrics()
+    route = "/api/v1/suppliers/{supplier_id}"
+
+    for _ in range(2):
+        client.get(f"/api/v1/suppliers/{supplier.supplier_id}", headers=auth_headers)
+    client.get("/api/v1/suppliers/999999", headers=auth_headers)
+    client.post(
+        "/api/v1/warranties/bulk",
+        json={
+            "warranties": [
+                {
+                    "vehicle_id": 1,
+                    "repair_date": "2024-04-01",
+                    "part_id": 10,
+                    "classifed_as": "MECANICO",
+                    "location_id": 1,
+                    "purchance_id": 1,
+                }
+            ]
+        },
+        headers=auth_headers,
+    )
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    latency = "http_request_duration_seconds_count"
+    assert sample(text, latency, method="GET", route=route, status=200) == 2
+    assert sample(text, latency, method="GET", route=route, status=404) == 1
+    assert sample(text, "http_requests_in_progress", method="GET") == 1
+    assert sample(text, "db_statements_per_request_count", route=route) == 3
+    assert sample(text, "db_statements_per_request_sum", route=route) >= 3
+    assert sample(text, "bulk_rows_inserted_total", table="fact_warranties") == 1
+    assert sample(text, "cache_requests_total", namespace="user", result="hit") >= 3
+    assert sample(text, "db_statements_total") >= 3
+
+
+def test_histogram_rendering():
+    histogram = Histogram("test_latency", "Teste", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, 'rota "x"')
+
+    lines = [line for line in histogram.render().splitlines() if "#" not in line]
+
+    assert lines == [
+        'test_latency_bucket{route="rota \\"x\\"",le="0.1"} 2',
+        'test_latency_bucket{route="rota \\"x\\"",le="1"} 3',
+        'test_latency_bucket{route="rota \\"x\\"",le="+Inf"} 4',
+        'test_latency_sum{route="rota \\"x\\""} 3.65',
+        'test_latency_count{route="rota \\"x\\""} 4',
+    ]
+    assert "test_latency_count" in render_metrics()
+
+
+def test_internal_endpoints_are_off_by_default(monkeypatch):
+    for flag in ("METRICS_ENABLED", "DIAGNOSTICS_ENABLED"):
+        assert Settings.model_fields[flag].default is False
+        monkeypatch.setattr(settings, flag, False)
+
+    client = TestClient(create_app())
+
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/api/v1/diagnostics/compression").status_code == 404
+
+
+def test_metric_without_samples_fails_on_creation():
+    class Incomplete(_Metric):
+        type = "gauge"
+
+    with pytest.raises(TypeError):
+        Incomplete("incompleta", "Métrica sem samples")
@@ -0,0 +1,85 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.db.query_counter import QueryCounterMiddleware, statement_shape
+from app.models.models import DimSupplier, FactWarranties
+
+from .conftest import engine
+
+
+def test_bulk_create_has_no_n_plus_one(
+    client: TestClient, auth_headers: dict, db: Session, query_budget
+):
+    row = {
+        "vehicle_id": 1,
+        "repair_date": "2024-04-01",
+        "part_id": 10,
+        "classifed_as": "MECANICO",
+        "location_id": 1,
+        "purchance_id": 1,
+    }
+
+    # Usuário do token e o INSERT em lote, sem um refresh por linha
+    with query_budget(2):
+        response = client.post(
+            "/api/v1/warranties/bulk",
+            json={"warranties": [row] * 10},
+            headers=auth_headers,
+        )
+
+    assert response.status_code == 200
+    assert [item["claim_key"] for item in response.json()] == list(range(1, 11))
+    assert db.query(FactWarranties).count() == 10
+
+
+def test_read_supplier_query_budget(
+    client: TestClient, auth_headers: dict, db: Session, query_budget, monkeypatch
+):
+    supplier = DimSupplier(supplier_name="Fornecedor Orçamento", location_id=1)
+    db.add(supplier)
+    db.commit()
+    url = f"/api/v1/suppliers/{supplier.supplier_id}"
+    monkeypatch.setattr(settings, "QUERY_DEBUG", True)
+
+    with query_budget(2) as log:
+        response = client.get(url, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["x-query-count"] == str(log.count)
+    assert "x-query-repeated" not in response.headers
+
+
+def test_repeated_statements_are_flagged(monkeypatch, caplog):
+    app = FastAPI()
+    app.add_middleware(QueryCounterMiddleware)
+
+    @app.get("/items")
+    def items():
+        with engine.connect() as conn:
+            ids = [1, 2, 3, 4]
+            conn.exec_driver_sql("select 1 where 1 in (?, ?)", (1, 2))
+            return [
+                conn.exec_driver_sql("select ? + 1", (item,)).scalar() for item in ids
+            ]
+
+    client = TestClient(app)
+    assert "x-query-count" not in client.get("/items").headers
+
+    monkeypatch.setattr(settings, "QUERY_DEBUG", True)
+    response = client.get("/items")
+
+    assert response.json() == [2, 3, 4, 5]
+    assert response.headers["x-query-count"] == "5"
+    assert response.headers["x-query-repeated"] == "1"
+    assert "4 execuções de select ? + 1" in caplog.text
+
+
+def test_statement_shape():
+    assert statement_shape("SELECT a FROM t WHERE id IN (?, ?, ?)") == (
+        "SELECT a FROM t WHERE id IN (?)"
+    )
+    assert statement_shape("SELECT a\n  FROM t WHERE id = %(id_1)s") == (
+        "SELECT a FROM t WHERE id = ?"
+    )
@@ -0,0 +1,96 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit import MemoryTokenBuckets, RateLimitMiddleware
+from app.core.security import create_access_token
+from app.core.settings import RateLimitRule
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules={
+            "bulk": RateLimitRule(
+                pattern=r"^/api/v1/[^/]+/bulk$", rate=0.01, burst=2, methods=["POST"]
+            )
+        },
+        store=MemoryTokenBuckets(),
+    )
+
+    @app.post("/api/v1/parts/bulk")
+    async def bulk():
+        return {"ok": True}
+
+    @app.get("/api/v1/parts/bulk")
+    async def bulk_get():
+        return {"ok": True}
+
+    @app.get("/api/v1/parts")
+    async def parts():
+        return {"ok": True}
+
+    async def with_client_ip(scope, receive, send):
+        # O TestClient usa sempre o mesmo endereço: o header de teste o substitui
+        for name, value in scope.get("headers", []):
+            if name == b"x-test-ip":
+                scope = {**scope, "client": (value.decode(), 50000)}
+        await app(scope, receive, send)
+
+    return TestClient(with_client_ip)
+
+
+def auth(username: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+
+def test_bucket_exhausted_returns_429_with_retry_after():
+    client = make_app()
+    headers = auth("ana")
+
+    assert client.post("/api/v1/parts/bulk", headers=headers).status_code == 200
+    assert client.post("/api/v1/parts/bulk", headers=headers).status_code == 200
+
+    response = client.post("/api/v1/parts/bulk", headers=headers)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_buckets_are_per_user_and_per_ip():
+    client = make_app()
+    for ip in ("10.0.0.1", "10.0.0.2"):
+        client.post("/api/v1/parts/bulk", headers={**auth("ana"), "X-Test-IP": ip})
+    response = client.post(
+        "/api/v1/parts/bulk", headers={**auth("ana"), "X-Test-IP": "10.0.0.3"}
+    )
+    assert response.status_code == 429
+
+    # Outro usuário em outro IP e clientes sem token têm baldes próprios
+    response = client.post(
+        "/api/v1/parts/bulk", headers={**auth("bia"), "X-Test-IP": "10.0.0.4"}
+    )
+    assert response.status_code == 200
+    assert client.post("/api/v1/parts/bulk").status_code == 200
+
+    # Token com assinatura inválida conta como o IP
+    forged = {"Authorization": "Bearer invalido"}
+    assert client.post("/api/v1/parts/bulk", headers=forged).status_code == 200
+    assert client.post("/api/v1/parts/bulk", headers=forged).status_code == 429
+
+
+def test_authenticated_requests_are_also_limited_per_ip():
+    client = make_app()
+    ip = {"X-Test-IP": "10.0.0.1"}
+    assert client.post("/api/v1/parts/bulk", headers=ip).status_code == 200
+
+    # Trocar de conta não contorna o balde do IP
+    for username, status_code in (("ana", 200), ("bia", 429), ("caio", 429)):
+        response = client.post("/api/v1/parts/bulk", headers={**auth(username), **ip})
+        assert response.status_code == status_code, username
+
+
+def test_routes_outside_groups_are_not_limited():
+    client = make_app()
+    for _ in range(10):
+        assert client.get("/api/v1/parts").status_code == 200
+        assert client.get("/api/v1/parts/bulk").status_code == 200
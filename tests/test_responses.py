@@ -0,0 +1,39 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.core.responses import FastJSONResponse
+from app.core.settings import settings
+
+CONTENT = {
+    "items": [
+        {
+            "repair_date": date(2024, 3, 1),
+            "updated_at": datetime(2024, 3, 1, 12, 30),
+            "ratio": Decimal("0.25"),
+            "model": "Ônibus",
+        }
+    ],
+    "next_cursor": None,
+}
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_fast_json_matches_default_encoding(monkeypatch, enabled):
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", enabled)
+
+    body = json.loads(FastJSONResponse(CONTENT).body)
+
+    assert body == {
+        "items": [
+            {
+                "repair_date": "2024-03-01",
+                "updated_at": "2024-03-01T12:30:00",
+                "ratio": 0.25,
+                "model": "Ônibus",
+            }
+        ],
+        "next_cursor": None,
+    }
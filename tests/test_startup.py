@@ -0,0 +1,73 @@
+"""
+Orçamento de tempo de importação, medido com `python -X importtime`.
+
+Os limites de tempo são folgados para não oscilar com a máquina; o que pega
+as regressões de fato é a lista de módulos que só devem ser carregados no
+primeiro uso.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Importar app.main não monta a aplicação
+IMPORT_BUDGET_MS = 1000
+# create_app() importa os routers, mas não o que é inicializado no primeiro uso
+CREATE_APP_BUDGET_MS = 2000
+
+LAZY_PACKAGES = ("passlib", "bcrypt", "jose", "cryptography", "pyarrow")
+
+
+def import_times(code: str) -> dict:
+    """Tempo acumulado (ms) de cada módulo importado ao executar `code`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Os módulos importados diretamente têm um único espaço de indentação
+        times[name[1:]] = int(cumulative) / 1000
+    return times
+
+
+def top_level_total(times: dict) -> float:
+    return sum(ms for name, ms in times.items() if not name.startswith(" "))
+
+
+def imported(times: dict, package: str) -> bool:
+    return any(
+        name.strip() == package or name.strip().startswith(f"{package}.")
+        for name in times
+    )
+
+
+def test_import_main_is_cheap():
+    times = import_times("import app.main")
+
+    assert not imported(times, "app.api")
+    for package in LAZY_PACKAGES:
+        assert not imported(times, package), package
+    assert top_level_total(times) < IMPORT_BUDGET_MS
+
+
+def test_create_app_defers_engine_and_crypto():
+    times = import_times(
+        "import app.main as main\n"
+        "main.create_app()\n"
+        "from app.db.database import get_engine\n"
+        "assert get_engine.cache_info().currsize == 0, 'engine criado na partida'\n"
+    )
+
+    assert imported(times, "app.api.warranties")
+    for package in LAZY_PACKAGES:
+        assert not imported(times, package), package
+    assert top_level_total(times) < CREATE_APP_BUDGET_MS
@@ -1,9 +1,14 @@
 import pytest
+from cryptography.fernet import Fernet
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.core.pagination import encode_cursor
 from app.core.security import create_access_token
+from app.core.settings import settings
+from app.models.auth import User
 from app.models.models import DimSupplier
+from app.services.key_rotation import CpfReencryptionJob
 
 
 @pytest.fixture
@@ -58,11 +63,59 @@ def test_list_suppliers(
 
     response = client.get("/api/v1/suppliers/", headers=auth_headers)
     assert response.status_code == 200
-    data = response.json()
+    data = response.json()["items"]
     assert len(data) >= 2
     assert any(s["supplier_name"] == test_supplier["supplier_name"] for s in data)
 
 
+def test_list_suppliers_cursor_pagination(
+    client: TestClient, test_supplier: dict, auth_headers: dict, db: Session
+):
+    db.add_all(
+        [DimSupplier(supplier_name=f"Fornecedor {i}", location_id=1) for i in range(5)]
+    )
+    db.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/suppliers/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend(s["supplier_id"] for s in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+
+def test_list_suppliers_limit_capped(client: TestClient, auth_headers: dict):
+    response = client.get(
+        "/api/v1/suppliers/", params={"limit": 10**6}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+    response = client.get(
+        "/api/v1/suppliers/", params={"cursor": "invalido"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    # Cursor bem formado, mas com valor de tipo diferente da chave
+    for values in (["abc"], [True], [1.5], [None]):
+        response = client.get(
+            "/api/v1/suppliers/",
+            params={"cursor": encode_cursor(values)},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400, values
+
+
 def test_update_supplier(
     client: TestClient, test_supplier: dict, auth_headers: dict, db: Session
 ):
@@ -113,3 +166,123 @@ def test_create_supplier_unauthorized(client: TestClient, test_supplier: dict):
 def test_read_supplier_not_found(client: TestClient, auth_headers: dict):
     response = client.get("/api/v1/suppliers/999999", headers=auth_headers)
     assert response.status_code == 404
+
+
+def test_search_suppliers_modes(client: TestClient, auth_headers: dict, db: Session):
+    db.add_all(
+        [
+            DimSupplier(supplier_name="Autopecas Brasil", location_id=1),
+            DimSupplier(supplier_name="Brasil Freios", location_id=1),
+            DimSupplier(supplier_name="Metalurgica Sul", location_id=2),
+        ]
+    )
+    db.commit()
+
+    response = client.get(
+        "/api/v1/suppliers/search", params={"q": "brasil"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    names = [s["supplier_name"] for s in response.json()]
+    assert names == ["Brasil Freios", "Autopecas Brasil"]
+
+    response = client.get(
+        "/api/v1/suppliers/search",
+        params={"q": "bra", "mode": "prefix"},
+        headers=auth_headers,
+    )
+    assert [s["supplier_name"] for s in response.json()] == ["Brasil Freios"]
+
+    response = client.get(
+        "/api/v1/suppliers/search",
+        params={"q": "metalurgika", "mode": "fuzzy"},
+        headers=auth_headers,
+    )
+    results = response.json()
+    assert results[0]["supplier_name"] == "Metalurgica Sul"
+    assert 0 < results[0]["score"] <= 1
+
+
+def test_search_index_follows_updates(
+    client: TestClient, test_supplier: dict, auth_headers: dict, db: Session
+):
+    db_supplier = DimSupplier(**test_supplier)
+    db.add(db_supplier)
+    db.commit()
+
+    client.put(
+        f"/api/v1/suppliers/{db_supplier.supplier_id}",
+        json={"supplier_name": "Novo Nome Ltda", "location_id": 1},
+        headers=auth_headers,
+    )
+
+    response = client.get(
+        "/api/v1/suppliers/", params={"name": "nome ltda"}, headers=auth_headers
+    )
+    assert [s["supplier_name"] for s in response.json()["items"]] == ["Novo Nome Ltda"]
+    response = client.get(
+        "/api/v1/suppliers/", params={"name": "Teste"}, headers=auth_headers
+    )
+    assert response.json()["items"] == []
+
+
+def test_statement_cache_hits(
+    client: TestClient, test_supplier: dict, auth_headers: dict, db: Session
+):
+    db_supplier = DimSupplier(**test_supplier)
+    db.add(db_supplier)
+    db.commit()
+
+    url = f"/api/v1/suppliers/{db_supplier.supplier_id}"
+    client.get(url, headers=auth_headers)
+    before = client.get(
+        "/api/v1/diagnostics/statement-cache", headers=auth_headers
+    ).json()
+    client.get(url, headers=auth_headers)
+    after = client.get(
+        "/api/v1/diagnostics/statement-cache", headers=auth_headers
+    ).json()
+
+    assert after["hits"] > before["hits"]
+    assert after["misses"] == before["misses"]
+
+
+def test_current_user_cache_invalidated_on_deactivation(
+    client: TestClient, auth_headers: dict, db: Session
+):
+    assert client.get("/api/v1/suppliers/", headers=auth_headers).status_code == 200
+
+    user = db.query(User).filter(User.username == "testuser").first()
+    user.is_active = False
+    db.commit()
+
+    response = client.get("/api/v1/suppliers/", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_cpf_key_rotation(db: Session, monkeypatch):
+    """CPFs gravados com a chave antiga continuam legíveis e são recriptografados"""
+    legacy = [
+        DimSupplier(supplier_name=f"Antigo {i}", cpf=f"000.000.000-0{i}")
+        for i in range(5)
+    ]
+    db.add_all(legacy)
+    db.add(DimSupplier(supplier_name="Ilegível", _encrypted_cpf="não-é-fernet"))
+    db.commit()
+
+    new_key = Fernet.generate_key().decode()
+    monkeypatch.setattr(settings, "ENCRYPTION_KEYS", [new_key])
+    assert [s.cpf for s in legacy] == [f"000.000.000-0{i}" for i in range(5)]
+
+    progress = list(CpfReencryptionJob(db, batch_size=2).run())
+    assert progress[-1]["rotated"] == 5
+    assert progress[-1]["unreadable"] == 1
+    assert progress[-1]["scanned"] == progress[-1]["total"] == 6
+
+    db.expire_all()
+    for i, supplier in enumerate(legacy):
+        assert Fernet(new_key).decrypt(supplier._encrypted_cpf.encode()).decode() == (
+            f"000.000.000-0{i}"
+        )
+
+    # Uma nova execução não encontra nada a recriptografar
+    assert list(CpfReencryptionJob(db).run())[-1]["rotated"] == 0
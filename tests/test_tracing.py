@@ -0,0 +1,123 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core.security import user_cache
+from app.core.settings import settings
+from app.core.tracing import parse_traceparent, span_exporter
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def read_spans(path):
+    """Spans de cada trace exportado"""
+    assert span_exporter.flush(timeout=5)
+    traces = []
+    for line in path.read_text().splitlines():
+        (resource,) = json.loads(line)["resourceSpans"]
+        (scope,) = resource["scopeSpans"]
+        traces.append(scope["spans"])
+    return traces
+
+
+def by_name(spans):
+    """Primeiro span de cada nome"""
+    return {span["name"]: span for span in reversed(spans)}
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (
+        TRACE_ID,
+        PARENT_ID,
+        True,
+    )
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")[2] is False
+    # Versões futuras podem acrescentar campos
+    assert parse_traceparent(f"01-{TRACE_ID}-{PARENT_ID}-01-extra") is not None
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01-extra") is None
+    assert parse_traceparent(f"ff-{TRACE_ID}-{PARENT_ID}-01") is None
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent("00-xyz") is None
+
+
+def test_request_phases_are_traced(
+    client: TestClient, auth_headers: dict, monkeypatch, tmp_path
+):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATIO", 0.0)
+    monkeypatch.setattr(settings, "TRACE_EXPORT_PATH", str(path))
+    headers = {**auth_headers, "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+    user_cache.clear()
+
+    response = client.get("/api/v1/analytics/supplier-transactions", headers=headers)
+
+    assert response.status_code == 200
+    (trace,) = read_spans(path)
+    spans = by_name(trace)
+    root = spans["GET /api/v1/analytics/supplier-transactions"]
+    assert root["traceId"] == TRACE_ID
+    assert root["parentSpanId"] == PARENT_ID
+    assert root["kind"] == 2
+    assert response.headers["traceparent"] == f"00-{TRACE_ID}-{root['spanId']}-01"
+
+    assert {
+        "auth.decode_token",
+        "auth.load_user",
+        "db.statement",
+        "serialize.rows",
+        "serialize.json",
+    } <= spans.keys()
+    assert spans["auth.decode_token"]["parentSpanId"] == root["spanId"]
+    # O SELECT do usuário é filho da busca do usuário
+    user_lookups = [
+        span
+        for span in trace
+        if span.get("parentSpanId") == spans["auth.load_user"]["spanId"]
+    ]
+    assert [span["name"] for span in user_lookups] == ["db.statement"]
+    assert spans["db.statement"]["kind"] == 3
+    for span in trace:
+        assert int(span["startTimeUnixNano"]) <= int(span["endTimeUnixNano"])
+        assert int(root["startTimeUnixNano"]) <= int(span["startTimeUnixNano"])
+
+
+def test_sampling(client: TestClient, auth_headers: dict, monkeypatch, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACE_EXPORT_PATH", str(path))
+
+    # A decisão do chamador prevalece sobre a fração amostrada
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATIO", 1.0)
+    response = client.get("/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+    assert "traceparent" not in response.headers
+    assert span_exporter.flush(timeout=5)
+    assert not path.exists()
+
+    # Sem traceparent, a requisição inicia um trace novo
+    response = client.get("/")
+    trace_id = response.headers["traceparent"].split("-")[1]
+    (trace,) = read_spans(path)
+    spans = by_name(trace)
+    assert spans["GET /"]["traceId"] == trace_id
+    assert "parentSpanId" not in spans["GET /"]
+
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATIO", 0.0)
+    assert "traceparent" not in client.get("/").headers
+    assert len(read_spans(path)) == 1
+
+
+def test_export_file_is_rotated(client: TestClient, monkeypatch, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATIO", 1.0)
+    monkeypatch.setattr(settings, "TRACE_EXPORT_PATH", str(path))
+
+    client.get("/")
+    assert span_exporter.flush(timeout=5)
+    monkeypatch.setattr(settings, "TRACE_EXPORT_MAX_BYTES", path.stat().st_size + 1)
+    client.get("/")
+
+    assert len(read_spans(path)) == 1
+    assert len(read_spans(tmp_path / "traces.jsonl.1")) == 1
@@ -0,0 +1,227 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.models import DimParts, DimPurchances, DimSupplier
+
+
+def create_transactions(db: Session, count: int):
+    for i in range(count):
+        supplier = DimSupplier(supplier_name=f"Fornecedor {i}", location_id=1)
+        part = DimParts(part_name=f"Peça {i}", supplier=supplier)
+        db.add(
+            DimPurchances(
+                purchance_type="COMPRA", purchance_date=date(2024, 1, 1), part=part
+            )
+        )
+    db.commit()
+
+
+def test_get_transaction_expand(client: TestClient, auth_headers: dict, db: Session):
+    create_transactions(db, 1)
+    transaction = db.query(DimPurchances).first()
+
+    url = f"/api/v1/transactions/{transaction.purchance_id}"
+    data = client.get(url, headers=auth_headers).json()
+    assert "part" not in data
+
+    data = client.get(
+        url, params={"expand": "part.supplier"}, headers=auth_headers
+    ).json()
+    assert data["part"]["part_name"] == "Peça 0"
+    assert data["part"]["supplier"]["supplier_name"] == "Fornecedor 0"
+    assert "warranties" not in data
+
+    response = client.get(url, params={"expand": "supplier"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_list_transactions_expand_query_count_is_constant(
+    client: TestClient, auth_headers: dict, db: Session, query_budget
+):
+    create_transactions(db, 30)
+    params = {"expand": "part,part.supplier,warranties"}
+    # Aquece o cache do usuário autenticado
+    client.get("/api/v1/transactions/", headers=auth_headers)
+
+    counts = []
+    for page_size in (3, 30):
+        with query_budget(10) as log:
+            response = client.get(
+                "/api/v1/transactions/",
+                params={**params, "limit": page_size},
+                headers=auth_headers,
+            )
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert len(items) == page_size
+        assert all(item["part"]["supplier"] for item in items)
+        counts.append(log.count)
+
+    assert counts[0] == counts[1]
+
+
+def test_list_transactions_sparse_fields(
+    client: TestClient, auth_headers: dict, db: Session
+):
+    create_transactions(db, 3)
+
+    response = client.get(
+        "/api/v1/transactions/",
+        params={"fields": "purchance_date", "limit": 2},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert page["items"][0] == {"purchance_id": 1, "purchance_date": "2024-01-01"}
+    assert page["next_cursor"]
+
+    response = client.get(
+        "/api/v1/transactions/",
+        params={"fields": "purchance_date", "cursor": page["next_cursor"]},
+        headers=auth_headers,
+    )
+    assert [t["purchance_id"] for t in response.json()["items"]] == [3]
+
+    for params in ({"fields": "secret"}, {"fields": "part_id", "expand": "part"}):
+        response = client.get(
+            "/api/v1/transactions/", params=params, headers=auth_headers
+        )
+        assert response.status_code == 400
+
+
+def test_list_transactions_conditional_get(
+    client: TestClient, auth_headers: dict, db: Session, query_budget
+):
+    create_transactions(db, 3)
+    url = "/api/v1/transactions/"
+
+    response = client.get(url, headers=auth_headers)
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+
+    # Sem escritas, o If-None-Match responde 304 sem consultar os dados
+    client.get(url, headers=auth_headers)
+    with query_budget(0):
+        response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # Filtros diferentes têm ETags diferentes
+    other = client.get(url, params={"fields": "purchance_type"}, headers=auth_headers)
+    assert other.headers["ETag"] != etag
+
+    # Uma escrita em tabela lida pela rota muda a versão
+    supplier = db.query(DimSupplier).first()
+    supplier.supplier_name = "Renomeado"
+    db.commit()
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_analytics_conditional_get(client: TestClient, auth_headers: dict, db: Session):
+    url = "/api/v1/analytics/transactions"
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    create_transactions(db, 1)
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["transactions"] == [{"type": "COMPRA", "count": 1}]
+
+
+def test_every_analytics_route_is_conditional(client: TestClient, auth_headers: dict):
+    urls = [
+        route.path
+        for route in client.app.routes
+        if route.path.startswith("/api/v1/analytics/") and "GET" in route.methods
+    ]
+    assert len(urls) >= 6
+
+    for url in urls:
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200, url
+        assert response.headers.get("ETag"), url
+        assert response.headers.get("Last-Modified"), url
+
+        response = client.get(
+            url, headers={**auth_headers, "If-None-Match": response.headers["ETag"]}
+        )
+        assert response.status_code == 304, url
+
+
+def test_no_etags_without_shared_versions(
+    client: TestClient, auth_headers: dict, monkeypatch
+):
+    from app.core.settings import settings
+
+    monkeypatch.setattr(settings, "CONDITIONAL_GET_IN_MEMORY", False)
+    url = "/api/v1/analytics/transactions"
+
+    response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+    assert "Last-Modified" not in response.headers
+
+    response = client.get(url, headers={**auth_headers, "If-None-Match": "*"})
+    assert response.status_code == 200
+
+
+def test_cli_job_writes_change_the_etag(
+    client: TestClient, auth_headers: dict, db: Session, tmp_path
+):
+    from app.models.models import FactWarranties
+    from app.services.warranty_archive import WarrantyArchive
+
+    from .conftest import TestingSessionLocal
+
+    db.add(
+        FactWarranties(
+            vehicle_id=1, repair_date=date(2020, 1, 1), part_id=1, classifed_as="X"
+        )
+    )
+    db.commit()
+    url = "/api/v1/analytics/warranty-by-model"
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+
+    # Job de linha de comando, com a própria sessão
+    job_db = TestingSessionLocal()
+    try:
+        assert WarrantyArchive(str(tmp_path)).archive(job_db, date(2021, 1, 1)) == 1
+    finally:
+        job_db.close()
+
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_export_transactions_csv(client: TestClient, auth_headers: dict, db: Session):
+    create_transactions(db, 3)
+    db.add(DimPurchances(purchance_type="DEVOLUCAO", purchance_date=date(2024, 2, 1)))
+    db.commit()
+
+    response = client.get(
+        "/api/v1/transactions/export",
+        params={"purchance_type": "COMPRA", "fields": "purchance_date"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"]
+    assert response.text.splitlines() == [
+        "purchance_id,purchance_date",
+        "1,2024-01-01",
+        "2,2024-01-01",
+        "3,2024-01-01",
+    ]
+
+    response = client.get(
+        "/api/v1/transactions/export",
+        params={"format": "xlsx"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
@@ -0,0 +1,365 @@
+import csv
+import io
+import json
+from datetime import date
+
+import msgpack
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import DimVehicle, FactWarranties
+from app.services.export import ExportFormat, TableExport
+
+
+@pytest.fixture
+def warranties(client: TestClient, auth_headers: dict, db: Session):
+    db.add_all(
+        [
+            DimVehicle(
+                vehicle_id=1,
+                model="Sedan X",
+                prod_date=date(2022, 1, 1),
+                year=2022,
+                propulsion="COMBUSTION",
+            ),
+            DimVehicle(
+                vehicle_id=2,
+                model="SUV Y",
+                prod_date=date(2023, 1, 1),
+                year=2023,
+                propulsion="ELECTRIC",
+            ),
+        ]
+    )
+    db.commit()
+
+    def warranty(vehicle_id, part_id, repair_date, client_comment, tech_comment):
+        return {
+            "vehicle_id": vehicle_id,
+            "repair_date": repair_date,
+            "client_comment": client_comment,
+            "tech_comment": tech_comment,
+            "part_id": part_id,
+            "classifed_as": "MECANICO",
+            "location_id": 1,
+            "purchance_id": 1,
+        }
+
+    payload = {
+        "warranties": [
+            warranty(
+                1, 10, "2024-01-10", "Barulho no freio dianteiro", "Pastilha gasta"
+            ),
+            warranty(1, 20, "2024-02-15", "Freio de mão não segura", "Cabo rompido"),
+            warranty(
+                2, 10, "2024-03-20", "Ruído na suspensão", "Amortecedor com vazamento"
+            ),
+            warranty(
+                2, 30, "2023-05-05", "Motor falhando", "Vela de ignição com defeito"
+            ),
+        ]
+    }
+    response = client.post(
+        "/api/v1/warranties/bulk", json=payload, headers=auth_headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def search(client: TestClient, auth_headers: dict, **params):
+    response = client.get(
+        "/api/v1/warranties/search", params=params, headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_search_warranty_comments(client, auth_headers, warranties):
+    hits = search(client, auth_headers, q="freio")["items"]
+    assert {h["part_id"] for h in hits} == {10, 20}
+    assert all(h["score"] > 0 for h in hits)
+
+    hits = search(client, auth_headers, q='"freio de mão"')["items"]
+    assert [h["part_id"] for h in hits] == [20]
+
+    hits = search(client, auth_headers, q="freio -pastilha")["items"]
+    assert [h["part_id"] for h in hits] == [20]
+
+    hits = search(client, auth_headers, q="suspensao OR motor")["items"]
+    assert {h["part_id"] for h in hits} == {10, 30}
+
+    # Operadores soltos são ignorados
+    for q in ("freio -", 'freio "" -""', "freio ,"):
+        hits = search(client, auth_headers, q=q)["items"]
+        assert {h["part_id"] for h in hits} == {10, 20}, q
+
+
+def test_search_warranty_filters_and_pagination(client, auth_headers, warranties):
+    hits = search(client, auth_headers, q="freio OR ruido", model="SUV Y")["items"]
+    assert [h["vehicle_id"] for h in hits] == [2]
+
+    hits = search(
+        client,
+        auth_headers,
+        q="freio OR ruido OR motor",
+        start_date="2024-01-01",
+        end_date="2024-12-31",
+        part_id=10,
+    )["items"]
+    assert len(hits) == 2
+
+    page = search(client, auth_headers, q="freio OR ruido OR motor", limit=2)
+    assert len(page["items"]) == 2
+    rest = search(
+        client,
+        auth_headers,
+        q="freio OR ruido OR motor",
+        limit=2,
+        cursor=page["next_cursor"],
+    )
+    assert rest["next_cursor"] is None
+    keys = [h["claim_key"] for h in page["items"] + rest["items"]]
+    assert len(keys) == len(set(keys)) == 4
+
+
+def test_search_warranty_requires_positive_term(client, auth_headers, warranties):
+    response = client.get(
+        "/api/v1/warranties/search", params={"q": "-freio"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    response = client.get(
+        "/api/v1/warranties/search", params={"q": "- OR"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
+def test_analytics_merge_archived_warranties(
+    client, auth_headers, warranties, db, tmp_path, monkeypatch
+):
+    from app.core.settings import settings
+    from app.models.models import DimParts, DimPurchances, DimSupplier, FactWarranties
+    from app.services.warranty_archive import WarrantyArchive
+
+    db.add_all(
+        [
+            DimSupplier(supplier_id=1, supplier_name="Freios SA", location_id=1),
+            DimSupplier(supplier_id=2, supplier_name="Ignição SA", location_id=1),
+            DimParts(part_id=10, part_name="Pastilha", supplier_id=1),
+            DimParts(part_id=20, part_name="Cabo", supplier_id=1),
+            DimParts(part_id=30, part_name="Vela", supplier_id=2),
+            DimParts(part_id=40, part_name="Bobina", supplier_id=2),
+            DimPurchances(
+                purchance_id=1,
+                purchance_type="COMPRA",
+                purchance_date=date(2023, 6, 1),
+                part_id=10,
+            ),
+            DimPurchances(
+                purchance_id=2,
+                purchance_type="COMPRA",
+                purchance_date=date(2024, 6, 1),
+                part_id=10,
+            ),
+            DimPurchances(
+                purchance_id=3,
+                purchance_type="COMPRA",
+                purchance_date=date(2023, 6, 1),
+                part_id=40,
+            ),
+        ]
+    )
+    db.commit()
+
+    endpoints = [
+        "/api/v1/analytics/supplier-sales",
+        "/api/v1/analytics/warranty-by-model",
+        "/api/v1/analytics/model-transactions",
+        "/api/v1/analytics/part-performance",
+    ]
+
+    def snapshot(**params):
+        return [
+            sorted(
+                client.get(url, params=params, headers=auth_headers).json(),
+                key=str,
+            )
+            for url in endpoints
+        ]
+
+    before_all = snapshot()
+    before_range = snapshot(start_date="2023-01-01", end_date="2024-01-31")
+    assert all(before_all) and all(before_range)
+
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    archived = WarrantyArchive().archive(db, date(2024, 2, 1), batch_size=1)
+    assert archived == 2
+    assert db.query(FactWarranties).count() == 2
+    assert list(tmp_path.glob("fact_warranties/repair_year=2023/*/*.parquet"))
+
+    assert snapshot() == before_all
+    assert snapshot(start_date="2023-01-01", end_date="2024-01-31") == before_range
+
+    # O manifesto lido fica em cache até o arquivo ser substituído
+    archive = WarrantyArchive()
+    assert archive.archived_before == date(2024, 2, 1)
+    assert archive.archive(db, date(2024, 3, 1)) == 1
+    assert archive.archived_before == date(2024, 3, 1)
+    assert snapshot() == before_all
+
+
+def test_export_warranties_formats(client, auth_headers, warranties):
+
+    url = "/api/v1/warranties/export"
+    params = {"start_date": "2024-01-01", "end_date": "2024-12-31"}
+
+    response = client.get(url, params=params, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "warranties.csv" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["repair_date"] for row in rows] == [
+        "2024-01-10",
+        "2024-02-15",
+        "2024-03-20",
+    ]
+    assert rows[0]["client_comment"] == "Barulho no freio dianteiro"
+
+    response = client.get(
+        url, params={**params, "format": "ndjson"}, headers=auth_headers
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["part_id"] for line in lines] == [10, 20, 10]
+
+    response = client.get(
+        url, params={**params, "format": "parquet"}, headers=auth_headers
+    )
+    table = pyarrow.parquet.read_table(pa.BufferReader(response.content))
+    assert table.num_rows == 3
+    assert table.column("repair_date").to_pylist()[0] == date(2024, 1, 10)
+
+    response = client.get(
+        url,
+        params={"format": "arrow", "vehicle_id": 2, "fields": "part_id"},
+        headers=auth_headers,
+    )
+    table = pyarrow.ipc.open_stream(response.content).read_all()
+    assert table.column_names == ["claim_key", "part_id"]
+    assert table.column("part_id").to_pylist() == [10, 30]
+
+
+def test_export_streams_in_batches(db: Session, warranties):
+    statement = select(FactWarranties.claim_key, FactWarranties.repair_date)
+    export = TableExport(db, statement.order_by(FactWarranties.claim_key), 1)
+
+    chunks = list(export.stream(ExportFormat.ndjson))
+
+    # Um bloco por lote: as linhas são enviadas à medida que são lidas
+    assert len(chunks) == 4
+    assert json.loads(chunks[0]) == {"claim_key": 1, "repair_date": "2024-01-10"}
+
+
+def columnar_warranties(pa):
+    return pa.table(
+        {
+            "vehicle_id": pa.array([1, 2], pa.int32()),
+            "repair_date": ["2024-04-01", "2024-04-02"],
+            "client_comment": ["Vidro elétrico travado", None],
+            "part_id": [40, 50],
+            "classifed_as": ["ELETRICO", "ELETRICO"],
+            "location_id": [1, 1],
+            "purchance_id": [1, 1],
+            "ignorada": ["x", "y"],
+        }
+    )
+
+
+def test_bulk_warranties_columnar_formats(client, auth_headers, db: Session):
+    table = columnar_warranties(pa)
+    sink = pa.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = client.post(
+        "/api/v1/warranties/bulk",
+        content=sink.getvalue().to_pybytes(),
+        headers={**auth_headers, "Content-Type": "application/vnd.apache.arrow.stream"},
+    )
+    assert response.status_code == 200
+    created = response.json()
+    assert [w["part_id"] for w in created] == [40, 50]
+    assert created[0]["repair_date"] == "2024-04-01"
+
+    sink = pa.BufferOutputStream()
+    pyarrow.parquet.write_table(table, sink)
+    response = client.post(
+        "/api/v1/warranties/bulk",
+        content=sink.getvalue().to_pybytes(),
+        headers={**auth_headers, "Content-Type": "application/vnd.apache.parquet"},
+    )
+    assert response.status_code == 200
+    assert response.json()[0]["claim_key"] == created[-1]["claim_key"] + 1
+
+    warranty = db.get(FactWarranties, created[0]["claim_key"])
+    assert warranty.client_comment == "Vidro elétrico travado"
+    assert warranty.repair_date == date(2024, 4, 1)
+    # O índice de busca dos comentários também é atualizado
+    assert search(client, auth_headers, q="vidro")["items"]
+
+
+def test_bulk_columnar_validation(client, auth_headers, db: Session):
+    def post(table):
+        sink = pa.BufferOutputStream()
+        pyarrow.parquet.write_table(table, sink)
+        return client.post(
+            "/api/v1/warranties/bulk",
+            content=sink.getvalue().to_pybytes(),
+            headers={**auth_headers, "Content-Type": "application/x-parquet"},
+        )
+
+    table = columnar_warranties(pa)
+    response = post(
+        table.drop(["part_id"]).set_column(0, "vehicle_id", pa.array(["1", "carro"]))
+    )
+    assert response.status_code == 422
+    errors = {tuple(e["loc"]): e["type"] for e in response.json()["detail"]}
+    assert errors == {
+        ("body", "warranties", "vehicle_id"): "type_error",
+        ("body", "warranties", "part_id"): "missing",
+    }
+
+    response = post(table.set_column(3, "part_id", pa.array([40, None])))
+    assert response.status_code == 422
+    assert "1 linha(s) sem valor" in response.json()["detail"][0]["msg"]
+    assert db.query(FactWarranties).count() == 0
+
+    response = client.post(
+        "/api/v1/warranties/bulk",
+        content=b"a,b",
+        headers={**auth_headers, "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 415
+
+
+def test_bulk_msgpack(client, auth_headers):
+    body = msgpack.packb(
+        {
+            "vehicles": {
+                "model": ["Sedan X", "SUV Y"],
+                "prod_date": ["2022-01-01", "2023-01-01"],
+                "year": [2022, 2023],
+                "propulsion": ["COMBUSTION", "ELECTRIC"],
+            }
+        }
+    )
+    response = client.post(
+        "/api/v1/vehicles/bulk",
+        content=body,
+        headers={**auth_headers, "Content-Type": "application/msgpack"},
+    )
+    assert response.status_code == 200
+    assert [v["model"] for v in response.json()] == ["Sedan X", "SUV Y"]